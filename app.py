@@ -1,26 +1,268 @@
 import streamlit as st
-import requests
 import re
+import os
+import hmac
 import json
-from bs4 import BeautifulSoup
-from openai import OpenAI
+import hashlib
+import threading
+import time
+import uuid
+import http_client
+import tracing
+from cache import SingleFlight, TTLCache
+from http_client import HttpClient
+from naver_book import NaverBookCrawler
+from book_store import BookStore, get_isbn
+from synopsis_prep import SynopsisNormalizer
+from shared_backend import open_backend
+import session_checkpoint
+from essay_batch import build_report_csv, essay_key, parse_essays, report_filename, run_batch
+from debate_context import DebateContext
+from concurrent.futures import ThreadPoolExecutor
+from jobs import JobExecutor
+from question_bank import QuestionBank, sample_items
+from llm import LLMClient, LLMError, LLMTimeoutError
+from llm_router import CircuitBreaker, ModelRouter
+import scheduler
+from scheduler import LLMScheduler
+from tracing import Tracer
+from reading_pack import find_book, load_pack
+from quiz import (
+    QUIZ_ITEM_SCHEMA, QUIZ_SCHEMA, QuizGenerationError, explanation_key, grade_quiz,
+    json_schema_format, log_quiz_validation, quiz_metrics, validate_quiz_item,
+)
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# === 설정 ===
+
+def get_config(name, default=None):
+    """설정값 조회: st.secrets → 환경 변수 → 기본값 (secrets.toml이 없는 CLI에서도 동작)"""
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        pass
+    return os.environ.get(name, default)
 
 # === API 키 설정 ===
-OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
-NAVER_CLIENT_ID = st.secrets["NAVER_CLIENT_ID"]
-NAVER_CLIENT_SECRET = st.secrets["NAVER_CLIENT_SECRET"]
+OPENAI_API_KEY = get_config("OPENAI_API_KEY")
+NAVER_CLIENT_ID = get_config("NAVER_CLIENT_ID")
+NAVER_CLIENT_SECRET = get_config("NAVER_CLIENT_SECRET")
+
+# OpenAI 요청 스케줄러 (분당 요청/토큰 한도, 우선순위, 세션별 공정성. 프로세스당 1개)
+@st.cache_resource
+def get_llm_scheduler():
+    return LLMScheduler(
+        requests_per_min=int(get_config("LLM_REQUESTS_PER_MIN", 500)),
+        tokens_per_min=int(get_config("LLM_TOKENS_PER_MIN", 30000)),
+    )
+
+# OpenAI 클라이언트 초기화 (요청 병합/응답 캐시 래퍼, 프로세스당 1개)
+@st.cache_resource
+def get_llm_client():
+    from openai import OpenAI  # 무거운 모듈이라 첫 LLM 호출 때 읽음 (콜드 스타트 단축)
+
+    return LLMClient(
+        # OPENAI_BASE_URL로 호환 서버(벤치마크용 가짜 서버 등)를 지정할 수 있음
+        OpenAI(api_key=OPENAI_API_KEY, base_url=get_config("OPENAI_BASE_URL") or None),
+        cache_maxsize=int(get_config("LLM_CACHE_MAXSIZE", 1024)),
+        cache_ttl=float(get_config("LLM_CACHE_TTL", 24 * 3600)),
+        persist_path=get_config("LLM_CACHE_PATH") or None,
+        scheduler=get_llm_scheduler(),
+    )
+
+# 마감 시간/대체 모델/차단기를 적용한 모델 라우터 (모든 ChatGPT 호출이 거침)
+@st.cache_resource
+def get_model_router():
+    return ModelRouter(
+        get_llm_client(),
+        primary=get_config("LLM_MODEL", "gpt-4o"),
+        fallback=get_config("LLM_FALLBACK_MODEL", "gpt-4o-mini") or None,  # 빈 값이면 hedging 끔
+        timeout=float(get_config("LLM_TIMEOUT", 90)),
+        breaker=CircuitBreaker(
+            failure_threshold=int(get_config("LLM_BREAKER_FAILURES", 3)),
+            cooldown=float(get_config("LLM_BREAKER_COOLDOWN", 30)),
+        ),
+    )
+
+# === 읽기 자료 팩 ===
+
+@st.cache_resource
+def load_reading_pack(path, mtime):
+    """팩 파일 읽기 (파일이 바뀌면 mtime이 달라져 다시 읽음)"""
+    try:
+        return load_pack(path)
+    except ValueError as e:
+        st.warning(f"읽기 자료 팩을 불러오지 못했습니다: {e}")
+        return None
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=OPENAI_API_KEY)
+def get_reading_pack():
+    """READING_PACK_PATH(기본값 reading_pack.json)의 수업용 읽기 자료 팩, 없으면 None"""
+    path = get_config("READING_PACK_PATH", "reading_pack.json")
+    if not os.path.exists(path):
+        return None
+    return load_reading_pack(path, os.path.getmtime(path))
+
+# === HTTP 클라이언트 설정 ===
+
+@st.cache_resource
+def configure_http_client():
+    """네이버 요청에 쓰이는 공용 HTTP 클라이언트를 설정값으로 초기화 (프로세스당 1회)"""
+    host_overrides = get_config("HTTP_HOST_OVERRIDES", {})
+    if isinstance(host_overrides, str):  # 환경 변수로 줄 때는 JSON 문자열
+        host_overrides = json.loads(host_overrides)
+    client = HttpClient(
+        pool_maxsize=int(get_config("HTTP_POOL_MAXSIZE", 16)),
+        connect_timeout=float(get_config("HTTP_CONNECT_TIMEOUT", 3.05)),
+        read_timeout=float(get_config("HTTP_READ_TIMEOUT", 10)),
+        retries=int(get_config("HTTP_RETRIES", 2)),
+        backoff_factor=float(get_config("HTTP_BACKOFF_FACTOR", 0.3)),
+        host_overrides=dict(host_overrides),
+    )
+    http_client.set_client(client)
+    return client
+
+# === 외부 호출 추적 설정 ===
+
+@st.cache_resource
+def configure_tracing():
+    """외부 호출 기록기 초기화 (JSONL 로그 + Prometheus 스크레이프 파일, 프로세스당 1회)"""
+    tracer = Tracer(
+        log_path=get_config("TRACE_LOG_PATH") or cache_path("traces.jsonl"),
+        max_bytes=int(get_config("TRACE_LOG_MAX_BYTES", 5 * 2**20)),
+        backup_count=int(get_config("TRACE_LOG_BACKUPS", 5)),
+        metrics_path=get_config("METRICS_PATH") or cache_path("metrics.prom"),
+        metrics_interval=float(get_config("METRICS_INTERVAL", 10)),
+    )
+    tracing.set_tracer(tracer)
+    return tracer
+
+# === 캐시 설정 ===
+
+# 줄거리 재작성 프롬프트를 바꾸면 버전을 올려서 이전 캐시를 무효화
+SYNOPSIS_PROMPT_VERSION = "v1"
+
+def cache_path(filename):
+    """영구 캐시 파일 경로 (CACHE_DIR 설정, 기본값 .cache)"""
+    cache_dir = get_config("CACHE_DIR", ".cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+@st.cache_resource
+def get_search_cache():
+    """모든 세션이 공유하는 네이버 책 검색 결과 캐시 (프로세스당 1개)"""
+    return TTLCache(
+        maxsize=int(get_config("SEARCH_CACHE_MAXSIZE", 512)),
+        ttl=float(get_config("SEARCH_CACHE_TTL", 3600)),
+        persist_path=get_config("SEARCH_CACHE_PATH") or None,
+        table="search_cache",
+    )
+
+@st.cache_resource
+def get_synopsis_cache():
+    """초등학생용으로 재작성한 줄거리 영구 캐시 (만료 없음)"""
+    return TTLCache(
+        maxsize=int(get_config("SYNOPSIS_CACHE_MAXSIZE", 2048)),
+        ttl=None,
+        persist_path=cache_path("synopsis.sqlite3"),
+        table="synopsis_cache",
+    )
+
+@st.cache_resource
+def get_shared_backend():
+    """워커 프로세스 공용 저장소 (SHARED_BACKEND: "memory" 또는 "sqlite:<경로>", 기본값 memory)"""
+    return open_backend(
+        get_config("SHARED_BACKEND", "memory"),
+        maxsize=int(get_config("ARTIFACT_MAXSIZE", 4096)),
+        ttl=float(get_config("ARTIFACT_TTL", 7 * 24 * 3600)),
+    )
+
+@st.cache_resource
+def get_checkpoint_store():
+    """세션 체크포인트 저장소 (CHECKPOINT_BACKEND, 기본값은 공용 저장소가 SQLite면 그 파일, 아니면 로컬 SQLite 파일)"""
+    spec = get_config("CHECKPOINT_BACKEND")
+    if not spec:
+        shared = get_config("SHARED_BACKEND", "memory")
+        spec = shared if shared.startswith("sqlite:") else f"sqlite:{cache_path('sessions.sqlite3')}"
+    return session_checkpoint.open_store(spec)
+
+@st.cache_resource
+def get_checkpoint_gc_state():
+    """오래된 체크포인트 정리 시각 (프로세스당 1개)"""
+    return {"last_run": 0.0}, threading.Lock()
+
+@st.cache_resource
+def get_book_store():
+    """모든 세션이 공유하는 도서 저장소 (세션 상태에는 책 ID만 보관)"""
+    return BookStore(maxsize=int(get_config("BOOK_STORE_MAXSIZE", 5000)), clean=remove_html_tags)
+
+@st.cache_resource
+def get_synopsis_normalizer():
+    """프롬프트에 넣기 전 줄거리 중복 문장/페이지 문구 제거 및 토큰 예산 자르기 (결과는 입력별로 보관)"""
+    return SynopsisNormalizer(budget=int(get_config("SYNOPSIS_TOKEN_BUDGET", 1200)))
+
+@st.cache_resource
+def get_book_page_cache():
+    """ISBN별 네이버 책 상세 페이지 원본 HTML 캐시"""
+    return TTLCache(
+        maxsize=int(get_config("BOOK_PAGE_CACHE_MAXSIZE", 256)),
+        ttl=float(get_config("BOOK_PAGE_CACHE_TTL", 7 * 24 * 3600)),
+        persist_path=cache_path("book_pages.sqlite3"),
+        table="book_page_cache",
+    )
+
+@st.cache_resource
+def get_explanation_cache():
+    """(문제, 오답) 조합별 오답 해설 영구 캐시 - 같은 문제를 틀린 다른 학생이 재사용"""
+    return TTLCache(
+        maxsize=int(get_config("EXPLANATION_CACHE_MAXSIZE", 4096)),
+        ttl=None,
+        persist_path=cache_path("explanations.sqlite3"),
+        table="explanation_cache",
+    )
+
+@st.cache_resource
+def get_question_bank():
+    """책별 퀴즈 문제 은행 (모든 세션 공용, SQLite 영구 저장)"""
+    return QuestionBank(cache_path("question_bank.sqlite3"))
+
+@st.cache_resource
+def get_submission_store():
+    """학생 퀴즈 응답 기록 (모든 세션 공용, SQLite 영구 저장)"""
+    from submissions import SubmissionStore  # NumPy는 첫 제출/분석 때 읽음
+
+    return SubmissionStore(cache_path("submissions.sqlite3"))
+
+@st.cache_resource
+def get_quiz_analytics(book_key):
+    """책별 학급 퀴즈 집계 (새 응답만 읽어 누적하므로 프로세스에 책마다 1개 유지)"""
+    from submissions import QuizAnalytics
+
+    return QuizAnalytics(get_submission_store(), book_key)
+
+@st.cache_resource
+def get_bank_refill_state():
+    """문제 은행 보충용 프로세스 공용 스레드 풀과 진행 중인 책 키 집합"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="bank-refill"), set(), threading.Lock()
+
+@st.cache_resource
+def get_synopsis_flight():
+    """같은 책의 줄거리 재작성 요청을 하나의 LLM 호출로 합치기 위한 SingleFlight"""
+    return SingleFlight()
 
 # === 유틸리티 함수들 ===
 
+# 매 호출마다 컴파일하지 않도록 모듈 로드 시 한 번만 컴파일
+HTML_TAG_RE = re.compile(r"<.*?>")
+CODE_FENCE_START_RE = re.compile(r"^```(json)?")
+CODE_FENCE_END_RE = re.compile(r"```$")
+TOPIC_NUMBER_RE = re.compile(r"^[0-9]+[). ]+")
+
 def remove_html_tags(text):
     """HTML 태그 제거"""
     if not text:
         return ""
-    clean = re.compile(r"<.*?>")
-    return re.sub(clean, "", text)
+    return HTML_TAG_RE.sub("", text)
 
 def remove_code_fences(text: str) -> str:
     """
@@ -29,47 +271,149 @@ def remove_code_fences(text: str) -> str:
     """
     text = text.strip()
     # 앞부분의 ```json 또는 ``` 제거
-    text = re.sub(r"^```(json)?", "", text)
+    text = CODE_FENCE_START_RE.sub("", text)
     # 뒷부분의 ``` 제거
-    text = re.sub(r"```$", "", text)
+    text = CODE_FENCE_END_RE.sub("", text)
     # 혹시 맨 앞에 'json'만 남아있는 경우 제거
     text = text.strip()
     if text.lower().startswith("json"):
         text = text[4:].strip()
     return text
 
-def get_chatgpt_response(prompt, system_prompt=None):
-    """단일 프롬프트에 대한 ChatGPT 응답"""
+# 호출 지점별 스케줄링 우선순위 (목록에 없는 호출 지점은 대화형으로 취급)
+CALL_SITE_PRIORITY = {
+    "debate_turn": scheduler.INTERACTIVE,
+    "debate_evaluation": scheduler.INTERACTIVE,
+    "debate_summary": scheduler.INTERACTIVE,
+    "quiz_explain": scheduler.INTERACTIVE,
+    "essay_feedback": scheduler.INTERACTIVE,
+    "essay_batch_feedback": scheduler.REWRITE,
+    "synopsis_rewrite": scheduler.REWRITE,
+    "quiz_generate": scheduler.REWRITE,
+    "quiz_repair": scheduler.REWRITE,
+    "debate_topics": scheduler.REWRITE,
+}
+
+def call_priority(call_site):
+    """LLM 호출 우선순위 (백그라운드 작업에서 고정한 값이 있으면 그 값)"""
+    override = scheduler.priority_override.get()
+    if override is not None:
+        return override
+    return CALL_SITE_PRIORITY.get(call_site, scheduler.INTERACTIVE)
+
+def current_session_id():
+    """스케줄러 공정성 계산에 쓰는 세션 ID (세션 컨텍스트가 없는 스레드는 "background")
+
+    백그라운드 작업과 대체 모델 요청 스레드에서도 LLM 호출마다 불리므로, 컨텍스트가 없다는 경고는 끈다.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else "background"
+
+# 호출 지점별 마감 시간(초): 스트리밍은 첫 조각, 그 외는 전체 응답까지. 넘기면 대체 모델에도 요청
+CALL_SITE_DEADLINE = {
+    "debate_turn": 6,
+    "debate_evaluation": 8,
+    "essay_feedback": 8,
+    "synopsis_rewrite": 10,
+    "quiz_explain": 15,
+    "debate_summary": 15,
+    "debate_topics": 20,
+    "quiz_repair": 20,
+    "quiz_generate": 30,
+    "essay_batch_feedback": 30,
+}
+DEFAULT_DEADLINE = 20
+
+def call_deadline(call_site):
+    return CALL_SITE_DEADLINE.get(call_site, DEFAULT_DEADLINE)
+
+def stream_chat_completion(messages, cache=False, call_site="chat", cache_if=None, **params):
+    """ChatGPT 응답을 stream=True로 받아 텍스트 조각 단위로 yield (실패하면 LLMError)"""
+    yield from get_model_router().stream(
+        messages,
+        deadline=call_deadline(call_site),
+        cache=cache,
+        cache_if=cache_if,
+        call_site=call_site,
+        priority=call_priority(call_site),
+        session_id=current_session_id(),
+        temperature=0.5,
+        max_tokens=800,
+        **params,
+    )
+
+def get_chatgpt_response(prompt, system_prompt=None, stream=False, cache=False, response_format=None,
+                         call_site="chat", cache_if=None):
+    """단일 프롬프트에 대한 ChatGPT 응답 (stream=True면 텍스트 조각 제너레이터 반환)
+
+    cache=True면 같은 요청의 응답을 프로세스 공용 캐시에서 재사용한다.
+    cache_if를 주면 그 검사를 통과한 응답만 캐시에 넣는다.
+    response_format을 주면 구조화 출력(JSON schema) 모드로 요청한다.
+    call_site는 호출 추적 기록에 남길 호출 지점 이름이다.
+    """
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": prompt})
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",  # 필요에 따라 모델명 조정
-            messages=messages,
-            temperature=0.5,
-            max_tokens=800,
+    return get_chatgpt_chat_response(
+        messages, stream=stream, cache=cache, response_format=response_format, call_site=call_site,
+        cache_if=cache_if,
+    )
+
+def get_chatgpt_chat_response(chat_history, stream=False, cache=False, response_format=None,
+                              call_site="chat", cache_if=None):
+    """대화 이력 전체에 대한 ChatGPT 응답 (stream=True면 텍스트 조각 제너레이터 반환)
+
+    마감 시간 안에 응답이 없으면 대체 모델에도 요청하고, 끝내 실패하면 LLMError를 던진다.
+    """
+    params = {"response_format": response_format} if response_format else {}
+    if stream:
+        return stream_chat_completion(
+            chat_history, cache=cache, call_site=call_site, cache_if=cache_if, **params
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Error: {e}"
+    return get_model_router().complete(
+        chat_history,
+        deadline=call_deadline(call_site),
+        cache=cache,
+        cache_if=cache_if,
+        call_site=call_site,
+        priority=call_priority(call_site),
+        session_id=current_session_id(),
+        temperature=0.5,
+        max_tokens=800,
+        **params,
+    )
 
-def get_chatgpt_chat_response(chat_history):
-    """대화 이력 전체에 대한 ChatGPT 응답"""
+def show_llm_error(error):
+    st.error(f"ChatGPT 응답을 받지 못했습니다. 잠시 후 다시 시도해 주세요. ({error})")
+
+def write_llm_stream(chunks):
+    """st.write_stream과 같지만 LLM 호출이 실패하면 에러를 표시하고 None 반환"""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",  # 필요에 따라 모델명 조정
-            messages=chat_history,
-            temperature=0.5,
-            max_tokens=800,
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Error: {e}"
+        return st.write_stream(chunks)
+    except LLMError as e:
+        show_llm_error(e)
+        return None
+
+def normalize_query(query):
+    """검색 캐시 키용 검색어 정규화 (앞뒤 공백 제거, 연속 공백 축약, 소문자화)"""
+    return " ".join(query.split()).casefold()
+
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_START = 1000  # 네이버 도서 API의 start 최대값
+
+def fetch_search_page(query, display=10, start=1, sort="sim"):
+    """네이버 도서 API로 검색 결과 한 페이지 요청 (결과는 세션 공용 캐시에 저장, 실패하면 예외)
+
+    캐시 키에만 정규화한 검색어를 쓰고, API에는 입력한 검색어를 그대로 보낸다.
+    """
+    cache = get_search_cache()
+    cache_key = json.dumps([normalize_query(query), display, start, sort], ensure_ascii=False)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        tracing.get_tracer().record({"call_site": "naver_search", "cache_hit": True, "duration": 0.0})
+        return cached
 
-def search_books(query):
-    """네이버 도서 API를 사용하여 책 검색"""
     url = "https://openapi.naver.com/v1/search/book.json"
     headers = {
         "X-Naver-Client-Id": NAVER_CLIENT_ID,
@@ -77,66 +421,633 @@ def search_books(query):
     }
     params = {
         "query": query,
-        "display": 10,    
-        "start": 1,
-        "sort": "sim"     
+        "display": display,
+        "start": start,
+        "sort": sort
     }
+    response = http_client.get_client().get(
+        url, call_site="naver_search", headers=headers, params=params
+    )
+    response.raise_for_status()
+    books = response.json().get("items", [])
+    cache.set(cache_key, books)
+    return books
+
+def search_books(query, display=10, start=1, sort="sim"):
+    """네이버 도서 API를 사용하여 책 검색 (에러는 화면에 표시하고 빈 목록 반환)"""
     try:
-        response = requests.get(url, headers=headers, params=params)
-        data = response.json()
+        return fetch_search_page(query, display=display, start=start, sort=sort)
     except Exception as e:
         st.error(f"네이버 API 응답 처리 중 에러 발생: {e}")
         return []
-    books = data.get("items", [])
-    return books
 
-def get_synopsis_from_naverbook(book_title):
-    """네이버 책 상세 페이지 크롤링을 통해 줄거리 정보 가져오기"""
-    headers = {"User-Agent": "Mozilla/5.0"}
+def merge_search_results(book_ids, new_books):
+    """이미 받은 결과(책 ID 목록) 뒤에 새 페이지를 붙이되 같은 책(ISBN 기준)은 한 번만"""
+    merged = list(book_ids)
+    seen = set(merged)
+    for book_id in get_book_store().ingest_many(new_books):
+        if book_id not in seen:
+            seen.add(book_id)
+            merged.append(book_id)
+    return merged
+
+def prefetch_search_page(query, start):
+    """다음 검색 페이지를 백그라운드에서 미리 받아 검색 캐시에 넣어 둠"""
+    if start <= SEARCH_MAX_START:
+        get_job_executor().submit("search_prefetch", fetch_search_page, query, SEARCH_PAGE_SIZE, start)
+
+def start_search(query):
+    """새 검색: 첫 페이지를 받고 페이지 커서를 초기화 (결과가 있으면 True)"""
+    books = search_books(query, display=SEARCH_PAGE_SIZE, start=1)
+    st.session_state.search_results = merge_search_results([], books)
+    st.session_state.search_cursor = {
+        "query": query,
+        "next_start": 1 + SEARCH_PAGE_SIZE,
+        "exhausted": len(books) < SEARCH_PAGE_SIZE,
+    }
+    if not st.session_state.search_cursor["exhausted"]:
+        prefetch_search_page(query, 1 + SEARCH_PAGE_SIZE)
+    return bool(books)
+
+def load_more_search_results():
+    """커서 위치의 다음 페이지를 붙이고 그 다음 페이지를 미리 요청 (새로 추가된 책 수 반환)"""
+    cursor = st.session_state.search_cursor
     try:
-        # 1) 네이버 책 검색 페이지에서 첫번째 결과 링크 추출
-        search_url = f"https://book.naver.com/search/search.nhn?query={book_title}"
-        search_response = requests.get(search_url, headers=headers)
-        search_soup = BeautifulSoup(search_response.text, "html.parser")
-        first_link = search_soup.select_one("ul.list_type1 li a")
-        if first_link is None:
-            return None
-
-        detail_url = "https://book.naver.com" + first_link.get("href")
-        # 2) 상세 페이지 요청 후 줄거리 정보 추출
-        detail_response = requests.get(detail_url, headers=headers)
-        detail_soup = BeautifulSoup(detail_response.text, "html.parser")
-        summary_div = detail_soup.find("div", class_="book_intro")
-        if summary_div:
-            summary_text = summary_div.get_text(separator="\n").strip()
-            return summary_text
-        else:
-            return None
+        # 미리 받는 중이면 끝날 때까지 기다렸다가 캐시에서 가져감
+        take_pregenerated("search_prefetch", "다음 검색 결과를 가져오는 중...")
+    except Exception:
+        pass  # 아래에서 다시 요청하며 에러를 표시
+    books = search_books(cursor["query"], display=SEARCH_PAGE_SIZE, start=cursor["next_start"])
+    before = len(st.session_state.search_results)
+    st.session_state.search_results = merge_search_results(st.session_state.search_results, books)
+    cursor["next_start"] += SEARCH_PAGE_SIZE
+    cursor["exhausted"] = len(books) < SEARCH_PAGE_SIZE or cursor["next_start"] > SEARCH_MAX_START
+    if not cursor["exhausted"]:
+        prefetch_search_page(cursor["query"], cursor["next_start"])
+    return len(st.session_state.search_results) - before
+
+def get_synopsis_from_naverbook(book):
+    """네이버 책 상세 페이지 크롤링을 통해 줄거리 정보 가져오기 (책 소개가 없으면 None, 요청 실패는 예외)
+
+    API item에 상세 페이지 링크가 있었으면 검색 페이지를 거치지 않는다.
+    """
+    crawler = NaverBookCrawler(http_client.get_client(), html_cache=get_book_page_cache())
+    return crawler.get_synopsis(book.title, book.link, isbn=book.isbn)
+
+def get_combined_synopsis(book):
+    """네이버 API의 description + 크롤링 데이터를 합쳐 정규화한 줄거리 반환 (책마다 한 번만 크롤링)
+
+    크롤링 요청이 실패하면 API 설명만으로 만든 줄거리를 반환하되 책 레코드에는 보관하지 않는다
+    (일시적인 실패 결과를 모든 세션이 계속 쓰지 않고, 다음에 책을 고를 때 다시 크롤링하도록).
+    """
+    if book.combined_synopsis is not None:
+        return book.combined_synopsis
+    try:
+        naverbook_synopsis = get_synopsis_from_naverbook(book)
+        crawled = True
     except Exception as e:
         st.error(f"네이버 도서 상세 페이지 크롤링 중 에러 발생: {e}")
-        return None
-
-def get_combined_synopsis(book_title, book_data):
-    """네이버 API의 description + 크롤링 데이터를 합쳐서 최종 줄거리 반환"""
-    naver_description = remove_html_tags(book_data.get("description", "줄거리 정보가 없습니다."))
-    naverbook_synopsis = get_synopsis_from_naverbook(book_title)
-    if naverbook_synopsis:
-        combined = naver_description + "\n\n" + naverbook_synopsis
-    else:
-        combined = naver_description
+        naverbook_synopsis, crawled = None, False
+    # 겹치는 문장과 페이지 문구를 지우고 토큰 예산 안으로 자름
+    combined = get_synopsis_normalizer().normalize(book.description, naverbook_synopsis)
+    combined = combined or "줄거리 정보가 없습니다."
+    if crawled:
+        book.combined_synopsis = combined
     return combined
 
-def rewrite_synopsis_for_elementary(book_title, combined_synopsis):
-    """초등학생용 쉬운 문장으로 줄거리 재작성"""
+def synopsis_cache_key(isbn, book_title, combined_synopsis):
+    """ISBN + (프롬프트 버전, 제목, 원본 줄거리) 해시로 만든 줄거리 캐시 키"""
+    source = f"{SYNOPSIS_PROMPT_VERSION}\n{book_title}\n{combined_synopsis}"
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    return f"{isbn or 'no-isbn'}:{digest}"
+
+def rewrite_synopsis_for_elementary(book_title, combined_synopsis, isbn="", refresh=False, stream=False):
+    """초등학생용 쉬운 문장으로 줄거리 재작성 (결과는 영구 캐시에 저장)
+
+    refresh=True면 캐시를 무시하고 다시 생성한다.
+    stream=True면 텍스트 조각 제너레이터를 반환한다 (st.write_stream용).
+    """
+    chunks = stream_synopsis_rewrite(book_title, combined_synopsis, isbn, refresh)
+    if stream:
+        return chunks
+    with st.spinner("줄거리 재작성 중..."):
+        return "".join(chunks)
+
+SYNOPSIS_LEASE_TTL = 120  # 다른 워커의 줄거리 생성을 기다리는 최대 시간(초)
+# 같은 워커에서 먼저 시작한 재작성을 기다리는 최대 시간(초): 그 요청의 리스 대기 + 생성 시간
+SYNOPSIS_FOLLOW_TIMEOUT = 2 * SYNOPSIS_LEASE_TTL
+
+def stream_synopsis_rewrite(book_title, combined_synopsis, isbn="", refresh=False):
+    """줄거리 재작성 결과를 조각 단위로 yield (캐시 히트 시 전체 텍스트 한 번)"""
+    cache = get_synopsis_cache()
+    cache_key = synopsis_cache_key(isbn, book_title, combined_synopsis)
+    if not refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    backend = get_shared_backend()
+    if not refresh:
+        # 다른 워커가 이미 만든 줄거리면 그대로 사용
+        shared = backend.get_artifact("synopsis", cache_key)
+        if shared is not None:
+            cache.set(cache_key, shared)
+            yield shared
+            return
+
+    # 다른 학생이 같은 책을 동시에 선택하면 진행 중인 호출 결과를 함께 사용
+    flight = get_synopsis_flight()
+    call, is_leader = flight.begin(cache_key)
+    if not is_leader:
+        # 먼저 시작한 요청이 실패하면 같은 LLMError, 끝나지 않으면 LLMTimeoutError
+        try:
+            shared = call.wait(SYNOPSIS_FOLLOW_TIMEOUT)
+        except TimeoutError:
+            raise LLMTimeoutError("먼저 시작한 줄거리 재작성이 끝나지 않았습니다. 잠시 후 다시 시도해 주세요.")
+        yield shared
+        return
+
+    # begin() 이후에는 어떤 예외가 나도 finally에서 finish()해서 기다리는 요청이 멈추지 않도록 함
+    lease_name = f"synopsis:{cache_key}"
+    owner = backend.new_owner()
+    result = error = None
+    try:
+        # 다른 워커가 같은 줄거리를 생성 중이면 끝날 때까지 기다렸다가 결과 사용
+        if not backend.acquire_lease(lease_name, owner, SYNOPSIS_LEASE_TTL):
+            shared = backend.wait_for_artifact("synopsis", cache_key, lease_name, SYNOPSIS_LEASE_TTL)
+            if shared is not None:
+                cache.set(cache_key, shared)
+                result = shared
+                yield shared
+                return
+            backend.acquire_lease(lease_name, owner, SYNOPSIS_LEASE_TTL)
+
+        prompt = (
+            f"다음 책 '{book_title}'의 줄거리 정보를 바탕으로, 네이버 API와 크롤링 데이터를 이용한 내용만을 사용하여, "
+            "초등학생들이 쉽게 이해할 수 있도록 쉬운 어휘와 구체적인 내용을 사용해 20줄 이상의 줄거리로 자연스럽게 정리해줘. "
+            "내용에 API나 크롤링 티가 나지 않도록, 진짜 책 줄거리처럼 재구성해줘.\n\n"
+            f"원본 줄거리:\n{combined_synopsis}"
+        )
+        parts = []
+        for chunk in get_chatgpt_response(prompt, stream=True, call_site="synopsis_rewrite"):
+            parts.append(chunk)
+            yield chunk
+        rewritten = "".join(parts).strip()
+        cache.set(cache_key, rewritten)
+        backend.put_artifact("synopsis", cache_key, rewritten)
+        result = rewritten
+    except BaseException as e:
+        # 호출이 실패하거나 화면 갱신 등으로 스트림이 중단되면 기다리던 요청에도 알림
+        if result is None:
+            error = e if isinstance(e, LLMError) else LLMError("줄거리 재작성이 중단되었습니다.")
+        raise
+    finally:
+        flight.finish(cache_key, call, result=result, error=error)
+        backend.release_lease(lease_name, owner)
+
+# === 퀴즈/토론 주제 생성 ===
+
+QUIZ_QUESTION_COUNT = 3
+QUIZ_REPAIR_ATTEMPTS = 2
+
+def is_valid_quiz_response(text, count):
+    """퀴즈 생성 응답을 고치지 않고 그대로 쓸 수 있는지 (이런 응답만 응답 캐시에 보관)"""
+    try:
+        items = json.loads(remove_code_fences(text)).get("quiz")
+    except (ValueError, AttributeError):
+        return False
+    return (
+        isinstance(items, list) and len(items) >= count
+        and not any(validate_quiz_item(item) for item in items[:count])
+    )
+
+def generate_quiz(book_title, book_synopsis, count=QUIZ_QUESTION_COUNT, exclude_questions=(), cache=True):
+    """줄거리로 4지 선다형 퀴즈 생성 (백그라운드 스레드에서도 호출 가능)
+
+    구조화 출력으로 받은 뒤 문제별로 검증하고, 잘못된 문제만 다시 생성한다.
+    exclude_questions의 문제와는 겹치지 않게 만든다 (문제 은행 보충용).
+    cache=False면 응답 캐시를 거치지 않고 매번 새로 생성한다.
+    """
     prompt = (
-        f"다음 책 '{book_title}'의 줄거리 정보를 바탕으로, 네이버 API와 크롤링 데이터를 이용한 내용만을 사용하여, "
-        "초등학생들이 쉽게 이해할 수 있도록 쉬운 어휘와 구체적인 내용을 사용해 20줄 이상의 줄거리로 자연스럽게 정리해줘. "
-        "내용에 API나 크롤링 티가 나지 않도록, 진짜 책 줄거리처럼 재구성해줘.\n\n"
-        f"원본 줄거리:\n{combined_synopsis}"
+        f"다음 책 '{book_title}'의 줄거리를 바탕으로 {count}개의 4지 선다형 독서 퀴즈 문제를 JSON 형식으로 생성해줘. "
+        "각 문제는 question(문제 내용), options(서로 다른 선택지 4개), "
+        "correct_answer(options 중 하나와 정확히 같은 정답)로 구성해줘.\n"
     )
-    with st.spinner("줄거리 재작성 중..."):
-        rewritten = get_chatgpt_response(prompt)
-    return rewritten
+    if exclude_questions:
+        prompt += "아래 문제들과는 겹치지 않게 만들어줘:\n" + "\n".join(f"- {q}" for q in exclude_questions) + "\n"
+    prompt += f"\n줄거리:\n{book_synopsis}"
+    try:
+        quiz_json_str = get_chatgpt_response(
+            prompt, cache=cache, response_format=json_schema_format("reading_quiz", QUIZ_SCHEMA),
+            call_site="quiz_generate", cache_if=lambda text: is_valid_quiz_response(text, count),
+        )
+    except LLMError as e:
+        # 에러 메시지를 JSON으로 파싱하지 않도록 호출 실패는 바로 퀴즈 생성 실패로 처리
+        raise QuizGenerationError("퀴즈 생성 중 ChatGPT 응답을 받지 못했습니다.", None, detail=e)
+
+    # JSON 파싱 전, 코드 블록 제거
+    quiz_json_str_clean = remove_code_fences(quiz_json_str)
+
+    # JSON 파싱 시도
+    try:
+        quiz_dict = json.loads(quiz_json_str_clean)
+    except Exception as e:
+        raise QuizGenerationError(
+            "퀴즈 생성에 실패했습니다. ChatGPT가 JSON 형식으로 응답했는지 확인하세요.",
+            quiz_json_str_clean, detail=e,
+        )
+    items = quiz_dict.get("quiz") if isinstance(quiz_dict, dict) else None
+    if not isinstance(items, list):
+        raise QuizGenerationError(
+            "생성된 JSON에 'quiz' 키가 없습니다. ChatGPT 응답을 확인하세요.", quiz_json_str_clean
+        )
+
+    # 문제 수를 맞추고, 모자란 문제는 잘못된 문제와 같이 다시 생성
+    received = len(items)
+    items = items[:count] + [None] * (count - len(items))
+    invalid = [idx for idx, item in enumerate(items) if validate_quiz_item(item)]
+    repaired = 0
+    for idx in invalid:
+        new_item = regenerate_quiz_item(book_title, book_synopsis, items, idx)
+        if new_item is not None:
+            items[idx] = new_item
+            repaired += 1
+    failed = len(invalid) - repaired
+    log_quiz_validation(count, received, len(invalid), repaired, failed)
+    if failed:
+        raise QuizGenerationError(
+            f"{failed}개 문제를 올바른 형식으로 만들지 못했습니다. 다시 시도해 주세요.", quiz_json_str_clean
+        )
+    return items
+
+def regenerate_quiz_item(book_title, book_synopsis, items, index):
+    """index번 문제 하나만 다시 생성 (검증을 통과하면 반환, 실패하면 None)"""
+    other_questions = [
+        item["question"] for idx, item in enumerate(items)
+        if idx != index and not validate_quiz_item(item)
+    ]
+    prompt = (
+        f"다음 책 '{book_title}'의 줄거리를 바탕으로 4지 선다형 독서 퀴즈 문제 1개를 JSON 형식으로 생성해줘. "
+        "question(문제 내용), options(서로 다른 선택지 4개), "
+        "correct_answer(options 중 하나와 정확히 같은 정답)로 구성해줘.\n"
+    )
+    if other_questions:
+        prompt += "아래 문제들과는 겹치지 않게 만들어줘:\n" + "\n".join(f"- {q}" for q in other_questions) + "\n"
+    prompt += f"\n줄거리:\n{book_synopsis}"
+
+    for _ in range(QUIZ_REPAIR_ATTEMPTS):
+        try:
+            response = get_chatgpt_response(
+                prompt, response_format=json_schema_format("reading_quiz_item", QUIZ_ITEM_SCHEMA),
+                call_site="quiz_repair",
+            )
+            item = json.loads(remove_code_fences(response))
+        except (LLMError, ValueError):
+            continue
+        if not validate_quiz_item(item):
+            return item
+    return None
+
+# === 퀴즈 문제 은행 ===
+
+BANK_TARGET_SIZE = int(get_config("QUESTION_BANK_TARGET_SIZE", 30))
+BANK_LOW_WATERMARK = int(get_config("QUESTION_BANK_LOW_WATERMARK", 12))
+BANK_BATCH_SIZE = 5
+BANK_MAX_BATCHES = 12
+
+def bank_key(book_title, isbn=""):
+    """문제 은행에서 책을 구분하는 키 (ISBN이 없으면 제목)"""
+    return isbn or f"title:{book_title}"
+
+def fill_question_bank(bank, key, book_title, book_synopsis, target=BANK_TARGET_SIZE):
+    """문제 은행이 target개가 될 때까지 기존 문제와 겹치지 않는 문제를 나눠서 생성
+
+    생성에 실패하거나 중복 문제만 나와 은행이 늘지 않으면 같은 프롬프트로 다시 요청하게 되므로,
+    캐시된 응답이 되풀이되지 않도록 응답 캐시를 거치지 않는다.
+    """
+    for _ in range(BANK_MAX_BATCHES):
+        existing = [item["question"] for item in bank.items(key)]
+        if len(existing) >= target:
+            break
+        try:
+            items = generate_quiz(
+                book_title, book_synopsis, count=BANK_BATCH_SIZE, exclude_questions=existing, cache=False
+            )
+        except QuizGenerationError:
+            continue
+        bank.add(key, items)
+    return bank.count(key)
+
+BANK_REFILL_LEASE_TTL = 600  # 문제 은행 보충 임대 유효 시간(초), 워커가 죽으면 이후 다른 워커가 이어받음
+
+def request_bank_refill(key, book_title, book_synopsis):
+    """문제 은행이 부족하면 백그라운드에서 보충 (같은 책은 모든 워커를 통틀어 동시에 한 번만)"""
+    bank = get_question_bank()
+    backend = get_shared_backend()
+    if bank.count(key) >= BANK_LOW_WATERMARK:
+        return
+    executor, in_progress, lock = get_bank_refill_state()
+    with lock:
+        if key in in_progress:
+            return
+        in_progress.add(key)
+
+    def refill():
+        lease_name, owner = f"bank_refill:{key}", backend.new_owner()
+        try:
+            if backend.acquire_lease(lease_name, owner, BANK_REFILL_LEASE_TTL):
+                try:
+                    fill_question_bank(bank, key, book_title, book_synopsis)
+                finally:
+                    backend.release_lease(lease_name, owner)
+        finally:
+            with lock:
+                in_progress.discard(key)
+
+    executor.submit(scheduler.run_with_priority, scheduler.BACKGROUND, refill)
+
+def get_session_seed():
+    """학생(세션)마다 다른 문제 샘플을 뽑기 위한 시드"""
+    if "session_seed" not in st.session_state:
+        st.session_state.session_seed = uuid.uuid4().hex
+    return st.session_state.session_seed
+
+def prepare_quiz(book_title, book_synopsis, isbn, seed, count=QUIZ_QUESTION_COUNT):
+    """문제 은행에서 count개를 뽑아 퀴즈 구성 (백그라운드 스레드에서도 호출 가능)
+
+    은행에 문제가 모자라면 이번 퀴즈만 직접 생성해 은행에 넣고, 나머지는 백그라운드에서 보충한다.
+    """
+    bank = get_question_bank()
+    key = bank_key(book_title, isbn)
+    if bank.count(key) < count:
+        # 여러 워커가 같은 책의 첫 퀴즈를 동시에 만들지 않도록 한 워커만 생성
+        items = get_shared_backend().generate_once(
+            "quiz", key, lambda: generate_quiz(book_title, book_synopsis, count=count)
+        )
+        bank.add(key, items)
+    request_bank_refill(key, book_title, book_synopsis)
+    return bank.sample(key, count, seed=f"{seed}:{key}")
+
+def generate_debate_topics(book_title, book_synopsis):
+    """줄거리로 찬반 토론 주제 목록 생성 (백그라운드 스레드에서도 호출 가능)
+
+    같은 (제목, 줄거리)의 토론 주제는 워커 공용 저장소에서 한 번만 생성한다.
+    """
+    key = hashlib.sha256(f"{book_title}\n{book_synopsis}".encode("utf-8")).hexdigest()
+    return get_shared_backend().generate_once(
+        "debate_topics", key, lambda: request_debate_topics(book_title, book_synopsis)
+    )
+
+def request_debate_topics(book_title, book_synopsis):
+    prompt = (
+        f"다음 책 '{book_title}'의 줄거리를 바탕으로, 초등학생도 이해할 수 있는 토론 주제 2가지를, "
+        "번호나 특수문자 없이 텍스트만으로 각각 한 줄씩 출력해줘.\n\n"
+        "토론 주제는 찬성과 반대로 의견이 나눠질 수 있는 주제여야 해."
+        "토론 주제는 ~하여야 한다.로 마쳐서 사용자가 찬성하거나 반대를 선택할 수 있어야 해.\n\n"
+        f"줄거리:\n{book_synopsis}"
+    )
+    try:
+        discussion_topics_text = get_chatgpt_response(prompt, cache=True, call_site="debate_topics")
+    except LLMError:
+        return []
+
+    topics = []
+    for line in discussion_topics_text.splitlines():
+        line = line.strip()
+        if line:
+            # 앞 번호 제거
+            topic = TOPIC_NUMBER_RE.sub('', line)
+            topics.append(topic)
+    return topics
+
+def explain_wrong_answers(quiz_data, grading):
+    """틀린 문제의 해설을 ({문제 번호: 해설}, 문제별로 나누지 못한 해설 원문) 형태로 반환
+
+    캐시에 없는 문제들만 모아서 한 번의 LLM 호출로 해설을 받고, 결과는 문제별로 캐시한다.
+    응답 형식이 어긋나 문제별로 나눌 수 없으면 원문은 두 번째 값으로만 돌려준다 (없으면 None).
+    """
+    cache = get_explanation_cache()
+    explanations = {}
+    missing = []
+    for result in grading["results"]:
+        if result["is_correct"]:
+            continue
+        item = quiz_data[result["index"]]
+        key = explanation_key(item, result["answer"])
+        cached = cache.get(key)
+        if cached is not None:
+            explanations[result["index"]] = cached
+        else:
+            missing.append((result, item, key))
+    if not missing:
+        return explanations, None
+
+    prompt = "다음은 초등학생이 틀린 독서 퀴즈 문제들입니다.\n\n"
+    for result, item, _ in missing:
+        prompt += f"문제 {result['index'] + 1}: {item['question']}\n"
+        prompt += f"선택지: {', '.join(item['options'])}\n"
+        prompt += f"정답: {item['correct_answer']}\n"
+        prompt += f"학생의 답변: {result['answer']}\n\n"
+    prompt += (
+        "각 문제마다 학생의 답이 왜 틀렸는지와 정답이 맞는 이유를 초등학생이 이해하기 쉽게 2~3문장으로 설명해줘. "
+        "출력은 오직 아래 JSON 형식으로만 해줘.\n"
+        '{"explanations": [{"number": 문제 번호, "explanation": "해설"}]}'
+    )
+    response = get_chatgpt_response(prompt, call_site="quiz_explain")
+    try:
+        parsed = json.loads(remove_code_fences(response))
+        by_number = {int(entry["number"]): entry["explanation"] for entry in parsed["explanations"]}
+    except Exception:
+        # 형식이 어긋나면 캐시하지 않고, 원문은 문제마다가 아니라 채점 결과에 한 번만 보여줌
+        return explanations, response
+
+    for result, _, key in missing:
+        explanation = by_number.get(result["index"] + 1)
+        if explanation:
+            cache.set(key, explanation)
+            explanations[result["index"]] = explanation
+    return explanations, None
+
+def render_quiz_grading(quiz_data, grading, explanations=None, explanation_text=None):
+    """채점 결과(점수, 문제별 정오, 오답 해설) 표시
+
+    explanation_text는 문제별로 나누지 못한 해설 원문으로, 문제 목록 아래에 한 번만 표시한다.
+    """
+    st.metric("점수", f"{grading['score']}점", f"{grading['correct']} / {grading['total']} 문제 정답")
+    for result in grading["results"]:
+        number = result["index"] + 1
+        if result["is_correct"]:
+            st.markdown(f"✅ **문제 {number}**: 정답입니다! ({result['answer']})")
+        else:
+            st.markdown(
+                f"❌ **문제 {number}**: 학생의 답 '{result['answer']}' → 정답 '{result['correct_answer']}'"
+            )
+            if explanations and explanations.get(result["index"]):
+                st.caption(explanations[result["index"]])
+    if explanation_text:
+        st.markdown("#### 틀린 문제 해설")
+        st.markdown(explanation_text)
+
+def build_pack_entry(row):
+    """읽기 자료 팩에 넣을 도서 하나의 자료 생성 (reading_pack CLI에서 호출)
+
+    row는 isbn 또는 title 키를 가진 CSV 행. (ISBN, 도서 자료) 를 반환한다.
+    """
+    query = (row.get("isbn") or row.get("title") or "").strip()
+    books = search_books(query)
+    if not books:
+        raise LookupError(f"네이버 도서 검색 결과가 없습니다: {query}")
+    isbn = get_isbn(books[0])
+    if not isbn:
+        raise LookupError(f"ISBN 정보가 없는 도서입니다: {query}")
+    book = get_book_store().get(get_book_store().ingest(books[0]))
+    book_title = book.title
+    combined_synopsis = get_combined_synopsis(book)
+    synopsis = "".join(stream_synopsis_rewrite(book_title, combined_synopsis, isbn)).strip()
+    book.synopsis = synopsis
+    prompt_synopsis = get_book_synopsis(book)
+    bank = get_question_bank()
+    if fill_question_bank(bank, isbn, book_title, prompt_synopsis) < QUIZ_QUESTION_COUNT:
+        raise RuntimeError(f"퀴즈 문제 은행을 채우지 못했습니다: {book_title}")
+    return isbn, {
+        "title": book_title,
+        "book": books[0],
+        "combined_synopsis": combined_synopsis,
+        "synopsis": synopsis,
+        "question_bank": bank.items(isbn),
+        "debate_topics": generate_debate_topics(book_title, prompt_synopsis),
+    }
+
+# === 토론 컨텍스트 관리 ===
+
+def summarize_debate_turns(previous_summary, turns):
+    """이전 요약에 새 토론 턴들을 합쳐 누적 요약 생성"""
+    transcript = "\n".join(
+        f"{'학생' if turn['role'] == 'user' else '챗봇'}: {turn['content']}" for turn in turns
+    )
+    prompt = (
+        "다음은 독서 토론의 이전 요약과 이어진 대화입니다. "
+        "양측의 핵심 주장과 근거, 라운드 진행 상황이 빠지지 않도록 10줄 이내로 누적 요약해줘.\n\n"
+        f"이전 요약:\n{previous_summary or '(없음)'}\n\n"
+        f"이어진 대화:\n{transcript}"
+    )
+    return get_chatgpt_response(prompt, cache=True, call_site="debate_summary")
+
+def debate_system_prompt(topic, user_side, chatbot_side):
+    """토론 진행 규칙을 담은 시스템 프롬프트"""
+    return (
+        f"당신은 독서 토론 챗봇입니다. 이번 토론 주제는 '{topic}' 입니다.\n"
+        "토론은 다음 순서로 진행됩니다:\n"
+        "1. 찬성측 입론\n2. 반대측 입론\n3. 찬성측 반론\n4. 반대측 반론\n"
+        "5. 찬성측 최후 변론\n6. 반대측 최후 변론\n"
+        f"사용자는 '{user_side}' 측, 당신은 '{chatbot_side}' 측입니다.\n"
+        "각 라운드에서는 해당 제목을 명시한 후 의견을 제시해 주세요. "
+        "토론 종료 후, 양측의 토론을 평가하여 100점 만점 중 어느 측이 더 설득력 있었는지와 그 이유를 피드백해 주세요."
+    )
+
+def debate_history():
+    """시스템 프롬프트 + 대화 턴 (세션에는 턴만 보관하고 시스템 프롬프트는 요청할 때 구성)"""
+    system_prompt = debate_system_prompt(
+        st.session_state.debate_topic, st.session_state.user_side, st.session_state.chatbot_side
+    )
+    return [{"role": "system", "content": system_prompt}] + st.session_state.debate_chat
+
+def get_debate_context():
+    """현재 세션의 토론 컨텍스트 관리자 (누적 요약과 라운드별 토큰 기록 보관)"""
+    if "debate_context" not in st.session_state:
+        st.session_state.debate_context = DebateContext(
+            budget=int(get_config("DEBATE_CONTEXT_BUDGET", 2000)),
+            keep_recent=int(get_config("DEBATE_CONTEXT_KEEP_RECENT", 4)),
+            summarize=summarize_debate_turns,
+        )
+    return st.session_state.debate_context
+
+# === 백그라운드 미리 생성 ===
+
+def script_ctx_initializer():
+    """워커 스레드에 현재 세션 컨텍스트를 연결하는 스레드 풀 initializer"""
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def attach_ctx():
+        # 워커 스레드에서도 st.cache_resource 등을 쓸 수 있도록 세션 컨텍스트 연결
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    return attach_ctx
+
+def get_job_executor():
+    """현재 세션의 백그라운드 작업 실행기 (세션당 1개, 세션이 끝나면 함께 종료)"""
+    if "job_executor" not in st.session_state:
+        st.session_state.job_executor = JobExecutor(
+            max_workers=int(get_config("JOB_MAX_WORKERS", 2)),
+            initializer=script_ctx_initializer(),
+        )
+    return st.session_state.job_executor
+
+def start_pregeneration(book_title, book_synopsis, isbn=""):
+    """줄거리가 준비되면 퀴즈 구성과 토론 주제 생성을 백그라운드에서 미리 시작"""
+    executor = get_job_executor()
+    # 학생이 아직 기다리는 작업이 아니므로 대화형/재작성 요청보다 뒤로 스케줄링
+    executor.submit(
+        "quiz", scheduler.run_with_priority, scheduler.BACKGROUND,
+        prepare_quiz, book_title, book_synopsis, isbn, get_session_seed(),
+    )
+    executor.submit(
+        "debate_topics", scheduler.run_with_priority, scheduler.BACKGROUND,
+        generate_debate_topics, book_title, book_synopsis,
+    )
+
+def take_pregenerated(name, spinner_text):
+    """미리 생성 중인 작업 결과 가져오기 (진행 중이면 스피너를 보여주며 대기)
+
+    작업이 없으면 None, 실패했으면 예외를 그대로 발생시킨다.
+    """
+    executor = get_job_executor()
+    future = executor.get(name)
+    if future is None or future.cancelled():
+        return None
+    if not future.done():
+        with st.spinner(spinner_text):
+            future.exception()
+    executor.pop(name)
+    return future.result()
+
+def get_selected_book():
+    """현재 세션이 선택한 책의 BookRecord (선택하지 않았거나 저장소에서 제거됐으면 None)"""
+    book_id = st.session_state.get("selected_book")
+    if book_id is None:
+        return None
+    book = get_book_store().get(book_id)
+    if book is None:
+        st.session_state.selected_book = None
+    return book
+
+def get_book_synopsis(book):
+    """퀴즈/토론/피드백에 쓸 줄거리
+
+    재작성본은 정규화한 원본(get_combined_synopsis)으로 만들었으므로 그대로 쓴다. 페이지 문구 제거와
+    문장 자르기는 크롤링/API 원문용이라 재작성본에 다시 적용하지 않는다.
+    재작성본이 없으면 API 설명을 정규화해서 쓴다.
+    """
+    if book.synopsis:
+        return book.synopsis
+    synopsis = get_synopsis_normalizer().normalize(book.description)
+    return synopsis or "줄거리 정보가 없습니다."
+
+def clear_book_selection():
+    """선택한 책과 검색 결과 초기화"""
+    reset_book_artifacts()
+    st.session_state.selected_book = None
+    st.session_state.search_results = None
+    st.session_state.search_cursor = None
+
+def reset_book_artifacts():
+    """책이 바뀌면 이전 책의 퀴즈/토론 주제와 진행 중인 미리 생성 작업을 정리"""
+    get_job_executor().cancel_all()
+    for key in list(st.session_state.keys()):
+        if key in ("quiz_data", "quiz_answers", "quiz_grading", "debate_topics") or \
+           str(key).startswith("quiz_q_"):
+            del st.session_state[key]
 
 # === 페이지별 함수 ===
 
@@ -145,11 +1056,20 @@ def page_book_search():
 
     # 사이드바 초기화 버튼 (해당 페이지만 초기화)
     if st.sidebar.button("책 검색 페이지 초기화"):
-        st.session_state.selected_book = None
-        st.session_state.search_results = None
-        st.session_state.selected_synopsis_final = None
+        clear_book_selection()
         st.rerun()
 
+    # 선생님이 미리 만든 읽기 자료 팩이 있으면 외부 호출 없이 바로 선택
+    pack = get_reading_pack()
+    if pack and pack["books"]:
+        st.markdown("### 수업 도서에서 선택")
+        pack_entries = list(pack["books"].values())
+        pack_choice = st.selectbox(
+            "선생님이 준비한 수업 도서", options=pack_entries, format_func=lambda entry: entry["title"]
+        )
+        if st.button("수업 도서 선택"):
+            select_pack_book(pack_choice)
+
     st.markdown("### 책 제목 또는 키워드로 검색")
     col1, col2 = st.columns([1, 2])
 
@@ -162,164 +1082,250 @@ def page_book_search():
                     st.error("검색어를 입력해주세요!")
                 else:
                     with st.spinner("책 정보를 가져오는 중..."):
-                        books = search_books(query)
-                    if books:
-                        st.success(f"{len(books)}개의 책 정보를 찾았습니다!")
-                        st.session_state.search_results = books
+                        found = start_search(query)
+                    if found:
+                        st.success(f"{len(st.session_state.search_results)}개의 책 정보를 찾았습니다!")
                     else:
                         st.warning("검색 결과가 없습니다. API 키, 파라미터 또는 검색어를 확인해 주세요.")
 
     with col2:
-        if "search_results" in st.session_state and st.session_state.search_results:
-            st.markdown("#### 검색 결과")
-            books = st.session_state.search_results
-            book_options = []
-            for book in books:
-                title = remove_html_tags(book.get("title", "제목 없음"))
-                author = remove_html_tags(book.get("author", "저자 정보 없음"))
-                publisher = remove_html_tags(book.get("publisher", "출판사 정보 없음"))
-                display_str = f"{title} | {author} | {publisher}"
-                book_options.append((display_str, book))
-
-            selected_option = st.selectbox(
-                "검색 결과에서 책을 선택하세요.",
-                options=book_options,
-                format_func=lambda x: x[0]
-            )
-
-            if st.button("이 책 선택"):
-                st.session_state.selected_book = selected_option[1]
-                book_title = remove_html_tags(selected_option[1].get("title", "제목 없음"))
-                st.success(f"'{book_title}' 책이 선택되었습니다.")
-                # 결합된 줄거리 생성
-                combined_synopsis = get_combined_synopsis(book_title, selected_option[1])
-                # 초등학생용 줄거리 재작성
-                final_synopsis = rewrite_synopsis_for_elementary(book_title, combined_synopsis)
-                st.session_state.selected_synopsis_final = final_synopsis
-                st.markdown("**줄거리 (초등학생용 재작성):**")
-                st.write(final_synopsis)
-
-            if st.button("독서 퀴즈로 이동"):
-                st.session_state.current_page = "독서 퀴즈"
-                st.rerun()
+        render_search_picker(pack)
 
     # 이미 책이 선택된 경우, 선택 정보 표시
-    if st.session_state.get("selected_book"):
-        selected_book = st.session_state.selected_book
-        title = remove_html_tags(selected_book.get("title", "제목 없음"))
-        author = remove_html_tags(selected_book.get("author", "저자 정보가 없음"))
-        publisher = remove_html_tags(selected_book.get("publisher", "출판사 정보 없음"))
-        st.info(f"현재 선택된 책: {title} | {author} | {publisher}")
+    selected_book = get_selected_book()
+    if selected_book:
+        st.info(f"현재 선택된 책: {selected_book.label}")
+        if selected_book.synopsis:
+            with st.expander("줄거리 (초등학생용 재작성)", expanded=True):
+                st.write(selected_book.synopsis)
+
+        if is_admin() and selected_book.combined_synopsis:
+            render_synopsis_admin(selected_book)
 
         if st.button("선택된 책 변경"):
-            st.session_state.selected_book = None
-            st.session_state.search_results = None
-            st.session_state.selected_synopsis_final = None
+            clear_book_selection()
             st.rerun()
 
+def rerun_fragment():
+    """조각만 다시 실행 중이면 그 조각만, 페이지 전체 실행 중이면 전체를 다시 실행
+
+    st.rerun(scope="fragment")는 조각 단독 실행 중에만 쓸 수 있다. 같은 조각이 페이지 전체 실행 안에서
+    그려질 때(토론 시작 직후 챗봇 차례, 이어하기 복원, 페이지 이동 등)는 전체 다시 실행으로 대신한다.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is not None and ctx.fragment_ids_this_run:
+        st.rerun(scope="fragment")
+    st.rerun()
+
+@st.fragment
+def render_search_picker(pack):
+    """검색 결과 선택 영역 (조각: 선택 상자를 바꾸거나 더 보기를 눌러도 이 영역만 다시 실행)"""
+    if not st.session_state.get("search_results"):
+        return
+    st.markdown("#### 검색 결과")
+    store = get_book_store()
+    book_options = [book for book in map(store.get, st.session_state.search_results) if book]
+
+    selected_option = st.selectbox(
+        "검색 결과에서 책을 선택하세요.",
+        options=book_options,
+        format_func=lambda book: book.label
+    )
+
+    cursor = st.session_state.get("search_cursor")
+    if cursor and not cursor["exhausted"]:
+        if st.button("검색 결과 더 보기"):
+            with st.spinner("다음 검색 결과를 가져오는 중..."):
+                added = load_more_search_results()
+            if added or not cursor["exhausted"]:
+                rerun_fragment()
+            st.info("더 이상 새로운 검색 결과가 없습니다.")
+
+    if selected_option is not None and st.button("이 책 선택"):
+        book = selected_option
+        pack_entry = find_book(pack, book.isbn)
+        if pack_entry:
+            # 읽기 자료 팩에 있는 책이면 미리 만든 자료를 그대로 사용
+            select_pack_book(pack_entry)
+        else:
+            reset_book_artifacts()
+            st.session_state.selected_book = book.book_id
+            st.success(f"'{book.title}' 책이 선택되었습니다.")
+            # 결합된 줄거리 생성 (다른 세션이 이미 크롤링한 책이면 재사용)
+            combined_synopsis = get_combined_synopsis(book)
+            # 초등학생용 줄거리 재작성 (생성되는 대로 화면에 표시)
+            st.markdown("**줄거리 (초등학생용 재작성):**")
+            final_synopsis = write_llm_stream(rewrite_synopsis_for_elementary(
+                book.title, combined_synopsis, isbn=book.isbn, stream=True
+            ))
+            # 다음 페이지에서 바로 쓸 수 있도록 퀴즈/토론 주제를 미리 생성
+            if final_synopsis:
+                book.synopsis = final_synopsis
+                start_pregeneration(book.title, get_book_synopsis(book), book.isbn)
+        # 조각 밖의 '현재 선택된 책' 영역도 바뀌어야 하므로 페이지 전체를 다시 실행
+        st.rerun()
+
+    if st.button("독서 퀴즈로 이동"):
+        st.session_state.current_page = "독서 퀴즈"
+        st.rerun()
+    save_checkpoint()  # 조각만 다시 실행될 때도 진행 상황 저장
+
+def select_pack_book(entry):
+    """읽기 자료 팩의 도서를 선택 (줄거리/퀴즈/토론 주제를 외부 호출 없이 바로 세션에 반영)
+
+    퀴즈는 팩에 들어 있는 문제 은행에서 이 학생의 시드로 뽑는다.
+    """
+    reset_book_artifacts()
+    store = get_book_store()
+    book = store.get(store.ingest(entry["book"]))
+    book.combined_synopsis = entry["combined_synopsis"]
+    book.synopsis = entry["synopsis"]
+    st.session_state.selected_book = book.book_id
+    st.session_state.quiz_data = sample_items(
+        entry["question_bank"], QUIZ_QUESTION_COUNT, seed=f"{get_session_seed()}:{book.isbn}"
+    )
+    st.session_state.debate_topics = entry["debate_topics"]
+    st.success(f"'{entry['title']}' 책이 선택되었습니다. (수업 자료 팩)")
+
+def render_synopsis_admin(selected_book):
+    """관리자용: 선택된 책의 줄거리 캐시 삭제/재생성, 퀴즈 문제 은행 비우기"""
+    title = selected_book.title
+    isbn = selected_book.isbn
+    combined_synopsis = selected_book.combined_synopsis
+    cache_key = synopsis_cache_key(isbn, title, combined_synopsis)
+
+    with st.expander("🔧 줄거리 캐시 관리 (관리자)"):
+        st.caption(f"캐시 키: {cache_key}")
+        st.caption(f"퀴즈 문제 은행: {get_question_bank().count(bank_key(title, isbn))}문제")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("줄거리 캐시 삭제"):
+                get_synopsis_cache().delete(cache_key)
+                get_shared_backend().delete_artifact("synopsis", cache_key)
+                st.success("캐시에서 삭제했습니다. 다음 선택 시 새로 생성됩니다.")
+        with col2:
+            if st.button("줄거리 다시 생성"):
+                st.markdown("**줄거리 (초등학생용 재작성):**")
+                final_synopsis = write_llm_stream(rewrite_synopsis_for_elementary(
+                    title, combined_synopsis, isbn=isbn, refresh=True, stream=True
+                ))
+                if final_synopsis:
+                    selected_book.synopsis = final_synopsis
+                    # 이전 줄거리로 만든 문제는 버리고 새 줄거리로 다시 채움
+                    get_question_bank().delete(bank_key(title, isbn))
+                    get_shared_backend().delete_artifact("quiz", bank_key(title, isbn))
+                    reset_book_artifacts()
+                    start_pregeneration(title, get_book_synopsis(selected_book), isbn)
+        with col3:
+            if st.button("문제 은행 비우기"):
+                get_question_bank().delete(bank_key(title, isbn))
+                get_shared_backend().delete_artifact("quiz", bank_key(title, isbn))
+                st.success("문제 은행을 비웠습니다. 다음 퀴즈 생성 시 새로 채워집니다.")
+
+
+def record_quiz_submission(book, quiz_data, answers):
+    """채점한 답안을 학급 분석용 제출 기록에 추가 (같은 퀴즈를 다시 제출하면 처음 것만 유지)"""
+    seed = get_session_seed()
+    student = st.session_state.get("student_name", "").strip() or f"학생-{seed[:6]}"
+    get_submission_store().append(
+        bank_key(book.title, book.isbn), book.title, student, seed, quiz_data, answers
+    )
+
+@st.fragment
+def render_quiz_questions(selected_book, quiz_data):
+    """문제 풀이와 채점 영역 (조각: 답을 고를 때마다 페이지 전체가 아니라 이 영역만 다시 실행)"""
+    if "quiz_answers" not in st.session_state:
+        st.session_state.quiz_answers = {}
+
+    # 문제 출력
+    for idx, item in enumerate(quiz_data):
+        st.markdown(f"**문제 {idx+1}:** {item['question']}")
+        if f"quiz_q_{idx}" not in st.session_state:
+            st.session_state[f"quiz_q_{idx}"] = item["options"][0]  # 기본값
+        user_answer = st.radio(
+            label=f"문제 {idx+1}의 답변",
+            options=item["options"],
+            key=f"quiz_q_{idx}"
+        )
+        # 세션 스테이트에 학생 답안 저장
+        st.session_state.quiz_answers[str(idx)] = user_answer
+
+    # 제출 버튼 - 점수는 바로 계산하고, 틀린 문제 해설만 LLM에 요청
+    st.text_input("이름 (선택, 선생님의 학급 분석에 표시됩니다)", key="student_name")
+    if st.button("답안 제출"):
+        student_answers = {str(i): st.session_state.quiz_answers[str(i)] for i in range(len(quiz_data))}
+        grading = grade_quiz(quiz_data, student_answers)
+        record_quiz_submission(selected_book, quiz_data, student_answers)
+        st.subheader("채점 및 피드백 결과")
+        render_quiz_grading(quiz_data, grading)
+        explanations, explanation_text = {}, None
+        if grading["correct"] < grading["total"]:
+            try:
+                with st.spinner("틀린 문제 해설을 준비하는 중..."):
+                    explanations, explanation_text = explain_wrong_answers(quiz_data, grading)
+            except LLMError as e:
+                show_llm_error(e)
+            st.markdown("#### 틀린 문제 해설")
+            for index, explanation in sorted(explanations.items()):
+                st.markdown(f"**문제 {index + 1}:** {explanation}")
+            if explanation_text:
+                st.markdown(explanation_text)
+        st.session_state.quiz_grading = {
+            "grading": grading, "explanations": explanations, "explanation_text": explanation_text,
+        }
+    elif st.session_state.get("quiz_grading"):
+        st.subheader("채점 및 피드백 결과")
+        render_quiz_grading(
+            quiz_data,
+            st.session_state.quiz_grading["grading"],
+            st.session_state.quiz_grading["explanations"],
+            st.session_state.quiz_grading.get("explanation_text"),
+        )
+    save_checkpoint()  # 답을 고를 때마다 저장 (조각만 다시 실행되므로 main()의 저장이 돌지 않음)
+
 
 def page_reading_quiz():
     st.header("📝 독서 퀴즈 생성 및 풀이")
 
     if st.sidebar.button("독서 퀴즈 페이지 초기화"):
-        for key in ["quiz_data", "quiz_answers"]:
+        for key in ["quiz_data", "quiz_answers", "quiz_grading"]:
             if key in st.session_state:
                 del st.session_state[key]
         st.rerun()
 
-    if "selected_book" not in st.session_state or st.session_state.selected_book is None:
+    selected_book = get_selected_book()
+    if selected_book is None:
         st.error("선택된 책이 없습니다. 먼저 '책 검색' 페이지에서 책을 선택하세요.")
         return
 
-    selected_book = st.session_state.selected_book
-    book_title = remove_html_tags(selected_book.get("title", "제목 없음"))
-    book_synopsis = st.session_state.get("selected_synopsis_final") or remove_html_tags(
-        selected_book.get("description", "줄거리 정보가 없습니다.")
-    )
+    book_title = selected_book.title
+    book_synopsis = get_book_synopsis(selected_book)
 
     st.markdown(f"**책 제목:** {book_title}")
 
-    # 1) 퀴즈 생성
+    # 1) 퀴즈 생성 (책 선택 시 미리 생성된 결과가 있으면 바로 사용)
     if "quiz_data" not in st.session_state:
-        if st.button("퀴즈 생성"):
-            prompt = (
-                f"다음 책 '{book_title}'의 줄거리를 바탕으로 3개의 4지 선다형 독서 퀴즈 문제를 JSON 형식으로 생성해줘. "
-                "출력 형식 예시는 아래와 같이 해:\n\n"
-                "{\n"
-                '  "quiz": [\n'
-                "    {\n"
-                '      "question": "문제 내용",\n'
-                '      "options": ["선택지1", "선택지2", "선택지3", "선택지4"],\n'
-                '      "correct_answer": "선택지1"\n'
-                "    },\n"
-                "    ...\n"
-                "  ]\n"
-                "}\n\n"
-                "답안은 오직 JSON 형식으로만 출력해줘.\n\n"
-                f"줄거리:\n{book_synopsis}"
-            )
-            with st.spinner("퀴즈 생성 중..."):
-                quiz_json_str = get_chatgpt_response(prompt)
-
-            # JSON 파싱 전, 코드 블록 제거
-            quiz_json_str_clean = remove_code_fences(quiz_json_str)
-
-            # JSON 파싱 시도
-            try:
-                quiz_dict = json.loads(quiz_json_str_clean)
-                if "quiz" in quiz_dict:
-                    st.session_state.quiz_data = quiz_dict["quiz"]
-                    st.success("퀴즈가 생성되었습니다! 아래 문제를 풀어보세요.")
-                else:
-                    st.error("생성된 JSON에 'quiz' 키가 없습니다. ChatGPT 응답을 확인하세요.")
-                    st.write("ChatGPT 응답:")
-                    st.code(quiz_json_str_clean)
-            except Exception as e:
-                st.error("퀴즈 생성에 실패했습니다. ChatGPT가 JSON 형식으로 응답했는지 확인하세요.")
-                st.write("에러 메시지:", e)
+        try:
+            quiz_data = take_pregenerated("quiz", "퀴즈를 미리 만드는 중입니다...")
+            if quiz_data is None and st.button("퀴즈 생성"):
+                with st.spinner("퀴즈 생성 중..."):
+                    quiz_data = prepare_quiz(
+                        book_title, book_synopsis, selected_book.isbn, get_session_seed()
+                    )
+            if quiz_data is not None:
+                st.session_state.quiz_data = quiz_data
+                st.success("퀴즈가 생성되었습니다! 아래 문제를 풀어보세요.")
+        except QuizGenerationError as e:
+            st.error(str(e))
+            if e.detail is not None:
+                st.write("에러 메시지:", e.detail)
+            if e.raw_response is not None:
                 st.write("ChatGPT 원본 응답(전처리 후):")
-                st.code(quiz_json_str_clean)
+                st.code(e.raw_response)
 
     # 2) 퀴즈 풀이
     if "quiz_data" in st.session_state:
-        quiz_data = st.session_state.quiz_data
-        if "quiz_answers" not in st.session_state:
-            st.session_state.quiz_answers = {}
-
-        # 문제 출력
-        for idx, item in enumerate(quiz_data):
-            st.markdown(f"**문제 {idx+1}:** {item['question']}")
-            if f"quiz_q_{idx}" not in st.session_state:
-                st.session_state[f"quiz_q_{idx}"] = item["options"][0]  # 기본값
-            user_answer = st.radio(
-                label=f"문제 {idx+1}의 답변",
-                options=item["options"],
-                key=f"quiz_q_{idx}"
-            )
-            # 세션 스테이트에 학생 답안 저장
-            st.session_state.quiz_answers[str(idx)] = user_answer
-
-        # 제출 버튼
-        if st.button("답안 제출"):
-            student_answers = {str(i): st.session_state.quiz_answers[str(i)] for i in range(len(quiz_data))}
-            # 채점 요청
-            eval_prompt = "다음은 독서 퀴즈 문제와 정답, 그리고 학생의 답변입니다.\n\n"
-            for i, item in enumerate(quiz_data):
-                eval_prompt += f"문제 {i+1}: {item['question']}\n"
-                options_str = ", ".join(item['options'])
-                eval_prompt += f"선택지: {options_str}\n"
-                eval_prompt += f"정답: {item['correct_answer']}\n"
-                eval_prompt += f"학생의 답변: {student_answers[str(i)]}\n\n"
-            eval_prompt += (
-                "각 문제별로 학생의 답변이 옳은지 그른지 채점하고, "
-                "틀린 경우 올바른 해설과 함께 피드백을 제공해줘. "
-                "최종 점수와 총평도 함께 작성해줘."
-            )
-
-            with st.spinner("채점 및 피드백 중..."):
-                quiz_feedback = get_chatgpt_response(eval_prompt)
-            st.subheader("채점 및 피드백 결과")
-            st.write(quiz_feedback)
+        render_quiz_questions(selected_book, st.session_state.quiz_data)
 
     # 페이지 이동 버튼
     if st.button("다음: 독서 토론"):
@@ -333,46 +1339,32 @@ def page_reading_discussion():
     if st.sidebar.button("독서 토론 페이지 초기화"):
         for key in [
             "debate_started", "debate_round", "debate_chat", "debate_evaluated",
-            "debate_topics", "debate_topic", "user_side", "chatbot_side"
+            "debate_topics", "debate_topic", "user_side", "chatbot_side", "debate_context"
         ]:
             if key in st.session_state:
                 del st.session_state[key]
         st.rerun()
 
-    if "selected_book" not in st.session_state or st.session_state.selected_book is None:
+    selected_book = get_selected_book()
+    if selected_book is None:
         st.error("선택된 책이 없습니다. 먼저 '책 검색' 페이지에서 책을 선택하세요.")
         return
 
-    selected_book = st.session_state.selected_book
-    book_title = remove_html_tags(selected_book.get("title", "제목 없음"))
+    book_title = selected_book.title
     st.markdown(f"**책 제목:** {book_title}")
 
-    # 1) 토론 주제 추천
+    # 1) 토론 주제 추천 (책 선택 시 미리 생성된 결과가 있으면 바로 사용)
+    topics = None
+    if "debate_topics" not in st.session_state:
+        topics = take_pregenerated("debate_topics", "토론 주제를 미리 만드는 중입니다...")
     if st.button("토론 주제 생성"):
-        book_synopsis = st.session_state.get("selected_synopsis_final") or remove_html_tags(
-            selected_book.get("description", "줄거리 정보가 없습니다.")
-        )
-        prompt = (
-            f"다음 책 '{book_title}'의 줄거리를 바탕으로, 초등학생도 이해할 수 있는 토론 주제 2가지를, "
-            "번호나 특수문자 없이 텍스트만으로 각각 한 줄씩 출력해줘.\n\n"
-            "토론 주제는 찬성과 반대로 의견이 나눠질 수 있는 주제여야 해."
-            "토론 주제는 ~하여야 한다.로 마쳐서 사용자가 찬성하거나 반대를 선택할 수 있어야 해.\n\n"
-            f"줄거리:\n{book_synopsis}"
-        )
+        book_synopsis = get_book_synopsis(selected_book)
         with st.spinner("토론 주제 생성 중..."):
-            discussion_topics_text = get_chatgpt_response(prompt)
-
-        topics = []
-        for line in discussion_topics_text.splitlines():
-            line = line.strip()
-            if line:
-                # 앞 번호 제거
-                topic = re.sub(r'^[0-9]+[). ]+', '', line)
-                topics.append(topic)
-        if topics:
-            st.session_state.debate_topics = topics
-        else:
+            topics = generate_debate_topics(book_title, book_synopsis)
+        if not topics:
             st.error("토론 주제 생성에 실패했습니다.")
+    if topics:
+        st.session_state.debate_topics = topics
 
     if "debate_topics" in st.session_state:
         st.markdown("**추천된 토론 주제:**")
@@ -391,112 +1383,140 @@ def page_reading_discussion():
             st.session_state.debate_started = True
             st.session_state.debate_round = 1
             st.session_state.debate_chat = []
-            system_prompt = (
-                f"당신은 독서 토론 챗봇입니다. 이번 토론 주제는 '{st.session_state.debate_topic}' 입니다.\n"
-                "토론은 다음 순서로 진행됩니다:\n"
-                "1. 찬성측 입론\n2. 반대측 입론\n3. 찬성측 반론\n4. 반대측 반론\n"
-                "5. 찬성측 최후 변론\n6. 반대측 최후 변론\n"
-                f"사용자는 '{st.session_state.user_side}' 측, 당신은 '{st.session_state.chatbot_side}' 측입니다.\n"
-                "각 라운드에서는 해당 제목을 명시한 후 의견을 제시해 주세요. "
-                "토론 종료 후, 양측의 토론을 평가하여 100점 만점 중 어느 측이 더 설득력 있었는지와 그 이유를 피드백해 주세요."
-            )
-            st.session_state.debate_chat.append({"role": "system", "content": system_prompt})
+            st.session_state.pop("debate_context", None)
             st.rerun()
 
     # 3) 토론 진행 (채팅 UI 사용)
     if st.session_state.get("debate_started"):
-        st.subheader(f"토론 진행: {st.session_state.debate_topic}")
-
-        # 기존 대화 표시 (system 메시지는 표시 안 함)
-        for msg in st.session_state.debate_chat:
-            if msg["role"] == "system":
-                continue  # 시스템 메시지는 숨김
-            elif msg["role"] == "assistant":
-                st.chat_message("assistant").write(msg["content"])
-            else:  # "user"
-                st.chat_message("user").write(msg["content"])
-
-        round_titles = {
-            1: "찬성측 입론",
-            2: "반대측 입론",
-            3: "찬성측 반론",
-            4: "반대측 반론",
-            5: "찬성측 최후 변론",
-            6: "반대측 최후 변론"
-        }
-        current_round = st.session_state.debate_round
-
-        if current_round <= 6:
-            st.markdown(f"### 현재 라운드: {round_titles[current_round]}")
-            # 사용자 차례?
-            if (current_round % 2 == 1 and st.session_state.user_side == "찬성") or \
-               (current_round % 2 == 0 and st.session_state.user_side == "반대"):
-                placeholder_text = f"{round_titles[current_round]} 메시지를 입력하세요..."
-                user_input = st.chat_input(placeholder_text)
-                if user_input:
-                    st.session_state.debate_chat.append(
-                        {"role": "user", "content": f"[{round_titles[current_round]}] {user_input}"}
-                    )
-                    st.session_state.debate_round += 1
-                    st.rerun()
-            else:
-                # 챗봇 차례
-                conversation = st.session_state.debate_chat.copy()
-                # 만약 반대측이 첫 라운드(1번)에서 발언해야 하는 경우 특별한 지시
-                if current_round == 1 and st.session_state.user_side == "반대":
-                    conversation.append({
-                        "role": "user",
-                        "content": f"[{round_titles[current_round]}] 챗봇은 이번 토론에서 찬성측 입론을 먼저 제시하고, "
-                                   "답변 마지막에 '반대측 입론 말해주세요'라고 덧붙여주세요."
-                    })
-                else:
-                    conversation.append({
-                        "role": "user",
-                        "content": f"[{round_titles[current_round]}]"
-                    })
-
-                with st.spinner("챗봇 응답 생성 중..."):
-                    bot_response = get_chatgpt_chat_response(conversation)
-                st.session_state.debate_chat.append({"role": "assistant", "content": bot_response})
+        render_debate_chat()
+
+
+@st.fragment
+def render_debate_chat():
+    """토론 채팅 영역 (조각: 메시지를 보내거나 라운드가 넘어가도 이 영역만 다시 실행)"""
+    st.subheader(f"토론 진행: {st.session_state.debate_topic}")
+
+    # 기존 대화 표시
+    for msg in st.session_state.debate_chat:
+        if msg["role"] == "assistant":
+            st.chat_message("assistant").write(msg["content"])
+        else:  # "user"
+            st.chat_message("user").write(msg["content"])
+
+    round_titles = {
+        1: "찬성측 입론",
+        2: "반대측 입론",
+        3: "찬성측 반론",
+        4: "반대측 반론",
+        5: "찬성측 최후 변론",
+        6: "반대측 최후 변론"
+    }
+    current_round = st.session_state.debate_round
+
+    if current_round <= 6:
+        st.markdown(f"### 현재 라운드: {round_titles[current_round]}")
+        # 사용자 차례?
+        if (current_round % 2 == 1 and st.session_state.user_side == "찬성") or \
+           (current_round % 2 == 0 and st.session_state.user_side == "반대"):
+            placeholder_text = f"{round_titles[current_round]} 메시지를 입력하세요..."
+            user_input = st.chat_input(placeholder_text)
+            if user_input:
+                st.session_state.debate_chat.append(
+                    {"role": "user", "content": f"[{round_titles[current_round]}] {user_input}"}
+                )
                 st.session_state.debate_round += 1
-                st.rerun()
-
+                rerun_fragment()
         else:
-            # 모든 라운드 종료
-            if "debate_evaluated" not in st.session_state:
-                st.markdown("### 토론 종료 및 평가")
-                evaluation_prompt = (
-                    "토론이 모두 끝났습니다. 위의 대화 내용을 바탕으로, 찬성측과 반대측 중 어느 측이 더 설득력 있었는지 "
-                    "100점 만점으로 평가하고, 그 이유와 함께 구체적인 피드백을 제공해 주세요."
+            # 챗봇 차례
+            # 만약 반대측이 첫 라운드(1번)에서 발언해야 하는 경우 특별한 지시
+            if current_round == 1 and st.session_state.user_side == "반대":
+                instruction = {
+                    "role": "user",
+                    "content": f"[{round_titles[current_round]}] 챗봇은 이번 토론에서 찬성측 입론을 먼저 제시하고, "
+                               "답변 마지막에 '반대측 입론 말해주세요'라고 덧붙여주세요."
+                }
+            else:
+                instruction = {
+                    "role": "user",
+                    "content": f"[{round_titles[current_round]}]"
+                }
+            try:
+                # 오래된 턴은 요약으로 바꿔 토큰 예산 안에서 프롬프트 구성
+                conversation = get_debate_context().build(
+                    debate_history(), extra=[instruction], label=round_titles[current_round]
                 )
-                st.session_state.debate_chat.append({"role": "user", "content": evaluation_prompt})
-                with st.spinner("최종 평가 생성 중..."):
-                    evaluation_response = get_chatgpt_chat_response(st.session_state.debate_chat)
-                st.session_state.debate_chat.append({"role": "assistant", "content": evaluation_response})
-                st.session_state.debate_evaluated = True
+                with st.chat_message("assistant"):
+                    bot_response = st.write_stream(
+                        get_chatgpt_chat_response(conversation, stream=True, call_site="debate_turn")
+                    )
+            except LLMError as e:
+                show_llm_error(e)
+                st.button("챗봇 다시 답하기")  # 누르면 이 조각이 다시 실행되며 재시도
+                return
+            st.session_state.debate_chat.append({"role": "assistant", "content": bot_response})
+            st.session_state.debate_round += 1
+            rerun_fragment()
+
+    else:
+        # 모든 라운드 종료
+        if "debate_evaluated" not in st.session_state:
+            st.markdown("### 토론 종료 및 평가")
+            evaluation_prompt = (
+                "토론이 모두 끝났습니다. 위의 대화 내용을 바탕으로, 찬성측과 반대측 중 어느 측이 더 설득력 있었는지 "
+                "100점 만점으로 평가하고, 그 이유와 함께 구체적인 피드백을 제공해 주세요."
+            )
+            st.session_state.debate_chat.append({"role": "user", "content": evaluation_prompt})
+            try:
+                conversation = get_debate_context().build(debate_history(), label="최종 평가")
+                with st.chat_message("assistant"):
+                    evaluation_response = st.write_stream(
+                        get_chatgpt_chat_response(conversation, stream=True, call_site="debate_evaluation")
+                    )
+            except LLMError as e:
+                st.session_state.debate_chat.pop()  # 다시 시도할 때 평가 요청이 두 번 들어가지 않도록
+                show_llm_error(e)
+                st.button("평가 다시 받기")  # 누르면 이 조각이 다시 실행되며 재시도
+                return
+            st.session_state.debate_chat.append({"role": "assistant", "content": evaluation_response})
+            st.session_state.debate_evaluated = True
+            rerun_fragment()
+        else:
+            st.markdown("### 토론 평가 결과")
+            final_evaluation = st.session_state.debate_chat[-1]["content"]
+            st.chat_message("assistant").write(final_evaluation)
+
+            render_debate_token_report()
+
+            # 토론 종료 후 감상문 피드백으로 이동
+            if st.button("독서 감상문 피드백으로 이동"):
+                st.session_state.current_page = "독서 감상문 피드백"
                 st.rerun()
-            else:
-                st.markdown("### 토론 평가 결과")
-                final_evaluation = st.session_state.debate_chat[-1]["content"]
-                st.chat_message("assistant").write(final_evaluation)
+    save_checkpoint()  # 라운드가 넘어갈 때마다 저장
 
-                # 토론 종료 후 감상문 피드백으로 이동
-                if st.button("독서 감상문 피드백으로 이동"):
-                    st.session_state.current_page = "독서 감상문 피드백"
-                    st.rerun()
+
+def render_debate_token_report():
+    """라운드별 프롬프트 토큰 수 표시 (토론이 길어져도 프롬프트가 일정한지 확인용)"""
+    context = st.session_state.get("debate_context")
+    if not context or not context.prompt_tokens:
+        return
+    with st.expander("라운드별 프롬프트 토큰 수"):
+        st.caption(f"예산: {context.budget} 토큰 · 요약된 턴: {context.summarized_count}개")
+        st.table([{"라운드": label, "프롬프트 토큰": tokens} for label, tokens in context.prompt_tokens])
 
 
 def page_reading_feedback():
     st.header("✍️ 독서 감상문 피드백")
 
     if st.sidebar.button("독서 감상문 피드백 페이지 초기화"):
+        for key in ("reading_feedback", "essay_batch"):
+            if key in st.session_state:
+                del st.session_state[key]
         st.rerun()
 
     # 선택된 책 정보 표시
-    if st.session_state.get("selected_book"):
-        selected_book = st.session_state.selected_book
-        book_title = remove_html_tags(selected_book.get("title", "제목 없음"))
-        st.markdown(f"**선택된 책:** {book_title}")
+    selected_book = get_selected_book()
+    if selected_book:
+        st.markdown(f"**선택된 책:** {selected_book.title}")
     else:
         st.info("현재 선택된 책이 없습니다. 감상문 피드백만 받으려면 감상문을 입력해주세요.")
 
@@ -510,67 +1530,397 @@ def page_reading_feedback():
             book_title = "제목 정보가 없습니다."
             book_synopsis = "줄거리 정보가 없습니다."
 
-            if st.session_state.get("selected_book"):
-                selected_book = st.session_state.selected_book
-                book_title = remove_html_tags(selected_book.get("title", "제목 없음"))
-                book_synopsis = st.session_state.get("selected_synopsis_final") or \
-                                remove_html_tags(selected_book.get("description", "줄거리 정보가 없습니다."))
-
-            prompt = (
-                "학생이 작성한 독서 감상문에 대해 책의 제목과 줄거리를 바탕으로 긍정적인 피드백과 개선할 점을 구체적으로 설명하고, "
-                "개선한 후의 독서 감상문의 예시를 제공해줘.\n\n"
-                f"책 제목:\n{book_title}\n\n"
-                f"책 줄거리:\n{book_synopsis}\n\n"
-                f"감상문:\n{feedback_input}"
-            )
-            with st.spinner("피드백 생성 중..."):
-                feedback = get_chatgpt_response(prompt)
+            if selected_book:
+                book_title = selected_book.title
+                book_synopsis = get_book_synopsis(selected_book)
+
+            prompt = essay_feedback_prompt(book_title, book_synopsis, feedback_input)
             st.subheader("피드백 결과")
-            st.write(feedback)
+            feedback = write_llm_stream(get_chatgpt_response(prompt, stream=True, call_site="essay_feedback"))
+            if feedback:
+                st.session_state.reading_feedback = feedback
+    elif st.session_state.get("reading_feedback"):
+        st.subheader("피드백 결과")
+        st.write(st.session_state.reading_feedback)
+
+    if is_admin():
+        render_essay_batch(selected_book)
+
+def essay_feedback_prompt(book_title, book_synopsis, essay):
+    return (
+        "학생이 작성한 독서 감상문에 대해 책의 제목과 줄거리를 바탕으로 긍정적인 피드백과 개선할 점을 구체적으로 설명하고, "
+        "개선한 후의 독서 감상문의 예시를 제공해줘.\n\n"
+        f"책 제목:\n{book_title}\n\n"
+        f"책 줄거리:\n{book_synopsis}\n\n"
+        f"감상문:\n{essay}"
+    )
+
+def essay_batch_feedback(book_title, book_synopsis, essay):
+    """감상문 한 편의 피드백 (공용 저장소에 저장되어 있으면 재사용, 실패하면 예외)"""
+    def generate():
+        return get_chatgpt_response(
+            essay_feedback_prompt(book_title, book_synopsis, essay["text"]), call_site="essay_batch_feedback"
+        )
+
+    return get_shared_backend().generate_once("essay_feedback", essay["key"], generate)
+
+def render_essay_result(container, essay, feedback=None, error=None):
+    if error is not None:
+        container.error(f"{essay['student']}: 피드백 생성 실패 ({error})")
+        return
+    with container.expander(f"✅ {essay['student']}"):
+        st.markdown("**감상문**")
+        st.write(essay["text"])
+        st.markdown("**피드백**")
+        st.write(feedback)
+
+def render_essay_batch(selected_book):
+    """교사용: 학급 감상문 CSV/ZIP을 올려 한꺼번에 피드백 받기
+
+    감상문별 결과는 공용 저장소에 저장되므로, 중간에 새로고침되어도
+    같은 파일로 다시 시작하면 끝난 감상문은 건너뛴다.
+    """
+    st.markdown("---")
+    st.markdown("### 학급 감상문 일괄 피드백 (교사용)")
+    if selected_book is None:
+        st.info("일괄 피드백은 책을 선택한 뒤에 사용할 수 있습니다.")
+        return
+    st.caption("CSV(student, essay 열) 또는 학생별 .txt 파일을 묶은 ZIP을 올려주세요.")
+    uploaded = st.file_uploader("감상문 파일", type=["csv", "zip"])
+    book_title = selected_book.title
+    book_synopsis = get_book_synopsis(selected_book)
+    backend = get_shared_backend()
+
+    if uploaded is not None and st.button("일괄 피드백 시작"):
+        try:
+            essays = parse_essays(uploaded.name, uploaded.getvalue())
+        except ValueError as e:
+            st.error(str(e))
+            return
+        for essay in essays:
+            essay["key"] = essay_key(book_title, book_synopsis, essay["text"])
+        st.session_state.essay_batch = {"file": uploaded.name, "essays": essays}
+
+        results = {}
+        pending = []
+        for essay in essays:
+            feedback = backend.get_artifact("essay_feedback", essay["key"])
+            if feedback is None:
+                pending.append(essay)
+            else:
+                results[essay["key"]] = feedback
+        if results:
+            st.info(f"이전에 끝난 {len(results)}편은 건너뛰고 {len(pending)}편을 처리합니다.")
+
+        progress = st.progress(len(results) / len(essays), text=f"{len(results)}/{len(essays)}편 완료")
+        container = st.container()
+        for essay in essays:
+            if essay["key"] in results:
+                render_essay_result(container, essay, results[essay["key"]])
+        failed = 0
+        for essay, feedback, error in run_batch(
+            pending,
+            lambda essay: essay_batch_feedback(book_title, book_synopsis, essay),
+            max_workers=int(get_config("ESSAY_BATCH_CONCURRENCY", 4)),
+            initializer=script_ctx_initializer(),
+        ):
+            if error is None:
+                results[essay["key"]] = feedback
+            else:
+                failed += 1
+            render_essay_result(container, essay, feedback, error)
+            progress.progress(len(results) / len(essays), text=f"{len(results)}/{len(essays)}편 완료")
+        if failed:
+            st.warning(f"{failed}편은 피드백을 만들지 못했습니다. 다시 시작하면 실패한 감상문만 다시 처리합니다.")
+    elif st.session_state.get("essay_batch"):
+        # 이전 실행 결과 다시 표시 (다운로드 버튼 클릭 등으로 화면이 갱신된 경우)
+        essays = st.session_state.essay_batch["essays"]
+        results = {}
+        container = st.container()
+        for essay in essays:
+            feedback = backend.get_artifact("essay_feedback", essay["key"])
+            if feedback is not None:
+                results[essay["key"]] = feedback
+                render_essay_result(container, essay, feedback)
+        st.caption(f"{st.session_state.essay_batch['file']}: {len(results)}/{len(essays)}편 완료")
+    else:
+        return
+
+    st.download_button(
+        "피드백 보고서 내려받기 (CSV)",
+        data=build_report_csv(essays, results),
+        file_name=report_filename(book_title),
+        mime="text/csv",
+    )
+
+def page_class_analytics():
+    """교사용: 책별 학급 퀴즈 분석 (문제별 정답률/난이도, 선택지 선택 비율, 학생별 점수)"""
+    st.header("📊 학급 퀴즈 분석")
+    books = get_submission_store().books()
+    if not books:
+        st.info("아직 제출된 퀴즈가 없습니다.")
+        return
+    book_key, title, _ = st.selectbox(
+        "분석할 책", books, format_func=lambda book: f"{book[1]} (응답 {book[2]}개)"
+    )
+    analytics = get_quiz_analytics(book_key)
+    if st.button("새로고침"):
+        st.rerun()
+    added = analytics.refresh()
+    if added:
+        st.caption(f"새 응답 {added}개를 반영했습니다.")
+
+    questions = get_submission_store().questions(book_key)
+    stats = analytics.question_stats()
+    st.subheader("문제별 분석")
+    rows = []
+    for i, qid in enumerate(stats["question_id"]):
+        item = questions.get(qid, {"question": qid, "options": [], "correct_answer": None})
+        row = {
+            "문제": item["question"],
+            "응시 수": int(stats["attempts"][i]),
+            "정답률": f"{stats['correct_rate'][i]:.0%}",
+            "난이도": round(float(stats["difficulty"][i]), 2),
+        }
+        for j, option in enumerate(item["options"]):
+            mark = " ✔" if option == item["correct_answer"] else ""
+            row[f"선택지 {j + 1}{mark}"] = f"{option} ({stats['option_rates'][i][j]:.0%})"
+        row["무응답"] = f"{stats['option_rates'][i][-1]:.0%}"
+        rows.append(row)
+    rows.sort(key=lambda row: row["난이도"], reverse=True)
+    st.dataframe(rows, hide_index=True)
+
+    scores = analytics.student_scores()
+    st.subheader("학생별 점수")
+    st.dataframe(
+        [
+            {
+                "학생": student,
+                "푼 문제": int(scores["answered"][i]),
+                "맞힌 문제": int(scores["correct"][i]),
+                "점수": int(scores["score"][i]),
+            }
+            for i, student in enumerate(scores["student"])
+        ],
+        hide_index=True,
+    )
+
+# === 관리자 기능 ===
+
+def is_admin():
+    return st.session_state.get("is_admin", False)
+
+@st.fragment(run_every=5)
+def render_trace_panel():
+    """호출 지점별 지연 분위수 표 (5초마다 갱신)"""
+    summary = tracing.get_tracer().percentiles()
+    if not summary:
+        st.caption("아직 기록된 외부 호출이 없습니다.")
+        return
+    rows = []
+    for call_site, stats in sorted(summary.items()):
+        rows.append({
+            "호출 지점": call_site,
+            "최근 건수": stats["recent"],
+            "p50(초)": round(stats["p50"], 3) if stats["p50"] is not None else None,
+            "p95(초)": round(stats["p95"], 3) if stats["p95"] is not None else None,
+            "p99(초)": round(stats["p99"], 3) if stats["p99"] is not None else None,
+            "캐시 히트율": f"{stats['cache_hit_rate']:.0%}",
+            "오류율": f"{stats['error_rate']:.0%}",
+        })
+    st.dataframe(rows, hide_index=True)
+
+def render_admin_sidebar():
+    """사이드바 관리자 로그인 및 캐시 상태 (ADMIN_PASSWORD가 설정된 경우에만 표시)"""
+    admin_password = get_config("ADMIN_PASSWORD")
+    if not admin_password:
+        return
+
+    st.sidebar.markdown("---")
+    st.sidebar.header("관리자")
+    if not is_admin():
+        password = st.sidebar.text_input("관리자 비밀번호", type="password")
+        if password:
+            if hmac.compare_digest(password, admin_password):
+                st.session_state.is_admin = True
+                st.rerun()
+            else:
+                st.sidebar.error("비밀번호가 올바르지 않습니다.")
+        return
+
+    with st.sidebar.expander("캐시 상태"):
+        st.write("책 검색 캐시", get_search_cache().stats())
+        st.write("줄거리 캐시", get_synopsis_cache().stats())
+        st.write("책 상세 페이지 캐시", get_book_page_cache().stats())
+        st.write("도서 저장소", get_book_store().stats())
+        st.write("줄거리 정규화 (토큰 절감)", get_synopsis_normalizer().stats())
+        st.write("워커 공용 저장소", get_shared_backend().stats())
+        st.write("LLM 응답 캐시", get_llm_client().stats())
+        st.write("모델 라우터 (마감 시간/대체 모델/차단기)", get_model_router().stats())
+        st.write("퀴즈 검증/복구", dict(quiz_metrics))
+    with st.sidebar.expander("LLM 요청 스케줄러"):
+        st.write(get_llm_scheduler().stats())
+    with st.sidebar.expander("외부 호출 지연 (최근)"):
+        render_trace_panel()
+    if st.sidebar.button("관리자 모드 종료"):
+        st.session_state.is_admin = False
+        st.rerun()
+
+# === 세션 체크포인트 (재접속 시 이어하기) ===
+
+CHECKPOINT_PARAM = "resume"  # 이어하기 코드를 담는 URL 쿼리 파라미터
+CHECKPOINT_MAX_AGE = float(get_config("CHECKPOINT_MAX_AGE", 7 * 24 * 3600))
+CHECKPOINT_GC_INTERVAL = 3600  # 오래된 체크포인트 정리 주기(초)
+
+def collect_stale_checkpoints():
+    """CHECKPOINT_MAX_AGE 동안 저장되지 않은 체크포인트 삭제 (프로세스당 주기마다 한 번)"""
+    state, lock = get_checkpoint_gc_state()
+    with lock:
+        if time.time() - state["last_run"] < CHECKPOINT_GC_INTERVAL:
+            return
+        state["last_run"] = time.time()
+    get_checkpoint_store().gc(CHECKPOINT_MAX_AGE)
+
+def checkpoint_book(book):
+    """체크포인트에 넣을 선택한 책 정보 (도서 정보와 재작성 줄거리 캐시 키만, 줄거리 본문은 넣지 않음)"""
+    data = {"item": book.to_item()}
+    if book.combined_synopsis is not None:
+        data["synopsis_key"] = synopsis_cache_key(book.isbn, book.title, book.combined_synopsis)
+    return data
+
+def restore_book(data):
+    """체크포인트의 책을 도서 저장소에 다시 넣고 책 ID 반환 (줄거리는 캐시/읽기 자료 팩에서 찾음)"""
+    store = get_book_store()
+    book = store.get(store.ingest(data["item"]))
+    if book.synopsis is None:
+        pack_entry = find_book(get_reading_pack(), book.isbn)
+        if pack_entry:
+            book.combined_synopsis = pack_entry["combined_synopsis"]
+            book.synopsis = pack_entry["synopsis"]
+        elif data.get("synopsis_key"):
+            key = data["synopsis_key"]
+            book.synopsis = get_synopsis_cache().get(key) or get_shared_backend().get_artifact("synopsis", key)
+    return book.book_id
+
+def save_checkpoint():
+    """현재 진행 상황을 이어하기 코드로 저장 (마지막 저장 이후 바뀐 내용이 있을 때만 씀)"""
+    code = st.session_state.get("resume_code")
+    if not code:
+        return
+    data = session_checkpoint.snapshot(st.session_state)
+    book = get_selected_book()
+    if book is not None:
+        data["book"] = checkpoint_book(book)
+    context = st.session_state.get("debate_context")
+    if context is not None and context.summarized_count:
+        data["debate_summary"] = {"summary": context.summary, "summarized_count": context.summarized_count}
+    digest = session_checkpoint.fingerprint(data)
+    if digest == st.session_state.get("checkpoint_digest"):
+        return
+    try:
+        get_checkpoint_store().save(code, data)
+    except Exception as e:
+        st.toast(f"진행 상황을 저장하지 못했습니다: {e}")
+        return
+    st.session_state.checkpoint_digest = digest
+
+def load_checkpoint(code):
+    """이어하기 코드의 체크포인트를 세션에 복원 (저장소를 한 번만 읽음, 복원했으면 True)"""
+    data = get_checkpoint_store().load(code)
+    if not session_checkpoint.restore(st.session_state, data):
+        return False
+    st.session_state.pop("debate_context", None)
+    st.session_state.selected_book = restore_book(data["book"]) if data.get("book") else None
+    if data.get("debate_summary"):
+        context = get_debate_context()
+        context.summary = data["debate_summary"]["summary"]
+        context.summarized_count = data["debate_summary"]["summarized_count"]
+    st.session_state.checkpoint_digest = None
+    return True
+
+def start_session_checkpoint():
+    """새 세션 시작 시 URL의 이어하기 코드로 복원하거나 새 코드를 발급해 URL에 넣음"""
+    if "resume_code" in st.session_state:
+        return
+    collect_stale_checkpoints()
+    code = session_checkpoint.normalize_resume_code(st.query_params.get(CHECKPOINT_PARAM))
+    if code and load_checkpoint(code):
+        st.session_state.checkpoint_restored = True
+    else:
+        code = session_checkpoint.new_resume_code()
+    st.session_state.resume_code = code
+    st.query_params[CHECKPOINT_PARAM] = code
+
+def discard_checkpoint():
+    """전체 초기화: 저장된 진행 상황을 지우고 URL의 코드도 제거 (다음 실행에서 새 코드 발급)"""
+    code = st.session_state.get("resume_code")
+    if code:
+        get_checkpoint_store().delete(code)
+    st.query_params.pop(CHECKPOINT_PARAM, None)
+
+def render_resume_sidebar():
+    """사이드바 이어하기 코드 표시와 다른 기기의 코드 입력"""
+    st.sidebar.markdown("---")
+    st.sidebar.header("이어하기")
+    if st.session_state.pop("checkpoint_restored", False):
+        st.sidebar.success("이전 진행 상황을 불러왔습니다.")
+    st.sidebar.caption("연결이 끊겨도 이 주소로 다시 들어오거나, 다른 기기에서 아래 코드를 입력하면 이어서 할 수 있어요.")
+    st.sidebar.code(st.session_state.resume_code, language=None)
+    entered = st.sidebar.text_input("이어하기 코드 입력", key="resume_code_input")
+    if st.sidebar.button("코드로 불러오기"):
+        code = session_checkpoint.normalize_resume_code(entered)
+        if code and load_checkpoint(code):
+            st.session_state.resume_code = code
+            st.session_state.checkpoint_restored = True
+            st.query_params[CHECKPOINT_PARAM] = code
+            st.rerun()
+        st.sidebar.error("해당 코드로 저장된 진행 상황이 없습니다.")
 
 # === 메인 함수 ===
 
+# 화면 스타일 (매 실행마다 문자열을 새로 만들지 않도록 모듈 상수로 둠)
+APP_CSS = """
+<style>
+/* 전체 배경 및 컨테이너 스타일 */
+body {
+    background-color: #f0f2f6;
+}
+.block-container {
+    background-color: #ffffff;
+    border-radius: 8px;
+    padding: 20px;
+}
+/* 버튼 스타일 */
+.stButton>button {
+    background-color: #4CAF50;
+    color: white;
+    border: none;
+    border-radius: 5px;
+    padding: 8px 16px;
+    margin: 5px;
+}
+/* 사이드바 스타일 */
+.css-1d391kg {
+    background-color: #f8f9fa;
+}
+</style>
+"""
+
 def main():
     # 세션 상태 기본값 설정
     if "current_page" not in st.session_state:
         st.session_state.current_page = "책 검색"
     if "selected_book" not in st.session_state:
         st.session_state.selected_book = None
-    if "selected_synopsis_final" not in st.session_state:
-        st.session_state.selected_synopsis_final = None
 
     # 최신 Streamlit에서 chat 기능 사용 가능
     st.set_page_config(page_title="인공지능 독서 교육 프로그램", page_icon="📚", layout="wide")
+    configure_tracing()
+    configure_http_client()
+    start_session_checkpoint()
 
-    # --- 커스텀 CSS 적용 ---
-    st.markdown(
-        """
-        <style>
-        /* 전체 배경 및 컨테이너 스타일 */
-        body {
-            background-color: #f0f2f6;
-        }
-        .block-container {
-            background-color: #ffffff;
-            border-radius: 8px;
-            padding: 20px;
-        }
-        /* 버튼 스타일 */
-        .stButton>button {
-            background-color: #4CAF50;
-            color: white;
-            border: none;
-            border-radius: 5px;
-            padding: 8px 16px;
-            margin: 5px;
-        }
-        /* 사이드바 스타일 */
-        .css-1d391kg { 
-            background-color: #f8f9fa;
-        }
-        </style>
-        """, unsafe_allow_html=True
-    )
+    # --- 커스텀 CSS 적용 (조각만 다시 실행될 때는 다시 보내지 않음) ---
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
     # --- 상단 타이틀 및 안내 ---
     st.title("인공지능 독서 교육 프로그램")
@@ -578,20 +1928,27 @@ def main():
 
     # --- 사이드바 메뉴 ---
     pages = ["책 검색", "독서 퀴즈", "독서 토론", "독서 감상문 피드백"]
+    if is_admin():
+        pages.append("학급 퀴즈 분석")
     if "current_page" not in st.session_state or st.session_state.current_page not in pages:
         st.session_state.current_page = "책 검색"
 
     current_index = pages.index(st.session_state.current_page)
     menu = st.sidebar.radio("메뉴 선택", pages, index=current_index)
     st.session_state.current_page = menu
+    tracing.set_page(menu)
 
     # --- 사이드바 초기화 옵션 ---
     st.sidebar.markdown("---")
     st.sidebar.header("초기화 옵션")
     if st.sidebar.button("전체 초기화"):
+        discard_checkpoint()
         st.session_state.clear()
         st.rerun()
 
+    render_resume_sidebar()
+    render_admin_sidebar()
+
     # --- 페이지별 함수 호출 ---
     if menu == "책 검색":
         page_book_search()
@@ -601,6 +1958,10 @@ def main():
         page_reading_discussion()
     elif menu == "독서 감상문 피드백":
         page_reading_feedback()
+    elif menu == "학급 퀴즈 분석":
+        page_class_analytics()
+
+    save_checkpoint()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# === 줄거리 크롤러 벤치마크 ===
+# 가짜 book.naver.com 서버를 상대로 책 선택 1회에 해당하는 크롤링을 반복하고
+# 선택당 지연(벽시계 시간)과 CPU 시간(호출 스레드 기준)을 비교한다.
+#   legacy : 검색 페이지 → 상세 페이지 2회 요청, 문서 전체를 html.parser로 파싱 (이전 방식)
+#   direct : API item의 link로 상세 페이지만 요청, book_intro 영역만 파싱
+#   cached : direct + ISBN별 상세 페이지 HTML 캐시 히트
+#
+# 사용법 (저장소 루트에서):
+#   python -m bench.crawler_bench --selections 50 --book-latency lognormal:0.3:0.4
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_synopsis(http, book_title):
+    """검색 페이지를 거치고 전체 문서를 파싱하던 이전 크롤러"""
+    from bs4 import BeautifulSoup
+
+    search_response = http.get("https://book.naver.com/search/search.nhn",
+                               call_site="naver_crawl_search", params={"query": book_title})
+    first_link = BeautifulSoup(search_response.text, "html.parser").select_one("ul.list_type1 li a")
+    if first_link is None:
+        return None
+    detail_response = http.get("https://book.naver.com" + first_link.get("href"), call_site="naver_crawl_detail")
+    summary_div = BeautifulSoup(detail_response.text, "html.parser").find("div", class_="book_intro")
+    return summary_div.get_text(separator="\n").strip() if summary_div else None
+
+
+def measure(fn, selections):
+    walls, cpus = [], []
+    for i in range(selections):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        if not fn(i):
+            raise RuntimeError("책 소개를 가져오지 못했습니다.")
+        cpus.append(time.thread_time() - cpu)
+        walls.append(time.perf_counter() - wall)
+    from bench.load_test import summarize
+
+    return {"latency": summarize(walls), "cpu": summarize(cpus)}
+
+
+def run_benchmark(args):
+    from bench.fake_servers import FakeServer, LatencyModel, NaverBookHandler, _fake_book
+    from cache import TTLCache
+    from http_client import HttpClient
+    from naver_book import HTML_PARSER, NaverBookCrawler
+
+    server = FakeServer(NaverBookHandler, latency=LatencyModel(args.book_latency)).start()
+    http = HttpClient(host_overrides={"book.naver.com": server.url})
+    items = [_fake_book("벤치마크", i) for i in range(args.selections)]
+    isbns = [item["isbn"].split()[-1] for item in items]
+    try:
+        crawler = NaverBookCrawler(http, html_cache=TTLCache(maxsize=args.selections))
+        results = {
+            "legacy": measure(lambda i: legacy_synopsis(http, items[i]["title"]), args.selections),
+            "direct": measure(
+                lambda i: NaverBookCrawler(http).get_synopsis(items[i]["title"], items[i]["link"], isbns[i]),
+                args.selections,
+            ),
+        }
+        # 캐시를 한 번 채운 뒤 같은 책을 다시 선택
+        for i in range(args.selections):
+            crawler.get_synopsis(items[i]["title"], items[i]["link"], isbns[i])
+        results["cached"] = measure(
+            lambda i: crawler.get_synopsis(items[i]["title"], items[i]["link"], isbns[i]), args.selections
+        )
+    finally:
+        http.close()
+        server.stop()
+    return {"parser": HTML_PARSER, "config": vars(args), "modes": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="줄거리 크롤러의 선택당 지연과 CPU 시간을 비교합니다.")
+    parser.add_argument("--selections", type=int, default=30, help="모드별 책 선택 횟수")
+    parser.add_argument("--book-latency", default="fixed:0.05", help="가짜 book.naver.com 응답 지연")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args)
+    print(f"parser: {result['parser']} · {args.selections} selections per mode")
+    print(f"{'mode':<8}{'p50 ms':>9}{'p95 ms':>9}{'cpu p50 ms':>12}{'cpu p95 ms':>12}")
+    for mode, stats in result["modes"].items():
+        print(f"{mode:<8}{stats['latency']['p50'] * 1000:>9.1f}{stats['latency']['p95'] * 1000:>9.1f}"
+              f"{stats['cpu']['p50'] * 1000:>12.2f}{stats['cpu']['p95'] * 1000:>12.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+        print(f"saved {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# === 벤치마크용 가짜 외부 서버 ===
+# 네이버 도서 검색 API, book.naver.com 검색/상세 페이지, OpenAI chat completions
+# (스트리밍/비스트리밍)를 흉내 내는 로컬 HTTP 서버.
+# 응답 지연은 LatencyModel로 분포를 정해서 실제 환경과 비슷한 부하를 만든다.
+
+
+class LatencyModel:
+    """응답 지연 분포
+
+    spec 문자열 예시:
+      "fixed:0.2"            항상 0.2초
+      "uniform:0.1:0.4"      0.1~0.4초 균등 분포
+      "lognormal:0.3:0.5"    중앙값 0.3초, sigma 0.5인 로그정규 분포
+    """
+
+    def __init__(self, spec="fixed:0"):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._random.uniform(*self.params)
+            if self.kind == "lognormal":
+                median, sigma = self.params
+                return self._random.lognormvariate(0, sigma) * median
+        raise ValueError(f"알 수 없는 지연 분포: {self.spec}")
+
+    def sleep(self):
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeServer:
+    """백그라운드 스레드에서 도는 ThreadingHTTPServer"""
+
+    def __init__(self, handler_class, **attrs):
+        handler = type(handler_class.__name__, (handler_class,), attrs)
+        handler.server_ref = self
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.requests = 0
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = LatencyModel()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# --- 네이버 ---
+
+def _fake_book(query, index):
+    isbn13 = f"979{abs(hash(query)) % 10**6:06d}{index:04d}"
+    return {
+        "title": f"<b>{query}</b> {index + 1}권",
+        "link": f"https://book.naver.com/bookdb/book_detail.nhn?bid={isbn13}",
+        "image": "",
+        "author": "김작가",
+        "discount": "12000",
+        "publisher": "벤치출판사",
+        "pubdate": "20240101",
+        "isbn": f"{isbn13[3:]} {isbn13}",
+        "description": f"{query} 이야기의 줄거리입니다. " * 20,
+    }
+
+
+class NaverApiHandler(_Handler):
+    """openapi.naver.com/v1/search/book.json"""
+
+    def do_GET(self):
+        self.server_ref.requests += 1
+        self.latency.sleep()
+        parts = urlsplit(self.path)
+        if parts.path != "/v1/search/book.json":
+            return self._send(404, "{}", "application/json")
+        params = parse_qs(parts.query)
+        query = params.get("query", [""])[0]
+        display = int(params.get("display", ["10"])[0])
+        start = int(params.get("start", ["1"])[0])
+        total = 100
+        items = [_fake_book(query, i) for i in range(start - 1, min(start - 1 + display, total))]
+        body = {"lastBuildDate": "", "total": total, "start": start, "display": len(items), "items": items}
+        self._send(200, json.dumps(body, ensure_ascii=False), "application/json")
+
+
+class NaverBookHandler(_Handler):
+    """book.naver.com 검색 결과/상세 페이지"""
+
+    def do_GET(self):
+        self.server_ref.requests += 1
+        self.latency.sleep()
+        parts = urlsplit(self.path)
+        if parts.path == "/search/search.nhn":
+            html = (
+                "<html><body>" + "<div class='header'>메뉴</div>" * 200
+                + "<ul class='list_type1'><li><a href='/bookdb/book_detail.nhn?bid=1'>책</a></li></ul>"
+                + "</body></html>"
+            )
+            return self._send(200, html, "text/html; charset=utf-8")
+        if parts.path == "/bookdb/book_detail.nhn":
+            html = (
+                "<html><head>" + "<script>var x = 1;</script>" * 200 + "</head><body>"
+                + "<div class='nav'>메뉴</div>" * 500
+                + "<div class='book_intro'>" + "<p>상세 페이지의 책 소개 문단입니다.</p>" * 30 + "</div>"
+                + "<div class='footer'>푸터</div>" * 300 + "</body></html>"
+            )
+            return self._send(200, html, "text/html; charset=utf-8")
+        self._send(404, "", "text/html")
+
+
+# --- OpenAI ---
+
+_question_counter = itertools.count()
+
+
+def _quiz_item():
+    n = next(_question_counter)
+    options = [f"선택지 {n}-{i}" for i in range(4)]
+    return {"question": f"벤치마크 문제 {n}번의 정답은?", "options": options, "correct_answer": options[n % 4]}
+
+
+def _completion_text(body):
+    """요청 내용에 맞는 그럴듯한 응답 텍스트"""
+    response_format = body.get("response_format") or {}
+    schema_name = response_format.get("json_schema", {}).get("name")
+    if schema_name == "reading_quiz":
+        count = 3
+        match = re.search(r"(\d+)개의 4지 선다형", body["messages"][-1]["content"])
+        if match:
+            count = int(match.group(1))
+        return json.dumps({"quiz": [_quiz_item() for _ in range(count)]}, ensure_ascii=False)
+    if schema_name == "reading_quiz_item":
+        return json.dumps(_quiz_item(), ensure_ascii=False)
+    prompt = body["messages"][-1]["content"]
+    if '"explanations"' in prompt:
+        numbers = [int(n) for n in re.findall(r"문제 (\d+):", prompt)]
+        return json.dumps(
+            {"explanations": [{"number": n, "explanation": "정답을 다시 읽어 보세요."} for n in numbers]},
+            ensure_ascii=False,
+        )
+    if "토론 주제" in prompt:
+        return "학생은 매일 책을 읽어야 한다.\n숙제는 없어져야 한다."
+    return "벤치마크용 응답 문장입니다. " * 40
+
+
+class OpenAIHandler(_Handler):
+    """/v1/chat/completions (stream=True면 SSE로 조각 전송)"""
+
+    ttft = LatencyModel()          # 첫 토큰까지의 지연
+    chunk_interval = 0.0           # 스트리밍 조각 사이 간격(초)
+    chunk_chars = 8
+
+    def do_POST(self):
+        self.server_ref.requests += 1
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if urlsplit(self.path).path.rstrip("/") != "/v1/chat/completions":
+            return self._send(404, "{}", "application/json")
+        text = _completion_text(body)
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 2
+        completion_tokens = len(text) // 2
+        if not body.get("stream"):
+            self.latency.sleep()
+            payload = {
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }
+            return self._send(200, json.dumps(payload, ensure_ascii=False), "application/json")
+
+        self.ttft.sleep()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, len(text), self.chunk_chars):
+            chunk = {
+                "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "delta": {"content": text[i:i + self.chunk_chars]},
+                             "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.chunk_interval:
+                time.sleep(self.chunk_interval)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_fake_servers(naver_latency="fixed:0", book_latency="fixed:0",
+                       openai_latency="fixed:0", openai_ttft="fixed:0", chunk_interval=0.0):
+    """세 가지 가짜 서버를 띄우고 {"naver_api", "naver_book", "openai"} -> FakeServer 반환"""
+    servers = {}
+    for name, handler, attrs in (
+        ("naver_api", NaverApiHandler, {"latency": LatencyModel(naver_latency)}),
+        ("naver_book", NaverBookHandler, {"latency": LatencyModel(book_latency)}),
+        ("openai", OpenAIHandler, {
+            "latency": LatencyModel(openai_latency),
+            "ttft": LatencyModel(openai_ttft),
+            "chunk_interval": chunk_interval,
+        }),
+    ):
+        servers[name] = FakeServer(handler, **attrs).start()
+    return servers
+
+
+def app_environment(servers):
+    """앱이 가짜 서버를 바라보도록 하는 환경 변수 (get_config가 읽음)"""
+    return {
+        "OPENAI_API_KEY": "bench-key",
+        "OPENAI_BASE_URL": servers["openai"].url + "/v1",
+        "NAVER_CLIENT_ID": "bench-id",
+        "NAVER_CLIENT_SECRET": "bench-secret",
+        "HTTP_HOST_OVERRIDES": json.dumps({
+            "openapi.naver.com": servers["naver_api"].url,
+            "book.naver.com": servers["naver_book"].url,
+        }),
+    }
@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# === 교실 부하 테스트 ===
+# 가짜 네이버/OpenAI 서버와 실제 `streamlit run` 서버를 띄우고, 학생마다 웹소켓 세션을 하나씩 열어
+# N명이 동시에 검색 → 책 선택 → 퀴즈 → 토론 → 감상문 피드백을 진행하도록 한다 (bench/st_client.py).
+# 세션들이 한 서버 프로세스를 함께 쓰므로 캐시/단일 비행/스케줄러가 실제 교실처럼 공유된다.
+# 동작별 p50/p95/p99 지연, 처리량, 서버 최대 메모리를 출력하고 bench/results/에 JSON으로 저장한다.
+#
+# 사용법 (저장소 루트에서):
+#   python -m bench.load_test --sessions 30 --concurrency 30 \
+#       --openai-latency lognormal:1.5:0.4 --openai-ttft lognormal:0.4:0.3
+#   python -m bench.load_test --baseline bench/results/<이전 결과>.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+QUERIES = ["어린 왕자", "마당을 나온 암탉", "샬롯의 거미줄", "나의 라임 오렌지나무", "푸른 사자 와니니"]
+
+
+def percentile(values, q):
+    """q(0~100) 분위수 (선형 보간)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+class SessionDriver:
+    """웹소켓 세션 하나로 학생 한 명의 수업 흐름을 재현하며 동작별 시간을 기록"""
+
+    def __init__(self, server, query, timeout, timings, lock):
+        from bench.st_client import StreamlitSession
+
+        self.session = StreamlitSession(server, timeout=timeout)
+        self.query = query
+        self.timings = timings
+        self.lock = lock
+
+    def timed(self, action, fn):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.timings[action].append(elapsed)
+
+    def go_to(self, page):
+        # 메뉴 라디오는 index가 위젯 ID에 들어가서, 조각만 다시 실행된 뒤에는 화면의 라디오와 서버의
+        # 라디오 ID가 달라 첫 선택이 무시될 수 있다. 브라우저의 학생처럼 한 번 더 고른다.
+        for _ in range(2):
+            self.session.set_value("radio", "메뉴 선택", page)
+            if self.session.value("radio", "메뉴 선택") == page:
+                return
+        raise RuntimeError(f"{page} 페이지로 이동하지 못했습니다.")
+
+    def run(self):
+        session = self.session
+        try:
+            self.timed("load", session.run)
+
+            def search():
+                session.set_value("text_input", "검색어 입력", self.query)
+                session.click("검색")
+            self.timed("search", search)
+            self.timed("select", lambda: session.click("이 책 선택"))
+
+            self.timed("quiz", lambda: self.go_to("독서 퀴즈"))
+            self.timed("grade", lambda: session.click("답안 제출"))
+
+            self.timed("debate_topics", lambda: self.go_to("독서 토론"))
+            self.timed("debate_start", lambda: session.click("토론 시작"))
+            # 학생은 찬성측: 1, 3, 5 라운드를 입력하고 챗봇 턴과 최종 평가는 이어서 자동 진행
+            for round_no in (1, 3, 5):
+                self.timed("debate_turn", lambda: session.chat(f"{round_no}라운드 학생 의견입니다. " * 5))
+
+            def feedback():
+                self.go_to("독서 감상문 피드백")
+                session.set_value("text_area", "작성한 독서 감상문", "책을 읽고 느낀 점입니다. " * 30)
+                session.click("피드백 받기")
+            self.timed("feedback", feedback)
+        finally:
+            session.close()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_load_test(args):
+    from bench.fake_servers import app_environment, start_fake_servers
+    from bench.st_client import StreamlitServer
+
+    servers = start_fake_servers(
+        naver_latency=args.naver_latency,
+        book_latency=args.book_latency,
+        openai_latency=args.openai_latency,
+        openai_ttft=args.openai_ttft,
+        chunk_interval=args.chunk_interval,
+    )
+    cache_dir = tempfile.mkdtemp(prefix="reading-bench-")
+    env = dict(
+        app_environment(servers),
+        CACHE_DIR=cache_dir,
+        READING_PACK_PATH=os.path.join(cache_dir, "no-pack.json"),
+    )
+    app_server = StreamlitServer(env)
+
+    timings = defaultdict(list)
+    lock = threading.Lock()
+    failures = []
+    try:
+        idle_rss_mb = app_server.peak_rss_mb()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [
+                executor.submit(
+                    lambda i=i: SessionDriver(
+                        app_server, QUERIES[i % args.distinct_books], args.timeout, timings, lock
+                    ).run()
+                )
+                for i in range(args.sessions)
+            ]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append(repr(e))
+        wall_time = time.perf_counter() - started
+        peak_rss_mb = app_server.peak_rss_mb()
+    finally:
+        app_server.stop()
+        for server in servers.values():
+            server.stop()
+
+    completed = args.sessions - len(failures)
+    actions = sum(len(values) for values in timings.values())
+    session_rss_mb = peak_rss_mb - idle_rss_mb if peak_rss_mb is not None and idle_rss_mb is not None else None
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {key: value for key, value in vars(args).items() if key != "baseline"},
+        "wall_time": wall_time,
+        "sessions_completed": completed,
+        "failures": failures,
+        "throughput": {
+            "sessions_per_sec": completed / wall_time if wall_time else None,
+            "actions_per_sec": actions / wall_time if wall_time else None,
+        },
+        "memory": {
+            "peak_rss_mb": peak_rss_mb,
+            "idle_rss_mb": idle_rss_mb,
+            "peak_rss_per_session_mb": session_rss_mb / args.sessions if session_rss_mb is not None and args.sessions else None,
+        },
+        "upstream_requests": {name: server.requests for name, server in servers.items()},
+        "actions": {action: summarize(values) for action, values in timings.items()},
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"revision {result['revision']} · {result['sessions_completed']} sessions "
+          f"in {result['wall_time']:.1f}s · failures {len(result['failures'])}")
+    print(f"throughput: {result['throughput']['sessions_per_sec']:.2f} sessions/s, "
+          f"{result['throughput']['actions_per_sec']:.2f} actions/s")
+    memory = result["memory"]
+    if memory["peak_rss_mb"] is not None:
+        print(f"server peak RSS: {memory['peak_rss_mb']:.1f} MB (idle {memory['idle_rss_mb']:.1f} MB, "
+              f"{memory['peak_rss_per_session_mb']:.2f} MB/session)")
+    print(f"upstream requests: {result['upstream_requests']}")
+    header = f"{'action':<15}{'n':>5}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if baseline:
+        header += f"{'base p95':>10}{'Δp95':>9}"
+    print(header)
+    for action, stats in result["actions"].items():
+        line = f"{action:<15}{stats['count']:>5}{stats['p50']:>9.3f}{stats['p95']:>9.3f}{stats['p99']:>9.3f}"
+        base = (baseline or {}).get("actions", {}).get(action)
+        if base:
+            line += f"{base['p95']:>10.3f}{(stats['p95'] - base['p95']) / base['p95'] * 100:>+8.1f}%"
+        print(line)
+    for failure in result["failures"][:5]:
+        print("  failure:", failure)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="가짜 외부 서버로 교실 규모 부하 테스트를 실행합니다.")
+    parser.add_argument("--sessions", type=int, default=10, help="시뮬레이션할 학생 세션 수")
+    parser.add_argument("--concurrency", type=int, default=10, help="동시에 진행할 세션 수")
+    parser.add_argument("--distinct-books", type=int, default=2, help="학생들이 검색하는 서로 다른 책 수")
+    parser.add_argument("--naver-latency", default="lognormal:0.15:0.3")
+    parser.add_argument("--book-latency", default="lognormal:0.3:0.4")
+    parser.add_argument("--openai-latency", default="lognormal:1.5:0.4", help="비스트리밍 응답 지연")
+    parser.add_argument("--openai-ttft", default="lognormal:0.4:0.3", help="스트리밍 첫 토큰 지연")
+    parser.add_argument("--chunk-interval", type=float, default=0.01, help="스트리밍 조각 간격(초)")
+    parser.add_argument("--timeout", type=float, default=120, help="동작 하나(스크립트 실행 한 번)의 제한 시간(초)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 경로")
+    parser.add_argument("--output", help="결과 저장 경로 (기본값: bench/results/<시각>-<리비전>.json)")
+    args = parser.parse_args(argv)
+
+    result = run_load_test(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['revision']}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+    print(f"saved {output}")
+    return 1 if result["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# === 화면 다시 실행(rerun) 비용과 콜드 스타트 측정 ===
+# cold_start: 새 파이썬 프로세스에서 app 모듈을 import하는 데 걸리는 시간과 그때 읽히는 무거운 모듈
+# rerun     : 가짜 외부 서버와 실제 `streamlit run` 서버를 띄우고 웹소켓 세션으로 퀴즈/토론 화면까지 진행한 뒤,
+#             답 고르기와 검색 결과 선택 같은 상호작용 한 번에 드는 서버 프로세스 CPU 시간과 클라이언트 지연.
+#             같은 상호작용을 브라우저처럼 조각 ID와 함께 보낸 경우(fragment)와 조각 ID 없이 보내
+#             스크립트 전체를 다시 실행한 경우(full)를 같은 서버에서 번갈아 재서 비교한다.
+# CPU 시간은 /proc의 틱 단위(보통 10ms)라 동작별 합계를 반복 횟수로 나눈 평균으로 낸다.
+# 결과 JSON은 기계마다 다르므로 저장소에 넣지 않는다 (bench/results/는 .gitignore 대상).
+#
+# 사용법 (저장소 루트에서):
+#   python -m bench.rerun_bench --repeat 20 --output bench/results/rerun.json
+#   python -m bench.rerun_bench --baseline bench/results/rerun.json   # 같은 기계에서 변경 전후 비교
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("openai", "bs4", "lxml", "numpy", "tiktoken")
+
+COLD_START_SCRIPT = """
+import json, sys, time
+started, cpu = time.perf_counter(), time.process_time()
+import app
+print(json.dumps({
+    "wall": time.perf_counter() - started,
+    "cpu": time.process_time() - cpu,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def median(values):
+    return statistics.median(values) if values else None
+
+
+def measure_cold_start(repeat):
+    """app import 시간 (매번 새 프로세스)"""
+    walls, cpus, loaded = [], [], []
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, "-c", COLD_START_SCRIPT % (HEAVY_MODULES,)],
+            cwd=ROOT, env=env, text=True, stderr=subprocess.DEVNULL,
+        )
+        sample = json.loads(output.strip().splitlines()[-1])
+        walls.append(sample["wall"])
+        cpus.append(sample["cpu"])
+        loaded = sample["loaded"]
+    return {"wall_median": median(walls), "cpu_median": median(cpus), "heavy_modules_loaded": loaded}
+
+
+def timed_run(samples, server, action, fn):
+    """fn() 한 번의 서버 CPU 시간/지연을 samples[action]에 추가"""
+    cpu, wall = server.cpu_time(), time.perf_counter()
+    session = fn()
+    entry = samples.setdefault(action, {"cpu": 0.0, "wall": [], "fragment_runs": 0})
+    entry["wall"].append(time.perf_counter() - wall)
+    entry["cpu"] += server.cpu_time() - cpu
+    entry["fragment_runs"] += session.last_fragment_run
+
+
+def measure_reruns(args):
+    from bench.fake_servers import app_environment, start_fake_servers
+    from bench.st_client import StreamlitServer, StreamlitSession
+
+    servers = start_fake_servers()
+    cache_dir = tempfile.mkdtemp(prefix="reading-rerun-")
+    env = dict(
+        app_environment(servers),
+        CACHE_DIR=cache_dir,
+        READING_PACK_PATH=os.path.join(cache_dir, "no-pack.json"),
+    )
+    app_server = StreamlitServer(env)
+
+    samples = {}
+    try:
+        session = StreamlitSession(app_server, timeout=args.timeout)
+        session.run()
+        session.set_value("text_input", "검색어 입력", "어린 왕자")
+        session.click("검색")
+
+        # 검색 결과 선택 상자만 바꾸는 상호작용
+        label = "검색 결과에서 책을 선택하세요."
+        options = session.find("selectbox", label).proto.options
+        for i in range(args.repeat):
+            for scope, fragment in (("fragment", True), ("full", False)):
+                option = options[(2 * i + fragment) % len(options)]
+                timed_run(samples, app_server, f"search_picker/{scope}",
+                          lambda: session.set_value("selectbox", label, option, fragment=fragment))
+        session.click("이 책 선택")
+
+        # 퀴즈 답 고르기
+        go_to(session, "독서 퀴즈")
+        options = session.find("radio", "문제 1의 답변").proto.options
+        for i in range(args.repeat):
+            for scope, fragment in (("fragment", True), ("full", False)):
+                option = options[(2 * i + fragment) % len(options)]
+                timed_run(samples, app_server, f"quiz_radio/{scope}",
+                          lambda: session.set_value("radio", "문제 1의 답변", option, fragment=fragment))
+
+        # 토론 한 라운드 (학생 입력 + 챗봇 응답)
+        go_to(session, "독서 토론")
+        session.click("토론 시작")
+        timed_run(samples, app_server, "debate_turn/fragment", lambda: session.chat("학생 의견입니다. " * 5))
+        session.close()
+    finally:
+        app_server.stop()
+        for server in servers.values():
+            server.stop()
+
+    return {
+        action: {
+            "cpu_mean": values["cpu"] / len(values["wall"]),
+            "wall_median": median(values["wall"]),
+            "n": len(values["wall"]),
+            "fragment_runs": values["fragment_runs"],
+        }
+        for action, values in samples.items()
+    }
+
+
+def go_to(session, page):
+    # 메뉴 라디오 ID가 index에 따라 바뀌어 첫 선택이 무시될 수 있다 (bench/load_test.py 참고)
+    for _ in range(2):
+        session.set_value("radio", "메뉴 선택", page)
+        if session.value("radio", "메뉴 선택") == page:
+            return
+    raise RuntimeError(f"{page} 페이지로 이동하지 못했습니다.")
+
+
+def print_report(result, baseline=None):
+    def delta(current, base):
+        if not base:
+            return ""
+        return f"  (base {base:.4f}s, {(current - base) / base * 100:+.1f}%)"
+
+    base_cold = (baseline or {}).get("cold_start", {})
+    cold = result["cold_start"]
+    print(f"revision {result['revision']}")
+    print(f"cold start: wall {cold['wall_median']:.4f}s{delta(cold['wall_median'], base_cold.get('wall_median'))}")
+    print(f"            cpu  {cold['cpu_median']:.4f}s{delta(cold['cpu_median'], base_cold.get('cpu_median'))}")
+    print(f"            heavy modules at import: {', '.join(cold['heavy_modules_loaded']) or '-'}")
+    for action, stats in result.get("reruns", {}).items():
+        base = (baseline or {}).get("reruns", {}).get(action, {})
+        print(f"{action:<22} n={stats['n']:<3} fragment runs {stats['fragment_runs']:<3} cpu {stats['cpu_mean']:.4f}s"
+              f"{delta(stats['cpu_mean'], base.get('cpu_mean'))}"
+              f"  wall {stats['wall_median']:.4f}s{delta(stats['wall_median'], base.get('wall_median'))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="상호작용 한 번의 다시 실행 비용과 콜드 스타트 시간을 측정합니다.")
+    parser.add_argument("--repeat", type=int, default=20, help="동작별 반복 횟수")
+    parser.add_argument("--cold-start-repeat", type=int, default=10, help="콜드 스타트 측정 프로세스 수")
+    parser.add_argument("--skip-reruns", action="store_true", help="콜드 스타트만 측정 (Streamlit 없이)")
+    parser.add_argument("--timeout", type=float, default=60, help="스크립트 실행 한 번의 제한 시간(초)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 경로")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    from bench.load_test import git_revision
+
+    result = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {key: value for key, value in vars(args).items() if key != "baseline"},
+        "cold_start": measure_cold_start(args.cold_start_repeat),
+    }
+    if not args.skip_reruns:
+        result["reruns"] = measure_reruns(args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+        print(f"saved {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import re
+import sys
+import tracemalloc
+
+# === 세션당 메모리 측정 ===
+# 같은 책을 검색/선택하고 토론까지 마친 학생 세션 N개의 세션 상태를 두 가지 구조로 만들어
+# tracemalloc으로 세션당 메모리를 비교한다.
+#   legacy  : 세션마다 네이버 item dict 사본, 원본/재작성 줄거리, 시스템 프롬프트를 포함한 토론 대화
+#   compact : 세션에는 책 ID와 토론 턴만, 도서 정보와 줄거리는 공용 BookStore에 한 번
+# legacy의 item 사본은 영구 캐시(SQLite)나 만료 후 재요청에서 역직렬화될 때 생기는 사본을 흉내 낸다.
+#
+# 사용법 (저장소 루트에서):
+#   python -m bench.session_memory --sessions 300 --distinct-books 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TAG_RE = re.compile(r"<.*?>")
+
+
+def clean(text):
+    return TAG_RE.sub("", text) if text else ""
+
+
+def fake_debate_turns(rounds=6):
+    turns = []
+    for round_no in range(1, rounds + 1):
+        role = "user" if round_no % 2 else "assistant"
+        turns.append({"role": role, "content": f"[{round_no}라운드] " + "근거를 들어 의견을 말합니다. " * 40})
+    return turns
+
+
+def fake_system_prompt(topic):
+    return f"당신은 독서 토론 챗봇입니다. 이번 토론 주제는 '{topic}' 입니다.\n" + "토론 규칙 안내 문장입니다. " * 15
+
+
+def legacy_session(items, synopsis_source, synopsis_final):
+    # 세션마다 역직렬화된 사본과 새로 만들어진 문자열을 들고 있음
+    copies = json.loads(json.dumps(items, ensure_ascii=False))
+    return {
+        "search_results": copies,
+        "selected_book": copies[0],
+        "selected_synopsis_source": "".join(list(synopsis_source)),
+        "selected_synopsis_final": "".join(list(synopsis_final)),
+        "debate_chat": [{"role": "system", "content": fake_system_prompt(clean(items[0]["title"]))}]
+        + fake_debate_turns(),
+    }
+
+
+def compact_session(store, items):
+    book_ids = store.ingest_many(json.loads(json.dumps(items, ensure_ascii=False)))
+    return {
+        "search_results": book_ids,
+        "selected_book": book_ids[0],
+        "debate_chat": fake_debate_turns(),
+    }
+
+
+def measure(build, sessions):
+    """세션 목록을 만드는 동안 늘어난 메모리(바이트)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(sessions)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def run_benchmark(args):
+    from bench.fake_servers import _fake_book
+    from book_store import BookStore
+
+    queries = [f"수업 도서 {i}" for i in range(args.distinct_books)]
+    pages = {query: [_fake_book(query, i) for i in range(args.page_size)] for query in queries}
+    synopsis_source = "원본 줄거리 문장입니다. " * 80
+    synopsis_final = "초등학생용으로 쉽게 고친 줄거리 문장입니다. " * 30
+
+    def build_legacy(n):
+        return [legacy_session(pages[queries[i % len(queries)]], synopsis_source, synopsis_final)
+                for i in range(n)]
+
+    store = BookStore(clean=clean)
+
+    def build_compact(n):
+        sessions = [compact_session(store, pages[queries[i % len(queries)]]) for i in range(n)]
+        for query in queries:
+            book = store.get(store.ingest(pages[query][0]))
+            book.combined_synopsis = "".join(list(synopsis_source))
+            book.synopsis = "".join(list(synopsis_final))
+        return store, sessions
+
+    legacy = measure(build_legacy, args.sessions)
+    compact = measure(build_compact, args.sessions)
+    return {
+        "config": vars(args),
+        "legacy_bytes": legacy,
+        "compact_bytes": compact,
+        "legacy_per_session": legacy / args.sessions,
+        "compact_per_session": compact / args.sessions,
+        "books_in_store": len(store),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="세션 상태 구조별 세션당 메모리를 비교합니다.")
+    parser.add_argument("--sessions", type=int, default=300, help="시뮬레이션할 학생 세션 수")
+    parser.add_argument("--distinct-books", type=int, default=5, help="학생들이 검색하는 서로 다른 책 수")
+    parser.add_argument("--page-size", type=int, default=10, help="세션당 검색 결과 수")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args)
+    print(f"{args.sessions} sessions · {args.distinct_books} books · {result['books_in_store']} records in store")
+    print(f"legacy : {result['legacy_bytes'] / 2**20:8.2f} MB total, "
+          f"{result['legacy_per_session'] / 1024:8.1f} KB/session")
+    print(f"compact: {result['compact_bytes'] / 2**20:8.2f} MB total, "
+          f"{result['compact_per_session'] / 1024:8.1f} KB/session")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+        print(f"saved {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# === 실제 Streamlit 서버를 띄우고 브라우저 대신 웹소켓으로 조작하는 벤치 클라이언트 ===
+# AppTest는 스레드 안전하지 않고 항상 스크립트 전체를 실행하므로, 교실 부하 테스트와
+# 조각(st.fragment) 다시 실행 측정은 `streamlit run` 서버에 세션마다 웹소켓을 하나씩 열어 진행한다.
+# 브라우저처럼 위젯 값을 BackMsg(rerun_script)로 보내고, 조각 안의 위젯이면 조각 ID를 함께 보내
+# 서버가 그 조각만 다시 실행하게 한다. 받은 ForwardMsg의 delta로 화면 요소를 추적한다.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StreamlitServer:
+    """`streamlit run app.py`를 하위 프로세스로 실행 (env로 가짜 외부 서버 주소를 넘긴다)"""
+
+    def __init__(self, env, app_path=APP_PATH, startup_timeout=60):
+        self.port = free_port()
+        self.log = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", app_path,
+                "--server.address", "127.0.0.1",
+                "--server.port", str(self.port),
+                "--server.headless", "true",
+                "--global.developmentMode", "false",
+                "--server.fileWatcherType", "none",
+                "--browser.gatherUsageStats", "false",
+            ],
+            cwd=ROOT,
+            env=dict(os.environ, **env),
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+        self._wait_ready(startup_timeout)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def _wait_ready(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Streamlit 서버가 시작되지 못했습니다:\n{self.read_log()}")
+            try:
+                with urllib.request.urlopen(f"{self.url}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise TimeoutError("Streamlit 서버가 제한 시간 안에 준비되지 않았습니다.")
+
+    def read_log(self):
+        self.log.seek(0)
+        return self.log.read()
+
+    def cpu_time(self):
+        """서버 프로세스의 누적 CPU 시간(초, user+system). /proc가 없으면 None"""
+        try:
+            with open(f"/proc/{self.process.pid}/stat", encoding="ascii") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def peak_rss_mb(self):
+        """서버 프로세스의 최대 RSS(MB). /proc가 없으면 None"""
+        try:
+            with open(f"/proc/{self.process.pid}/status", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.log.close()
+
+
+class Element:
+    __slots__ = ("kind", "proto", "fragment_id", "run_id")
+
+    def __init__(self, kind, proto, fragment_id, run_id):
+        self.kind = kind
+        self.proto = proto
+        self.fragment_id = fragment_id
+        self.run_id = run_id
+
+    @property
+    def label(self):
+        for field in ("label", "placeholder"):
+            if hasattr(self.proto, field) and getattr(self.proto, field):
+                return getattr(self.proto, field)
+        return None
+
+
+class StreamlitSession:
+    """웹소켓 하나 = 브라우저 탭 하나. 위젯 조작 후 스크립트(또는 조각) 실행이 끝날 때까지 기다린다"""
+
+    def __init__(self, server, timeout=120):
+        from websockets.sync.client import connect
+
+        self.timeout = timeout
+        self.ws = connect(
+            f"ws://127.0.0.1:{server.port}/_stcore/stream",
+            origin=server.url,
+            max_size=None,
+            open_timeout=timeout,
+        )
+        self.elements = {}  # delta_path -> Element
+        self.values = {}  # widget_id -> (value_type, value) : 브라우저가 들고 있는 위젯 값
+        self.run_id = None
+        self.fragment_ids_this_run = []
+        self.last_fragment_run = False
+
+    def close(self):
+        self.ws.close()
+
+    # --- 화면 요소 조회 ---
+    def find(self, kind, label):
+        for element in self.elements.values():
+            if element.kind == kind and element.label == label:
+                return element
+        raise LookupError(f"위젯을 찾을 수 없습니다: {kind} {label!r}")
+
+    def all(self, kind):
+        return [element for element in self.elements.values() if element.kind == kind]
+
+    def value(self, kind, label):
+        """라디오/선택 상자의 현재 값 (보낸 값이 없거나 위젯 ID가 바뀌었으면 서버가 그린 기본값)"""
+        element = self.find(kind, label)
+        if element.proto.id in self.values:
+            return self.values[element.proto.id][1]
+        return element.proto.options[element.proto.default]
+
+    def texts(self):
+        return [element.proto.body for element in self.elements.values() if element.kind == "markdown"]
+
+    # --- 위젯 조작 (브라우저와 같은 방식으로 값을 보내고 다시 실행) ---
+    def run(self):
+        """첫 화면 (브라우저가 페이지를 열 때처럼 전체 실행 요청)"""
+        return self._rerun()
+
+    # fragment=False면 조각 안의 위젯이라도 조각 ID 없이 보내 스크립트 전체를 다시 실행한다 (비교 측정용)
+    def set_value(self, kind, label, value, fragment=True):
+        """선택 상자/라디오/텍스트 입력 값을 바꾸고 다시 실행 (폼 안 위젯은 값만 저장)"""
+        element = self.find(kind, label)
+        self.values[element.proto.id] = ("string_value", value)
+        if element.proto.form_id:
+            return None
+        return self._rerun(fragment_id=element.fragment_id if fragment else "")
+
+    def click(self, label, fragment=True):
+        element = self.find("button", label)
+        return self._rerun(
+            fragment_id=element.fragment_id if fragment else "",
+            trigger=(element.proto.id, "trigger_value", True),
+        )
+
+    def chat(self, text, fragment=True):
+        from streamlit.proto.Common_pb2 import ChatInputValue
+
+        element = self.all("chat_input")[0]
+        return self._rerun(
+            fragment_id=element.fragment_id if fragment else "",
+            trigger=(element.proto.id, "chat_input_value", ChatInputValue(data=text)),
+        )
+
+    # --- 프로토콜 ---
+    def _rerun(self, fragment_id="", trigger=None):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.fragment_id = fragment_id or ""
+        active = {element.proto.id for element in self.elements.values() if getattr(element.proto, "id", "")}
+        states = [(widget_id, value_type, value) for widget_id, (value_type, value) in self.values.items()
+                  if widget_id in active]
+        if trigger:
+            states.append(trigger)
+        for widget_id, value_type, value in states:
+            state = WidgetState(id=widget_id)
+            if value_type == "chat_input_value":
+                state.chat_input_value.CopyFrom(value)
+            else:
+                setattr(state, value_type, value)
+            client_state.widget_states.widgets.append(state)
+        self.ws.send(msg.SerializeToString())
+        self._wait_finished()
+        return self
+
+    def _wait_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("스크립트 실행이 제한 시간 안에 끝나지 않았습니다.")
+            msg = ForwardMsg()
+            msg.ParseFromString(self.ws.recv(timeout=remaining))
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.run_id = msg.new_session.script_run_id
+                self.fragment_ids_this_run = list(msg.new_session.fragment_ids_this_run)
+            elif kind == "delta":
+                self._apply_delta(msg)
+            elif kind == "script_finished":
+                status = msg.script_finished
+                if status == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue  # st.rerun() 등으로 곧바로 다음 실행이 이어진다
+                self._clear_stale(status == ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("앱 스크립트 컴파일 오류")
+                exceptions = self.all("exception")
+                if exceptions:
+                    raise RuntimeError(exceptions[0].proto.message)
+                return
+
+    def _apply_delta(self, msg):
+        delta = msg.delta
+        path = tuple(msg.metadata.delta_path)
+        which = delta.WhichOneof("type")
+        if which == "new_element":
+            kind = delta.new_element.WhichOneof("type")
+            proto = getattr(delta.new_element, kind)
+        elif which == "add_block":
+            kind, proto = "block", delta.add_block
+        else:
+            return
+        self.elements[path] = Element(kind, proto, delta.fragment_id, self.run_id)
+
+    def _clear_stale(self, fragment_run):
+        """이번 실행에서 다시 그려지지 않은 요소 제거 (조각 실행이면 그 조각의 요소만)"""
+        self.last_fragment_run = fragment_run
+        for path, element in list(self.elements.items()):
+            if element.run_id == self.run_id:
+                continue
+            if not fragment_run or element.fragment_id in self.fragment_ids_this_run:
+                del self.elements[path]
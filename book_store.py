@@ -0,0 +1,130 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+# === 프로세스 공용 도서 저장소 ===
+# 네이버 API 검색 결과를 책마다 하나의 작은 레코드로 저장하고 모든 세션이 공유한다.
+# 세션 상태에는 책 ID(ISBN)만 보관하므로 같은 책을 수십 명이 검색/선택해도 사본이 생기지 않고,
+# HTML 태그 제거 같은 정리 작업은 저장할 때 한 번만 한다.
+
+
+def get_isbn(book_data):
+    """네이버 API item의 isbn 필드("ISBN10 ISBN13")에서 ISBN 추출 (13자리 우선)"""
+    isbns = (book_data.get("isbn") or "").split()
+    for isbn in isbns:
+        if len(isbn) == 13:
+            return isbn
+    return isbns[-1] if isbns else ""
+
+
+class BookRecord:
+    """정리된 도서 정보 하나 (책마다 프로세스에 1개)
+
+    combined_synopsis(원본 줄거리)와 synopsis(초등학생용 재작성 줄거리)는
+    책을 처음 선택한 세션이 채우고 이후 세션은 그대로 재사용한다.
+    """
+
+    __slots__ = (
+        "book_id", "isbn", "title", "author", "publisher", "description", "link",
+        "combined_synopsis", "synopsis",
+    )
+
+    def __init__(self, book_id, isbn, title, author, publisher, description, link):
+        self.book_id = book_id
+        self.isbn = isbn
+        self.title = title
+        self.author = author
+        self.publisher = publisher
+        self.description = description
+        self.link = link
+        self.combined_synopsis = None
+        self.synopsis = None
+
+    @property
+    def label(self):
+        """검색 결과 목록에 표시할 문자열"""
+        return f"{self.title} | {self.author} | {self.publisher}"
+
+    def to_item(self):
+        """네이버 API item 형식의 dict (읽기 자료 팩 저장용)"""
+        return {
+            "title": self.title,
+            "author": self.author,
+            "publisher": self.publisher,
+            "description": self.description,
+            "link": self.link,
+            "isbn": self.isbn,
+        }
+
+
+def book_id_for(item, clean=str):
+    """API item의 책 ID (ISBN이 없으면 제목+저자+출판사 해시)"""
+    isbn = get_isbn(item)
+    if isbn:
+        return isbn
+    source = "|".join(clean(item.get(field) or "") for field in ("title", "author", "publisher"))
+    return "noisbn:" + hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+
+class BookStore:
+    """책 ID -> BookRecord LRU 저장소
+
+    - maxsize: 보관할 최대 도서 수 (넘으면 가장 오래 조회되지 않은 책부터 제거)
+    - clean: 저장할 때 텍스트 필드에 한 번 적용할 정리 함수 (HTML 태그 제거 등)
+    """
+
+    def __init__(self, maxsize=5000, clean=str):
+        self.maxsize = maxsize
+        self.clean = clean
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _text(self, item, field, default):
+        # 작가/출판사처럼 여러 책이 공유하는 짧은 문자열은 intern해서 한 번만 보관
+        value = self.clean(item.get(field) or "") or default
+        return sys.intern(value) if len(value) <= 64 else value
+
+    def ingest(self, item):
+        """API item을 저장하고 책 ID 반환 (이미 있는 책이면 기존 레코드를 그대로 사용)"""
+        book_id = book_id_for(item, self.clean)
+        with self._lock:
+            if book_id in self._records:
+                self._records.move_to_end(book_id)
+                return book_id
+        record = BookRecord(
+            book_id,
+            get_isbn(item),
+            self._text(item, "title", "제목 없음"),
+            self._text(item, "author", "저자 정보 없음"),
+            self._text(item, "publisher", "출판사 정보 없음"),
+            self._text(item, "description", ""),
+            item.get("link") or "",
+        )
+        with self._lock:
+            # 동시에 같은 책이 들어온 경우 먼저 저장된 레코드를 유지
+            self._records.setdefault(book_id, record)
+            self._records.move_to_end(book_id)
+            while len(self._records) > self.maxsize:
+                self._records.popitem(last=False)
+        return book_id
+
+    def ingest_many(self, items):
+        """여러 item을 저장하고 중복을 뺀 책 ID 목록을 원래 순서대로 반환"""
+        return list(dict.fromkeys(self.ingest(item) for item in items))
+
+    def get(self, book_id):
+        """BookRecord 반환 (없거나 제거됐으면 None)"""
+        with self._lock:
+            record = self._records.get(book_id)
+            if record is not None:
+                self._records.move_to_end(book_id)
+            return record
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
+
+    def stats(self):
+        with self._lock:
+            return {"books": len(self._records), "maxsize": self.maxsize}
@@ -0,0 +1,238 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# === 프로세스 공용 캐시 ===
+# Streamlit 세션 사이에서 공유되는 TTL + LRU 캐시.
+# 메모리 캐시를 기본으로 쓰고, persist_path를 주면 SQLite 파일에도 저장해서
+# Streamlit을 재시작해도 캐시가 유지되도록 한다.
+
+
+class SQLiteStore:
+    """SQLite 파일에 캐시 항목을 JSON으로 저장하는 디스크 백엔드"""
+
+    def __init__(self, path, table="cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """(값, 만료 시각) 반환, 없으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, time.time()),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def evict(self, maxsize):
+        """만료된 항목을 지우고, 최근에 사용되지 않은 항목부터 maxsize까지 줄임"""
+        with self._lock:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            )
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key NOT IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT ?)",
+                (maxsize,),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class TTLCache:
+    """스레드 안전한 TTL + LRU 캐시 (선택적으로 SQLite에 영구 저장)
+
+    - ttl: 항목 유효 시간(초). None이면 만료되지 않음
+    - maxsize: 메모리/디스크에 보관할 최대 항목 수 (초과 시 LRU 방식으로 제거)
+    - persist_path: 지정하면 SQLiteStore를 2차 저장소로 사용
+    값은 디스크 저장을 위해 JSON으로 직렬화 가능해야 한다.
+    """
+
+    def __init__(self, maxsize=256, ttl=600, persist_path=None, table="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._store = SQLiteStore(persist_path, table) if persist_path else None
+        self.hits = 0
+        self.misses = 0
+
+    def _expires_at(self):
+        return time.time() + self.ttl if self.ttl is not None else None
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+        # 메모리에 없으면 디스크 저장소 확인
+        if self._store is not None:
+            stored = self._store.get(key)
+            if stored is not None:
+                value, expires_at = stored
+                if expires_at is None or expires_at > now:
+                    with self._lock:
+                        self._put(key, value, expires_at)
+                        self.hits += 1
+                    return value
+                self._store.delete(key)
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def _put(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def set(self, key, value):
+        expires_at = self._expires_at()
+        with self._lock:
+            self._put(key, value, expires_at)
+        if self._store is not None:
+            self._store.set(key, value, expires_at)
+            self._store.evict(self.maxsize)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        if self._store is not None:
+            self._store.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+        if self._store is not None:
+            self._store.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """히트/미스 카운터와 현재 크기"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "persistent": self._store is not None,
+            }
+
+
+class _Call:
+    """SingleFlight에서 진행 중인 하나의 호출"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.started = threading.Event()  # leader가 대기열을 지나 실제 작업을 시작함 (선택 사항)
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        if not self.event.wait(timeout):
+            raise TimeoutError("진행 중인 요청을 기다리다 시간이 초과되었습니다.")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청을 하나의 실제 호출로 합침
+
+    먼저 들어온 요청(leader)만 fn을 실행하고, 나머지는 그 결과를 기다렸다가 함께 받는다.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def begin(self, key):
+        """(call, is_leader) 반환. leader는 작업 후 반드시 finish()를 호출해야 함"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    def do(self, key, fn, *args, **kwargs):
+        call, is_leader = self.begin(key)
+        if not is_leader:
+            return call.wait()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,62 @@
+from tokens import count_message_tokens
+
+# === 토론 대화 컨텍스트 관리 ===
+# 6라운드 토론에서 매 턴마다 전체 대화 이력을 보내면 프롬프트가 계속 길어진다.
+# 시스템 프롬프트와 최근 턴은 그대로 두고, 오래된 턴은 누적 요약 하나로 바꿔서
+# 프롬프트를 토큰 예산 안으로 유지한다.
+
+
+class DebateContext:
+    """토큰 예산 안에서 토론 프롬프트를 구성하는 컨텍스트 관리자
+
+    - budget: 프롬프트 최대 토큰 수
+    - keep_recent: 요약하지 않고 그대로 보낼 최근 턴 수
+    - summarize: (이전 요약, 새로 요약할 턴 목록) -> 새 요약 텍스트를 반환하는 함수
+    요약은 인스턴스에 누적 보관되므로 세션마다 하나씩 만들어 재사용한다.
+    """
+
+    def __init__(self, budget=2000, keep_recent=4, summarize=None):
+        self.budget = budget
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.summary = ""
+        self.summarized_count = 0  # 요약에 반영된 (system 제외) 턴 수
+        self.prompt_tokens = []  # [(라벨, 토큰 수), ...] 라운드별 기록
+
+    def _assemble(self, system_messages, turns, extra):
+        messages = list(system_messages)
+        if self.summary:
+            messages.append({"role": "system", "content": f"지금까지의 토론 요약:\n{self.summary}"})
+        messages.extend(turns[self.summarized_count:])
+        messages.extend(extra)
+        return messages
+
+    def build(self, chat_history, extra=(), label=None):
+        """예산에 맞춘 메시지 목록 반환
+
+        extra는 이번 요청에만 덧붙일 메시지(라운드 지시 등). label을 주면 토큰 수를 기록한다.
+        """
+        system_messages = [m for m in chat_history if m["role"] == "system"]
+        turns = [m for m in chat_history if m["role"] != "system"]
+        extra = list(extra)
+        if self.summarized_count > len(turns):
+            # 대화가 초기화된 경우
+            self.summary = ""
+            self.summarized_count = 0
+
+        messages = self._assemble(system_messages, turns, extra)
+        tokens = count_message_tokens(messages)
+        keep = self.keep_recent
+        # 예산을 넘으면 오래된 턴부터 요약으로 접고, 그래도 넘으면 최근 턴도 마지막 1개까지 접는다
+        while tokens > self.budget and self.summarize is not None and keep >= 1:
+            fold_upto = len(turns) - keep
+            if fold_upto > self.summarized_count:
+                self.summary = self.summarize(self.summary, turns[self.summarized_count:fold_upto])
+                self.summarized_count = fold_upto
+                messages = self._assemble(system_messages, turns, extra)
+                tokens = count_message_tokens(messages)
+            keep -= 1
+
+        if label is not None:
+            self.prompt_tokens.append((label, tokens))
+        return messages
@@ -0,0 +1,126 @@
+import csv
+import hashlib
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# === 학급 감상문 일괄 피드백 ===
+# 교사가 올린 CSV/ZIP 파일에서 학생별 감상문을 읽고, 정해진 동시 실행 수 안에서 피드백을 생성한다.
+# 감상문별 결과는 (책, 감상문 내용) 해시를 키로 공용 저장소에 저장하므로
+# 새로고침으로 중단된 뒤 같은 파일을 다시 올리면 끝난 감상문은 건너뛰고 이어서 진행한다.
+#
+# CSV: student(또는 name, 이름, 학생) 열과 essay(또는 text, 감상문) 열
+# ZIP: 학생별 .txt 파일 (파일 이름이 학생 이름)
+
+MAX_ESSAYS = 200
+STUDENT_COLUMNS = ("student", "name", "이름", "학생")
+ESSAY_COLUMNS = ("essay", "text", "감상문")
+TEXT_EXTENSIONS = (".txt", ".md")
+
+
+def decode_text(data):
+    """업로드된 텍스트 디코딩 (UTF-8, 안 되면 엑셀 기본 인코딩인 CP949)"""
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("파일 인코딩을 알 수 없습니다. UTF-8로 저장해 주세요.")
+
+
+def _pick_column(fieldnames, candidates):
+    lowered = {name.strip().casefold(): name for name in fieldnames or []}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    return None
+
+
+def parse_csv(data):
+    reader = csv.DictReader(io.StringIO(decode_text(data)))
+    student_col = _pick_column(reader.fieldnames, STUDENT_COLUMNS)
+    essay_col = _pick_column(reader.fieldnames, ESSAY_COLUMNS)
+    if essay_col is None:
+        raise ValueError("CSV에 감상문 열(essay 또는 감상문)이 없습니다.")
+    essays = []
+    for number, row in enumerate(reader, start=1):
+        text = (row.get(essay_col) or "").strip()
+        if text:
+            student = (row.get(student_col) or "").strip() if student_col else ""
+            essays.append({"student": student or f"{number}번", "text": text})
+    return essays
+
+
+def parse_zip(data):
+    essays = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in sorted(archive.infolist(), key=lambda info: info.filename):
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(TEXT_EXTENSIONS):
+                continue
+            text = decode_text(archive.read(info)).strip()
+            if text:
+                essays.append({"student": os.path.splitext(os.path.basename(name))[0], "text": text})
+    return essays
+
+
+def parse_essays(filename, data):
+    """업로드 파일에서 [{"student", "text"}, ...] 목록 추출 (형식이 잘못되면 ValueError)"""
+    lower = filename.lower()
+    if lower.endswith(".csv"):
+        essays = parse_csv(data)
+    elif lower.endswith(".zip"):
+        try:
+            essays = parse_zip(data)
+        except zipfile.BadZipFile:
+            raise ValueError("ZIP 파일을 열 수 없습니다.")
+    else:
+        raise ValueError("CSV 또는 ZIP 파일만 올릴 수 있습니다.")
+    if not essays:
+        raise ValueError("파일에서 감상문을 찾지 못했습니다.")
+    if len(essays) > MAX_ESSAYS:
+        raise ValueError(f"한 번에 최대 {MAX_ESSAYS}편까지 처리할 수 있습니다.")
+    return essays
+
+
+def essay_key(book_title, book_synopsis, text):
+    """감상문 피드백 결과 저장 키 (같은 책, 같은 감상문이면 같은 키)"""
+    source = f"{book_title}\n{book_synopsis}\n{text}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def run_batch(essays, process, max_workers=4, initializer=None):
+    """감상문마다 process(essay)를 최대 max_workers개씩 동시에 실행하고 끝나는 순서대로 yield
+
+    (essay, 결과, 예외) 튜플을 반환하며, 실패한 감상문은 결과가 None이고 예외가 채워진다.
+    화면 갱신으로 중간에 멈춰도 이미 제출한 감상문은 백그라운드에서 끝까지 처리된다.
+    """
+    if not essays:
+        return
+    pool = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="essay-batch", initializer=initializer
+    )
+    try:
+        futures = {pool.submit(process, essay): essay for essay in essays}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], (None if error else future.result()), error
+    finally:
+        pool.shutdown(wait=False)
+
+
+def build_report_csv(essays, results):
+    """학생, 감상문, 피드백 열을 가진 보고서 CSV (엑셀에서 바로 열리도록 BOM 포함)"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["학생", "감상문", "피드백"])
+    for essay in essays:
+        writer.writerow([essay["student"], essay["text"], results.get(essay["key"], "")])
+    return output.getvalue().encode("utf-8-sig")
+
+
+def report_filename(book_title):
+    """보고서 파일 이름 (파일 이름에 쓸 수 없는 문자는 _로 바꿈)"""
+    return "감상문_피드백_" + re.sub(r'[\\/:*?"<>|]', "_", book_title) + ".csv"
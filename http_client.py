@@ -0,0 +1,111 @@
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tracing import get_tracer
+
+# === 공용 HTTP 클라이언트 ===
+# 네이버 API/네이버 책 페이지 요청이 모두 이 클라이언트를 거친다.
+# keep-alive 커넥션 풀, 연결/읽기 타임아웃, 백오프 재시도를 한 곳에서 관리하고
+# host_overrides로 요청 대상을 로컬 테스트 서버로 바꿀 수 있다.
+
+DEFAULT_USER_AGENT = "Mozilla/5.0"
+
+
+class HttpClient:
+    """커넥션 풀 + 타임아웃 + 재시도가 적용된 requests.Session 래퍼
+
+    - pool_connections: 캐시할 호스트별 커넥션 풀 개수
+    - pool_maxsize: 호스트당 최대 동시 커넥션 수 (pool_block=True면 초과 요청은 대기)
+    - connect_timeout / read_timeout: 초 단위 타임아웃
+    - retries / backoff_factor: 연결 오류, 429/5xx 응답에 대한 재시도 횟수와 백오프
+    - host_overrides: {"openapi.naver.com": "http://127.0.0.1:8001"} 형태로
+      특정 호스트 요청을 다른 주소로 보냄 (테스트/벤치마크용)
+    """
+
+    def __init__(
+        self,
+        pool_connections=4,
+        pool_maxsize=16,
+        pool_block=True,
+        connect_timeout=3.05,
+        read_timeout=10.0,
+        retries=2,
+        backoff_factor=0.3,
+        host_overrides=None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.host_overrides = dict(host_overrides or {})
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = DEFAULT_USER_AGENT
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def resolve(self, url):
+        """host_overrides에 등록된 호스트면 대상 주소를 바꿔서 반환"""
+        parts = urlsplit(url)
+        override = self.host_overrides.get(parts.netloc)
+        if not override:
+            return url
+        target = urlsplit(override)
+        return urlunsplit((target.scheme, target.netloc, target.path.rstrip("/") + parts.path,
+                           parts.query, parts.fragment))
+
+    def get(self, url, call_site="http", **kwargs):
+        """GET 요청 (call_site 이름으로 소요 시간/상태/재시도/바이트 수를 기록)"""
+        kwargs.setdefault("timeout", self.timeout)
+        with get_tracer().span(call_site, host=urlsplit(url).netloc) as span:
+            response = self.session.get(self.resolve(url), **kwargs)
+            retries = getattr(response.raw, "retries", None)
+            span["http_status"] = response.status_code
+            span["retries"] = len(retries.history) if retries is not None else 0
+            span["bytes"] = len(response.content)
+            if response.status_code >= 400:
+                span["status"] = "error"
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """프로세스 기본 HttpClient 반환 (없으면 기본 설정으로 생성)"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def set_client(client):
+    """프로세스 기본 HttpClient 교체 (테스트/벤치마크에서 로컬 서버를 가리킬 때 사용)"""
+    global _default_client
+    with _default_lock:
+        previous = _default_client
+        _default_client = client
+    if previous is not None and previous is not client:
+        previous.close()
@@ -0,0 +1,67 @@
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+# === 백그라운드 작업 실행기 ===
+# 세션마다 하나씩 만들어 session_state에 보관하는 작은 스레드 풀.
+# 책이 선택되자마자 퀴즈/토론 주제 생성을 미리 시작해 두고,
+# 각 페이지에서는 이름으로 Future를 찾아 결과를 가져간다.
+
+
+class JobExecutor:
+    """이름으로 관리되는 bounded 스레드 풀
+
+    - max_workers: 세션당 동시에 실행할 작업 수
+    - initializer: 워커 스레드 시작 시 실행할 함수 (Streamlit 스크립트 컨텍스트 연결 등)
+    실행기가 더 이상 참조되지 않으면(세션 종료) 스레드 풀도 함께 종료된다.
+    """
+
+    def __init__(self, max_workers=2, initializer=None):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="reading-job",
+            initializer=initializer,
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+        weakref.finalize(self, self._pool.shutdown, wait=False, cancel_futures=True)
+
+    def submit(self, name, fn, *args, **kwargs):
+        """작업 제출. 같은 이름의 이전 작업은 아직 시작 전이면 취소"""
+        future = self._pool.submit(fn, *args, **kwargs)
+        with self._lock:
+            previous = self._jobs.get(name)
+            self._jobs[name] = future
+        if previous is not None:
+            previous.cancel()
+        return future
+
+    def get(self, name):
+        with self._lock:
+            return self._jobs.get(name)
+
+    def pop(self, name):
+        with self._lock:
+            return self._jobs.pop(name, None)
+
+    def status(self, name):
+        """'running', 'done', 'failed', 'cancelled' 또는 작업이 없으면 None"""
+        future = self.get(name)
+        if future is None:
+            return None
+        if future.cancelled():
+            return "cancelled"
+        if not future.done():
+            return "running"
+        return "failed" if future.exception() is not None else "done"
+
+    def cancel_all(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for future in jobs:
+            future.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import threading
+import time
+
+from cache import SingleFlight, TTLCache
+from scheduler import CANCEL_POLL_INTERVAL, INTERACTIVE, AcquireCancelled
+from tokens import count_message_tokens
+from tracing import get_tracer
+
+# === OpenAI 클라이언트 래퍼 ===
+# 모든 ChatGPT 호출이 이 래퍼를 거친다.
+# (모델, 메시지, 샘플링 파라미터)를 해시한 키로
+# - 동시에 들어온 동일 요청은 하나의 실제 호출로 합치고 (single-flight)
+# - 호출 지점에서 cache=True로 허용한 경우 응답을 크기 제한 캐시에 보관한다.
+# 실제로 보내는 호출은 스케줄러에서 차례를 받은 뒤에 보낸다.
+
+DEFAULT_MODEL = "gpt-4o"
+
+
+class LLMError(Exception):
+    """LLM 호출 실패 (호출 지점은 "Error: ..." 문자열 대신 이 예외를 처리한다)"""
+
+
+class LLMTimeoutError(LLMError):
+    """제한 시간 안에 어느 모델에서도 응답을 받지 못함"""
+
+
+def request_key(model, messages, params):
+    """요청 내용을 정규화한 JSON의 SHA-256 해시"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _request_options(timeout):
+    return {"timeout": timeout} if timeout is not None else {}
+
+
+class LLMClient:
+    """요청 병합 + 응답 캐시가 적용된 OpenAI chat completions 래퍼
+
+    - client: openai.OpenAI 인스턴스
+    - cache_maxsize / cache_ttl: 응답 캐시 크기와 유효 시간(초)
+    - persist_path: 지정하면 응답 캐시를 SQLite 파일에도 저장
+    - scheduler: 지정하면 실제 호출 전에 scheduler.LLMScheduler에서 차례를 받음
+    """
+
+    def __init__(self, client, cache_maxsize=1024, cache_ttl=24 * 3600, persist_path=None,
+                 scheduler=None):
+        self.client = client
+        self.scheduler = scheduler
+        self.cache = TTLCache(
+            maxsize=cache_maxsize, ttl=cache_ttl, persist_path=persist_path, table="llm_cache"
+        )
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+
+    def _count_upstream(self):
+        with self._lock:
+            self.upstream_calls += 1
+
+    def _wait_turn(self, call, messages, params, priority, session_id, cancelled=None, on_turn=None):
+        """스케줄러가 있으면 차례가 올 때까지 기다리고 기다린 시간(초)을 반환
+
+        cancelled가 설정되면 대기열에서 빠져 AcquireCancelled를 던지고,
+        차례를 받으면 이 요청을 기다리는 쪽(on_turn, 병합된 요청)에 알린다.
+        """
+        waited = 0.0
+        if self.scheduler is not None:
+            tokens = count_message_tokens(messages) + params.get("max_tokens", 0)
+            waited = self.scheduler.acquire(priority, session_id, tokens, cancelled=cancelled)
+        call.started.set()
+        if on_turn is not None:
+            on_turn()
+        return waited
+
+    def _follow(self, call, cancelled=None, on_turn=None):
+        """같은 요청을 먼저 보낸 쪽의 결과를 기다림 (그 요청이 차례를 받으면 on_turn 호출)"""
+        if on_turn is not None:
+            while not call.started.wait(CANCEL_POLL_INTERVAL) and not call.event.is_set():
+                if cancelled is not None and cancelled.is_set():
+                    raise AcquireCancelled("LLM 요청이 차례를 받기 전에 취소되었습니다.")
+            on_turn()
+        return call.wait()
+
+    def _record_cache_hit(self, call_site, model):
+        get_tracer().record({"call_site": call_site, "model": model, "cache_hit": True, "duration": 0.0})
+
+    def _cached(self, key, cache_if):
+        cached = self.cache.get(key)
+        if cached is not None and cache_if is not None and not cache_if(cached):
+            return None
+        return cached
+
+    def complete(self, messages, model=DEFAULT_MODEL, cache=False, call_site="llm",
+                 priority=INTERACTIVE, session_id=None, timeout=None,
+                 cancelled=None, on_turn=None, cache_if=None, **params):
+        """응답 전체 텍스트 반환. cache=True인 호출 지점만 캐시를 읽고 쓴다
+
+        priority / session_id / cancelled / on_turn은 스케줄링에만(_wait_turn 참고), timeout은 이 요청의
+        HTTP 제한 시간(초)에만 쓰이고 요청 키에는 포함되지 않는다.
+        cache_if를 주면 이 함수가 참을 돌려준 응답만 캐시에 넣고 캐시에서 꺼내 쓴다
+        (형식이 잘못된 응답이 캐시에 남아 다시 시도할 때마다 재사용되지 않도록).
+        """
+        key = request_key(model, messages, params)
+        if cache:
+            cached = self._cached(key, cache_if)
+            if cached is not None:
+                self._record_cache_hit(call_site, model)
+                return cached
+
+        while True:
+            call, is_leader = self.flight.begin(key)
+            if is_leader:
+                break
+            try:
+                with get_tracer().span(call_site, model=model, coalesced=True):
+                    return self._follow(call, cancelled, on_turn)
+            except AcquireCancelled:
+                if cancelled is not None and cancelled.is_set():
+                    raise
+                # 먼저 보낸 같은 요청이 차례를 받기 전에 취소됨: 이 요청이 직접 보냄
+
+        try:
+            waited = self._wait_turn(call, messages, params, priority, session_id, cancelled, on_turn)
+            self._count_upstream()
+            with get_tracer().span(call_site, model=model, stream=False, queue_wait=waited) as span:
+                raw = self.client.chat.completions.with_raw_response.create(
+                    model=model, messages=messages, **_request_options(timeout), **params
+                )
+                response = raw.parse()
+                span["retries"] = getattr(raw, "retries_taken", 0)
+                span["bytes"] = len(raw.http_response.content)
+                if response.usage is not None:
+                    span["prompt_tokens"] = response.usage.prompt_tokens
+                    span["completion_tokens"] = response.usage.completion_tokens
+            text = response.choices[0].message.content.strip()
+        except BaseException as e:
+            self.flight.finish(key, call, error=e)
+            raise
+        if cache and (cache_if is None or cache_if(text)):
+            self.cache.set(key, text)
+        self.flight.finish(key, call, result=text)
+        return text
+
+    def stream(self, messages, model=DEFAULT_MODEL, cache=False, call_site="llm",
+               priority=INTERACTIVE, session_id=None, timeout=None,
+               cancelled=None, on_turn=None, cache_if=None, **params):
+        """응답을 텍스트 조각 단위로 yield
+
+        캐시 히트이거나 같은 요청이 이미 진행 중이면 완성된 텍스트를 한 번에 yield한다.
+        cache_if는 complete와 같다.
+        """
+        key = request_key(model, messages, params)
+        if cache:
+            cached = self._cached(key, cache_if)
+            if cached is not None:
+                self._record_cache_hit(call_site, model)
+                yield cached
+                return
+
+        while True:
+            call, is_leader = self.flight.begin(key)
+            if is_leader:
+                break
+            try:
+                with get_tracer().span(call_site, model=model, coalesced=True):
+                    text = self._follow(call, cancelled, on_turn)
+            except AcquireCancelled:
+                if cancelled is not None and cancelled.is_set():
+                    raise
+                continue  # 먼저 보낸 같은 요청이 차례를 받기 전에 취소됨: 이 요청이 직접 보냄
+            yield text
+            return
+
+        parts = []
+        try:
+            waited = self._wait_turn(call, messages, params, priority, session_id, cancelled, on_turn)
+            self._count_upstream()
+            with get_tracer().span(call_site, model=model, stream=True, queue_wait=waited) as span:
+                raw = self.client.chat.completions.with_raw_response.create(
+                    model=model, messages=messages, stream=True,
+                    stream_options={"include_usage": True}, **_request_options(timeout), **params
+                )
+                span["retries"] = getattr(raw, "retries_taken", 0)
+                start = time.perf_counter()
+                for chunk in raw.parse():
+                    if chunk.usage is not None:
+                        span["prompt_tokens"] = chunk.usage.prompt_tokens
+                        span["completion_tokens"] = chunk.usage.completion_tokens
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not parts:
+                            span["ttft"] = time.perf_counter() - start
+                        parts.append(chunk.choices[0].delta.content)
+                        yield parts[-1]
+                span["bytes"] = len("".join(parts).encode("utf-8"))
+        except BaseException as e:
+            # 화면 갱신 등으로 스트림이 중단되면 기다리던 요청에도 알림
+            error = RuntimeError("응답 스트림이 중단되었습니다.") if isinstance(e, GeneratorExit) else e
+            self.flight.finish(key, call, error=error)
+            raise
+        text = "".join(parts).strip()
+        if cache and (cache_if is None or cache_if(text)):
+            self.cache.set(key, text)
+        self.flight.finish(key, call, result=text)
+
+    def stats(self):
+        """응답 캐시 히트/미스, 병합된 요청 수, 실제 호출 수"""
+        stats = self.cache.stats()
+        stats.update({
+            "coalesced": self.flight.coalesced,
+            "in_flight": self.flight.in_flight(),
+            "upstream_calls": self.upstream_calls,
+        })
+        return stats
@@ -0,0 +1,259 @@
+import contextvars
+import queue
+import threading
+import time
+
+from llm import DEFAULT_MODEL, LLMError, LLMTimeoutError
+
+# === 마감 시간 기반 대체 모델 라우터 ===
+# 기본 모델(gpt-4o)이 느려지면 학생이 몇 분씩 스피너를 보게 되므로, 호출 지점마다 마감 시간을 둔다.
+# - 마감 시간(스트리밍은 첫 조각, 그 외는 전체 응답)까지 답이 없으면 더 빠른 대체 모델에도 같은 요청을
+#   보내고(hedged request), 먼저 도착한 쪽을 쓰고 다른 쪽은 취소한다.
+# - 기본 모델이 연속으로 실패/지연되면 차단기(circuit breaker)가 열려 한동안 대체 모델로 바로 보내고,
+#   대기 시간이 지나면 요청 하나만 기본 모델로 보내 회복 여부를 확인한다.
+# 마감 시간은 요청이 스케줄러에서 차례를 받은 때부터 잰다. 대기열에서 기다린 시간은 모델이 느린 것이
+# 아니므로 마감 시간 초과나 차단기 실패로 치지 않는다.
+# 취소는 아직 차례를 기다리는 요청이면 대기열에서 빼고, 스트리밍이면 다음 조각을 받는 즉시 연결을 닫고,
+# 비스트리밍이면 결과를 버린다 (이미 보낸 HTTP 요청은 중간에 끊을 수 없으므로 요청별 timeout으로
+# 늦어도 그 시간 안에 끝난다).
+
+
+class CircuitBreaker:
+    """기본 모델 상태 차단기
+
+    - failure_threshold: 연속 실패(에러 또는 마감 초과)가 이만큼 쌓이면 열림
+    - cooldown: 열린 뒤 이 시간(초)마다 요청 하나를 기본 모델로 보내 회복을 확인
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.opens = 0
+
+    def allow(self):
+        """이번 요청을 기본 모델로 보내도 되는지 (열려 있으면 대기 시간마다 1건만 허용)"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.cooldown:
+                self.opened_at = now  # 확인 요청이 끝날 때까지 다른 요청은 대체 모델로
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None:
+                self.opened_at = time.monotonic()
+            elif self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.opens += 1
+
+    @property
+    def state(self):
+        with self._lock:
+            return "closed" if self.opened_at is None else "open"
+
+
+class _Attempt:
+    """모델 하나로 보낸 요청 (스레드에서 실행하며 조각을 공용 큐로 전달)"""
+
+    def __init__(self, model, chunks_fn, events):
+        self.model = model
+        self.finished = False
+        self.started_at = None  # 스케줄러에서 차례를 받은 시각 (그 전에는 None)
+        self.cancelled = threading.Event()
+        self._events = events
+        # 호출 추적의 페이지 정보 등 컨텍스트 변수를 요청한 스레드에서 이어받음
+        context = contextvars.copy_context()
+        self.thread = threading.Thread(
+            target=context.run, args=(self._run, chunks_fn, events), name=f"llm-{model}", daemon=True
+        )
+
+    def on_turn(self):
+        """차례를 받음: 이때부터 마감 시간을 잼"""
+        self.started_at = time.monotonic()
+        self._events.put((self, "turn", None))
+
+    def _run(self, chunks_fn, events):
+        chunks = None
+        try:
+            if self.cancelled.is_set():
+                return  # 스레드가 시작되기 전에 다른 요청이 이김
+            chunks = chunks_fn(self)
+            for chunk in chunks:
+                if self.cancelled.is_set():
+                    break
+                events.put((self, "chunk", chunk))
+            events.put((self, "done", None))
+        except BaseException as e:
+            events.put((self, "error", e))
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()  # 취소된 스트림은 여기서 연결을 닫음
+
+
+def _as_llm_error(error):
+    if isinstance(error, LLMError):
+        return error
+    wrapped = LLMError(str(error) or type(error).__name__)
+    wrapped.__cause__ = error
+    return wrapped
+
+
+class ModelRouter:
+    """마감 시간, 대체 모델 hedging, 차단기를 적용한 LLMClient 호출
+
+    - llm: llm.LLMClient
+    - primary / fallback: 기본 모델과 대체 모델 (fallback이 None이면 hedging 없이 기본 모델만)
+    - timeout: 차례를 받은 뒤 첫 응답까지 기다리는 최대 시간(초). 각 HTTP 요청의 제한 시간으로도 쓰인다
+    """
+
+    def __init__(self, llm, primary=DEFAULT_MODEL, fallback="gpt-4o-mini", timeout=90.0, breaker=None):
+        self.llm = llm
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._counts = {
+            "calls": 0, "hedged": 0, "circuit_fallbacks": 0,
+            "primary_wins": 0, "fallback_wins": 0, "timeouts": 0, "errors": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _race(self, chunks_fn, deadline, call_site):
+        """기본 모델 요청을 보내고 마감 시간이 지나면 대체 모델에도 보내서 먼저 온 쪽의 조각을 yield"""
+        self._count("calls")
+        events = queue.Queue()
+        attempts = []
+
+        def launch(model):
+            attempt = _Attempt(model, chunks_fn, events)
+            attempts.append(attempt)
+            attempt.thread.start()
+            return attempt
+
+        primary = None
+        if self.fallback is None or self.breaker.allow():
+            primary = launch(self.primary)
+        else:
+            self._count("circuit_fallbacks")
+            launch(self.fallback)
+        hedged = primary is None
+        primary_judged = hedged  # 차단기에 기본 모델 결과를 반영했는지
+
+        def hedge():
+            nonlocal hedged
+            hedged = True
+            self._count("hedged")
+            launch(self.fallback)
+
+        def give_up_at():
+            # 차례를 받은 요청 중 가장 먼저 받은 것 기준 (모두 대기열에 있으면 None: 계속 기다림)
+            granted = [attempt.started_at for attempt in attempts if attempt.started_at is not None]
+            return min(granted) + self.timeout if granted else None
+
+        try:
+            winner = None
+            while winner is None:
+                wait_until = give_up_at()
+                if not hedged and self.fallback is not None and primary.started_at is not None:
+                    primary_deadline = primary.started_at + deadline
+                    wait_until = primary_deadline if wait_until is None else min(primary_deadline, wait_until)
+                timeout = None if wait_until is None else max(0.0, wait_until - time.monotonic())
+                try:
+                    attempt, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    limit = give_up_at()
+                    if not hedged and self.fallback is not None and time.monotonic() < limit:
+                        # 마감 시간 초과: 기본 모델은 계속 기다리면서 대체 모델에도 요청
+                        self.breaker.record_failure()
+                        primary_judged = True
+                        hedge()
+                        continue
+                    self._count("timeouts")
+                    raise LLMTimeoutError(f"{self.timeout:g}초 안에 응답을 받지 못했습니다. ({call_site})")
+                if kind == "turn":
+                    continue  # 마감 시간을 다시 계산
+                if kind == "error":
+                    attempt.finished = True
+                    if attempt is primary and not primary_judged:
+                        self.breaker.record_failure()
+                        primary_judged = True
+                    if not hedged and self.fallback is not None:
+                        hedge()
+                    elif not any(not other.finished for other in attempts):
+                        self._count("errors")
+                        raise _as_llm_error(value)
+                    continue
+                winner = attempt
+
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancelled.set()
+            if winner is primary and not primary_judged:
+                self.breaker.record_success()
+            self._count("primary_wins" if winner is primary else "fallback_wins")
+
+            while kind != "done":
+                if kind == "chunk":
+                    yield value
+                try:
+                    attempt, kind, value = events.get(timeout=self.timeout)
+                except queue.Empty:
+                    self._count("timeouts")
+                    raise LLMTimeoutError(f"응답이 {self.timeout:g}초 동안 멈췄습니다. ({call_site})")
+                if attempt is not winner or kind == "turn":
+                    kind = None  # 취소된 요청의 남은 조각은 버림
+                elif kind == "error":
+                    self._count("errors")
+                    raise _as_llm_error(value)
+        finally:
+            for attempt in attempts:
+                attempt.cancelled.set()
+
+    def complete(self, messages, deadline, call_site="llm", **kwargs):
+        """응답 전체 텍스트 (실패하면 LLMError)"""
+        def chunks_fn(attempt):
+            return iter([self.llm.complete(
+                messages, model=attempt.model, call_site=call_site, timeout=self.timeout,
+                cancelled=attempt.cancelled, on_turn=attempt.on_turn, **kwargs
+            )])
+
+        return "".join(self._race(chunks_fn, deadline, call_site))
+
+    def stream(self, messages, deadline, call_site="llm", **kwargs):
+        """응답 조각 제너레이터 (실패하면 순회 중에 LLMError)"""
+        def chunks_fn(attempt):
+            return self.llm.stream(
+                messages, model=attempt.model, call_site=call_site, timeout=self.timeout,
+                cancelled=attempt.cancelled, on_turn=attempt.on_turn, **kwargs
+            )
+
+        return self._race(chunks_fn, deadline, call_site)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+        stats.update(
+            primary=self.primary,
+            fallback=self.fallback,
+            breaker=self.breaker.state,
+            breaker_failures=self.breaker.failures,
+            breaker_opens=self.breaker.opens,
+        )
+        return stats
@@ -0,0 +1,99 @@
+import functools
+from importlib.util import find_spec
+from urllib.parse import urljoin, urlsplit
+
+# lxml이 없으면 내장 파서 사용 (설치 여부만 확인하고 실제 import는 파싱할 때)
+HTML_PARSER = "lxml" if find_spec("lxml") is not None else "html.parser"
+
+# === 네이버 책 상세 페이지 크롤러 ===
+# 네이버 API 검색 결과 item에는 이미 상세 페이지 링크(link)와 ISBN이 들어 있으므로
+# 가능하면 검색 페이지를 거치지 않고 상세 페이지만 요청한다.
+# 문서 전체를 파싱하지 않고 SoupStrainer로 필요한 영역(책 소개, 검색 결과 목록)만 파싱하며,
+# 상세 페이지 원본 HTML은 ISBN별로 캐시한다.
+# bs4는 앱 시작 시간을 늘리지 않도록 처음 파싱할 때 import한다.
+
+BOOK_HOST = "book.naver.com"
+SEARCH_URL = "https://book.naver.com/search/search.nhn"
+
+
+@functools.lru_cache(maxsize=None)
+def _strainer(name, class_):
+    from bs4 import SoupStrainer
+
+    return SoupStrainer(name, class_=class_)
+
+
+def _parse(html, name, class_):
+    """html에서 name.class_ 요소만 파싱한 BeautifulSoup"""
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, HTML_PARSER, parse_only=_strainer(name, class_))
+
+
+def detail_url(link):
+    """API item의 link가 네이버 책 상세 페이지면 그 주소를 반환 (아니면 None)"""
+    if link and urlsplit(link).netloc == BOOK_HOST:
+        return link
+    return None
+
+
+def parse_intro(html):
+    """상세 페이지 HTML에서 책 소개(book_intro) 텍스트만 추출"""
+    soup = _parse(html, "div", "book_intro")
+    intro = soup.find("div", class_="book_intro")
+    if intro is None:
+        return None
+    return intro.get_text(separator="\n").strip() or None
+
+
+def parse_first_result(html):
+    """검색 페이지 HTML에서 첫번째 결과의 상세 페이지 주소 추출"""
+    soup = _parse(html, "ul", "list_type1")
+    first_link = soup.select_one("ul.list_type1 li a")
+    if first_link is None or not first_link.get("href"):
+        return None
+    return urljoin(f"https://{BOOK_HOST}/", first_link["href"])
+
+
+class NaverBookCrawler:
+    """네이버 책 상세 페이지에서 책 소개를 가져오는 크롤러
+
+    - http: http_client.HttpClient
+    - html_cache: ISBN -> 상세 페이지 원본 HTML을 보관할 cache.TTLCache (None이면 캐시하지 않음)
+    """
+
+    def __init__(self, http, html_cache=None):
+        self.http = http
+        self.html_cache = html_cache
+
+    def find_detail_url(self, query):
+        """검색 페이지를 거쳐 상세 페이지 주소 찾기 (API item에 링크가 없을 때만 사용)"""
+        response = self.http.get(SEARCH_URL, call_site="naver_crawl_search", params={"query": query})
+        response.raise_for_status()
+        return parse_first_result(response.text)
+
+    def fetch_detail_html(self, book_title, link=None, isbn=""):
+        """상세 페이지 원본 HTML (ISBN이 있으면 캐시를 먼저 확인)"""
+        if isbn and self.html_cache is not None:
+            cached = self.html_cache.get(isbn)
+            if cached is not None:
+                return cached
+        url = detail_url(link)
+        if url is None:
+            # ISBN으로 검색하면 제목보다 정확히 한 권으로 좁혀진다
+            url = self.find_detail_url(isbn or book_title)
+            if url is None:
+                return None
+        response = self.http.get(url, call_site="naver_crawl_detail")
+        response.raise_for_status()
+        html = response.text
+        if isbn and self.html_cache is not None:
+            self.html_cache.set(isbn, html)
+        return html
+
+    def get_synopsis(self, book_title, link=None, isbn=""):
+        """책 소개 텍스트 반환 (찾지 못하면 None). link는 API item의 link 필드"""
+        html = self.fetch_detail_html(book_title, link, isbn)
+        if html is None:
+            return None
+        return parse_intro(html)
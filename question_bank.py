@@ -0,0 +1,87 @@
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+
+from quiz import validate_quiz_item
+
+# === 책별 퀴즈 문제 은행 ===
+# 책마다 검증된 문제를 넉넉히(기본 30개) 한 번만 만들어 SQLite에 저장해 두고,
+# 학생마다 세션 시드로 N개를 뽑아 퀴즈를 낸다. 퀴즈 출제가 LLM 호출 대신 로컬 샘플링이 된다.
+
+_NORMALIZE_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def question_id(item):
+    """공백/문장부호/대소문자를 무시한 문제 내용의 해시 (중복 판별용)"""
+    normalized = _NORMALIZE_RE.sub("", item["question"]).casefold()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def sample_items(items, n, seed):
+    """seed로 결정되는 n개의 문제 샘플 (같은 시드면 항상 같은 문제)"""
+    ordered = sorted(items, key=question_id)
+    return random.Random(seed).sample(ordered, min(n, len(ordered)))
+
+
+class QuestionBank:
+    """책 키(ISBN 등)별 퀴즈 문제를 저장하는 SQLite 문제 은행"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            "book_key TEXT NOT NULL, question_id TEXT NOT NULL, item TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (book_key, question_id))"
+        )
+        self._conn.commit()
+
+    def add(self, book_key, items):
+        """검증을 통과하고 중복이 아닌 문제만 추가, 추가된 개수 반환"""
+        rows = []
+        seen = set()
+        for item in items:
+            if validate_quiz_item(item):
+                continue
+            qid = question_id(item)
+            if qid in seen:
+                continue
+            seen.add(qid)
+            item = {key: item[key] for key in ("question", "options", "correct_answer")}
+            rows.append((book_key, qid, json.dumps(item, ensure_ascii=False), time.time()))
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO questions (book_key, question_id, item, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def count(self, book_key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE book_key = ?", (book_key,)
+            ).fetchone()[0]
+
+    def items(self, book_key):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item FROM questions WHERE book_key = ?", (book_key,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def sample(self, book_key, n, seed):
+        """문제 은행에서 n개 샘플 (문제가 n개보다 적으면 있는 만큼)"""
+        return sample_items(self.items(book_key), n, seed)
+
+    def delete(self, book_key):
+        with self._lock:
+            self._conn.execute("DELETE FROM questions WHERE book_key = ?", (book_key,))
+            self._conn.commit()
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+from collections import Counter
+
+# === 독서 퀴즈 관련 공용 코드 ===
+# app.py는 Streamlit이 매 실행마다 다시 읽어 들이므로, 백그라운드 스레드와
+# 여러 번의 실행 사이에서 공유되어야 하는 클래스는 이 모듈에 둔다.
+
+logger = logging.getLogger(__name__)
+
+
+class QuizGenerationError(Exception):
+    """퀴즈 JSON 생성/파싱 실패 (raw_response에 전처리된 ChatGPT 응답 보관)"""
+
+    def __init__(self, message, raw_response, detail=None):
+        super().__init__(message)
+        self.raw_response = raw_response
+        self.detail = detail
+
+
+def grade_quiz(quiz_data, answers):
+    """LLM 없이 정답과 비교해 채점
+
+    answers는 {"0": "학생 답", ...} 형태. 문제별 결과 목록과 점수를 반환한다.
+    """
+    results = []
+    for idx, item in enumerate(quiz_data):
+        answer = answers.get(str(idx))
+        results.append({
+            "index": idx,
+            "question": item["question"],
+            "answer": answer,
+            "correct_answer": item["correct_answer"],
+            "is_correct": answer == item["correct_answer"],
+        })
+    correct = sum(result["is_correct"] for result in results)
+    total = len(results)
+    return {
+        "results": results,
+        "correct": correct,
+        "total": total,
+        "score": round(100 * correct / total) if total else 0,
+    }
+
+
+def explanation_key(item, wrong_answer):
+    """(문제, 선택지, 정답, 학생의 오답) 조합의 해설 캐시 키"""
+    payload = json.dumps(
+        [item["question"], item["options"], item["correct_answer"], wrong_answer],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# === 구조화 출력 스키마와 검증 ===
+
+OPTION_COUNT = 4
+
+QUIZ_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}},
+        "correct_answer": {"type": "string"},
+    },
+    "required": ["question", "options", "correct_answer"],
+    "additionalProperties": False,
+}
+
+QUIZ_SCHEMA = {
+    "type": "object",
+    "properties": {"quiz": {"type": "array", "items": QUIZ_ITEM_SCHEMA}},
+    "required": ["quiz"],
+    "additionalProperties": False,
+}
+
+# 검증/복구 누적 통계 (관리자 화면에서 확인)
+quiz_metrics = Counter()
+
+
+def json_schema_format(name, schema):
+    """chat completions의 response_format (strict JSON schema 모드)"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": True},
+    }
+
+
+def validate_quiz_item(item):
+    """퀴즈 한 문제의 문제점 목록 반환 (비어 있으면 유효)"""
+    if not isinstance(item, dict):
+        return ["문제가 객체 형식이 아닙니다."]
+    problems = []
+    question = item.get("question")
+    options = item.get("options")
+    correct_answer = item.get("correct_answer")
+    if not isinstance(question, str) or not question.strip():
+        problems.append("문제 내용이 비어 있습니다.")
+    if not isinstance(options, list) or len(options) != OPTION_COUNT:
+        problems.append(f"선택지는 정확히 {OPTION_COUNT}개여야 합니다.")
+    elif any(not isinstance(option, str) or not option.strip() for option in options):
+        problems.append("빈 선택지가 있습니다.")
+    elif len(set(options)) != len(options):
+        problems.append("중복된 선택지가 있습니다.")
+    elif correct_answer not in options:
+        problems.append("정답이 선택지 중에 없습니다.")
+    return problems
+
+
+def log_quiz_validation(requested, received, invalid, repaired, failed):
+    """퀴즈 검증/복구 결과를 로그와 누적 통계에 기록"""
+    quiz_metrics["quizzes"] += 1
+    quiz_metrics["items_requested"] += requested
+    quiz_metrics["items_received"] += received
+    quiz_metrics["items_invalid"] += invalid
+    quiz_metrics["items_repaired"] += repaired
+    quiz_metrics["items_failed"] += failed
+    logger.info(
+        "quiz validation: requested=%d received=%d invalid=%d repaired=%d failed=%d",
+        requested, received, invalid, repaired, failed,
+    )
@@ -0,0 +1,157 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# === 수업용 "읽기 자료 팩" ===
+# 교사가 미리 정한 도서 목록(CSV)에 대해 네이버 도서 정보, 크롤링 줄거리,
+# 초등학생용 줄거리, 퀴즈, 토론 주제를 수업 전에 한꺼번에 만들어 JSON 파일로 저장한다.
+# 앱은 시작할 때 팩을 읽어 들여 해당 도서는 외부 호출 없이 바로 제공한다.
+#
+# 사용법:
+#   python reading_pack.py books.csv -o packs/class-3-2.json -j 4
+# CSV에는 isbn 또는 title 열이 있어야 한다. 이미 만들어진 도서는 건너뛰므로
+# 중간에 멈췄더라도 같은 명령을 다시 실행하면 이어서 만든다.
+
+PACK_FORMAT_VERSION = 1
+
+
+def row_key(row):
+    """CSV 행을 팩의 sources 키로 변환 (isbn 우선, 없으면 정규화한 제목)"""
+    isbn = (row.get("isbn") or "").strip().replace("-", "")
+    if isbn:
+        return f"isbn:{isbn}"
+    title = " ".join((row.get("title") or "").split()).casefold()
+    return f"title:{title}" if title else None
+
+
+def new_pack():
+    return {
+        "format_version": PACK_FORMAT_VERSION,
+        "version": None,
+        "built_at": None,
+        "prompt_version": None,
+        "books": {},     # ISBN -> 도서 자료
+        "sources": {},   # CSV 행 키 -> ISBN
+    }
+
+
+def load_pack(path):
+    """팩 파일 읽기. 파일이 없으면 None, 형식 버전이 다르면 ValueError"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        pack = json.load(f)
+    if pack.get("format_version") != PACK_FORMAT_VERSION:
+        raise ValueError(
+            f"지원하지 않는 팩 형식 버전입니다: {pack.get('format_version')} (필요: {PACK_FORMAT_VERSION})"
+        )
+    return pack
+
+
+def save_pack(pack, path):
+    """팩 파일을 임시 파일에 쓴 뒤 교체 (중간에 중단되어도 기존 파일이 깨지지 않음)"""
+    pack["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    pack["version"] = time.strftime("%Y%m%d%H%M%S")
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".pack-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(pack, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def find_book(pack, isbn):
+    """팩에서 ISBN으로 도서 자료 찾기"""
+    if not pack or not isbn:
+        return None
+    return pack["books"].get(isbn)
+
+
+def read_rows(csv_path):
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower() for name in reader.fieldnames or []}
+        if not fields & {"isbn", "title"}:
+            raise ValueError("CSV에 isbn 또는 title 열이 필요합니다.")
+        return [{k.strip().lower(): v for k, v in row.items() if k} for row in reader]
+
+
+def build_pack(rows, path, build_entry, concurrency=4, prompt_version=None, log=print):
+    """rows의 도서 자료를 병렬로 만들어 path에 저장 (이미 있는 도서는 건너뜀)
+
+    build_entry(row) -> (isbn, 도서 자료 dict). 도서 하나가 끝날 때마다 파일을 저장하므로
+    중단 후 다시 실행하면 남은 도서만 만든다. 실패한 행의 (키, 예외) 목록을 반환한다.
+    """
+    pack = load_pack(path) or new_pack()
+    if prompt_version and pack.get("prompt_version") not in (None, prompt_version):
+        log(f"프롬프트 버전이 바뀌어 팩을 새로 만듭니다: {pack['prompt_version']} -> {prompt_version}")
+        pack = new_pack()
+    pack["prompt_version"] = prompt_version
+
+    pending = []
+    seen = set()
+    for row in rows:
+        key = row_key(row)
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        if pack["sources"].get(key) in pack["books"]:
+            continue
+        pending.append((key, row))
+    log(f"전체 {len(seen)}권 중 {len(seen) - len(pending)}권은 이미 만들어져 있어 건너뜁니다.")
+
+    lock = threading.Lock()
+    failures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(build_entry, row): key for key, row in pending}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                isbn, entry = future.result()
+            except Exception as e:
+                failures.append((key, e))
+                log(f"[실패] {key}: {e}")
+                continue
+            with lock:
+                pack["books"][isbn] = entry
+                pack["sources"][key] = isbn
+                save_pack(pack, path)
+            log(f"[완료] {key} -> {entry['title']} ({isbn})")
+    if not pending:
+        save_pack(pack, path)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="수업 도서 목록으로 읽기 자료 팩을 미리 만듭니다.")
+    parser.add_argument("csv_path", help="isbn 또는 title 열이 있는 CSV 파일")
+    parser.add_argument("-o", "--output", default="reading_pack.json", help="팩 파일 경로")
+    parser.add_argument("-j", "--concurrency", type=int, default=4, help="동시에 처리할 도서 수")
+    args = parser.parse_args(argv)
+
+    # 네이버/OpenAI 호출과 프롬프트는 앱과 같은 코드를 사용 (키는 secrets.toml 또는 환경 변수)
+    import app
+
+    rows = read_rows(args.csv_path)
+    failures = build_pack(
+        rows, args.output, app.build_pack_entry,
+        concurrency=args.concurrency, prompt_version=app.SYNOPSIS_PROMPT_VERSION,
+    )
+    if failures:
+        print(f"{len(failures)}권을 만들지 못했습니다. 다시 실행하면 실패한 도서만 다시 시도합니다.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
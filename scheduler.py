@@ -0,0 +1,178 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# === OpenAI 요청 스케줄러 ===
+# 프로세스의 모든 LLM 호출은 보내기 전에 이 스케줄러에서 차례를 받는다.
+# 분당 요청 수(RPM)와 분당 토큰 수(TPM)를 토큰 버킷으로 제한해서 429를 피하고,
+# 우선순위 등급(대화형 > 줄거리 재작성 > 백그라운드 미리 생성)과
+# 같은 등급 안에서는 세션별 라운드 로빈으로 차례를 정한다.
+
+INTERACTIVE = 0   # 토론 턴, 채점 해설, 감상문 피드백 등 학생이 화면에서 기다리는 호출
+REWRITE = 1       # 줄거리 재작성, 버튼으로 요청한 퀴즈/토론 주제 생성
+BACKGROUND = 2    # 미리 생성, 문제 은행 보충
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", REWRITE: "rewrite", BACKGROUND: "background"}
+
+# 백그라운드 작업처럼 호출 지점과 무관하게 우선순위를 정해야 할 때 사용
+priority_override = contextvars.ContextVar("priority_override", default=None)
+
+
+@contextmanager
+def priority(level):
+    """with 블록 안의 LLM 호출 우선순위를 level로 고정"""
+    token = priority_override.set(level)
+    try:
+        yield
+    finally:
+        priority_override.reset(token)
+
+
+def run_with_priority(level, fn, *args, **kwargs):
+    """fn을 지정한 우선순위로 실행 (스레드 풀에 제출할 때 사용)"""
+    with priority(level):
+        return fn(*args, **kwargs)
+
+
+class TokenBucket:
+    """분당 rate_per_min만큼 채워지는 토큰 버킷 (최대 한 번에 capacity까지 사용)"""
+
+    def __init__(self, rate_per_min, capacity=None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity or rate_per_min
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """amount를 쓰려면 기다려야 하는 시간(초), 바로 쓸 수 있으면 0"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class AcquireCancelled(Exception):
+    """차례를 기다리던 요청이 취소됨 (대체 모델 요청이 먼저 끝난 경우 등)"""
+
+
+# 취소 여부를 확인하는 최대 간격(초). 취소된 요청은 늦어도 이 시간 안에 대기열에서 빠진다
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class _Ticket:
+    __slots__ = ("priority", "session_id", "tokens", "enqueued")
+
+    def __init__(self, priority, session_id, tokens):
+        self.priority = priority
+        self.session_id = session_id
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+
+
+class LLMScheduler:
+    """RPM/TPM 토큰 버킷 + 우선순위 + 세션별 공정성을 가진 프로세스 공용 스케줄러
+
+    acquire()는 차례가 올 때까지 호출 스레드를 막고, 기다린 시간을 반환한다.
+    """
+
+    def __init__(self, requests_per_min=500, tokens_per_min=30000, wait_window=500):
+        self.requests = TokenBucket(requests_per_min)
+        self.tokens = TokenBucket(tokens_per_min)
+        self._cond = threading.Condition()
+        # 우선순위 -> (세션 ID -> 대기 티켓 deque). 세션 순서가 라운드 로빈 순서
+        self._queues = {level: OrderedDict() for level in PRIORITY_NAMES}
+        self._waits = {level: deque(maxlen=wait_window) for level in PRIORITY_NAMES}
+        self._granted = {level: 0 for level in PRIORITY_NAMES}
+
+    def _head(self):
+        for level in sorted(self._queues):
+            sessions = self._queues[level]
+            if sessions:
+                return next(iter(sessions.values()))[0]
+        return None
+
+    def _dequeue(self, ticket):
+        sessions = self._queues[ticket.priority]
+        tickets = sessions[ticket.session_id]
+        tickets.remove(ticket)
+        # 차례를 받은 세션은 같은 등급의 맨 뒤로 보내서 다른 세션에게 기회를 줌
+        del sessions[ticket.session_id]
+        if tickets:
+            sessions[ticket.session_id] = tickets
+
+    def acquire(self, level, session_id, tokens, timeout=None, cancelled=None):
+        """요청 하나를 보낼 차례를 기다림 (tokens: 예상 프롬프트+응답 토큰 수)
+
+        cancelled(threading.Event)가 설정되면 대기열에서 빠지고 AcquireCancelled를 던진다.
+        """
+        if cancelled is not None and cancelled.is_set():
+            raise AcquireCancelled("LLM 요청이 차례를 받기 전에 취소되었습니다.")
+        ticket = _Ticket(level, session_id or "anonymous", tokens)
+        deadline = None if timeout is None else ticket.enqueued + timeout
+        with self._cond:
+            self._queues[level].setdefault(ticket.session_id, deque()).append(ticket)
+            try:
+                while True:
+                    if cancelled is not None and cancelled.is_set():
+                        raise AcquireCancelled("LLM 요청이 차례를 받기 전에 취소되었습니다.")
+                    now = time.monotonic()
+                    if self._head() is ticket:
+                        wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                        if wait == 0:
+                            break
+                    else:
+                        wait = None
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise TimeoutError("LLM 요청 대기 시간이 초과되었습니다.")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    if cancelled is not None:
+                        wait = CANCEL_POLL_INTERVAL if wait is None else min(wait, CANCEL_POLL_INTERVAL)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._dequeue(ticket)
+                self._cond.notify_all()
+                raise
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self._dequeue(ticket)
+            waited = time.monotonic() - ticket.enqueued
+            self._waits[level].append(waited)
+            self._granted[level] += 1
+            self._cond.notify_all()
+        return waited
+
+    def stats(self):
+        """등급별 대기열 길이, 대기 세션 수, 대기 시간 통계"""
+        with self._cond:
+            now = time.monotonic()
+            stats = {
+                "requests_available": round(self.requests.tokens, 1),
+                "tokens_available": round(self.tokens.tokens),
+            }
+            for level, name in PRIORITY_NAMES.items():
+                sessions = self._queues[level]
+                waits = sorted(self._waits[level])
+                oldest = min((t.enqueued for q in sessions.values() for t in q), default=None)
+                stats[name] = {
+                    "queue_depth": sum(len(q) for q in sessions.values()),
+                    "waiting_sessions": len(sessions),
+                    "oldest_wait": round(now - oldest, 3) if oldest is not None else 0.0,
+                    "granted": self._granted[level],
+                    "wait_p50": round(waits[len(waits) // 2], 3) if waits else None,
+                    "wait_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3)
+                    if waits else None,
+                    "wait_max": round(waits[-1], 3) if waits else None,
+                }
+        return stats
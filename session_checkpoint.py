@@ -0,0 +1,153 @@
+import hashlib
+import json
+import re
+import secrets
+import sqlite3
+import threading
+import time
+
+# === 세션 체크포인트 ===
+# 학교 와이파이가 끊겨 브라우저가 다시 연결되면 st.session_state가 사라진다.
+# 학생의 진행 상황(선택한 책, 퀴즈와 답안, 토론 대화와 라운드 등)을 이어하기 코드별로 저장해 두고,
+# 다시 접속하면 저장소를 한 번 읽어 그대로 복원한다 (줄거리/퀴즈/토론을 다시 생성하지 않음).
+# 이 모듈은 세션 상태 <-> JSON 변환과 체크포인트 저장소를 담당하고, 언제 읽고 쓸지는 app.py가 정한다.
+
+CHECKPOINT_VERSION = 1
+
+# 그대로 저장하는 세션 상태 키 (관리자 로그인 여부 같은 권한 정보는 저장하지 않음)
+CHECKPOINT_KEYS = (
+    "current_page", "session_seed", "student_name",
+    "quiz_data", "quiz_answers", "quiz_grading",
+    "debate_topics", "debate_topic", "user_side", "chatbot_side",
+    "debate_started", "debate_round", "debate_chat", "debate_evaluated",
+    "reading_feedback",
+)
+QUIZ_ANSWER_PREFIX = "quiz_q_"  # 퀴즈 라디오 위젯 키
+
+# 헷갈리기 쉬운 글자(0/O, 1/I/L)를 뺀 이어하기 코드 문자
+CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 10
+CODE_RE = re.compile(rf"^[{CODE_ALPHABET}]{{{CODE_LENGTH}}}$")
+
+
+def new_resume_code():
+    """새 이어하기 코드 (학생이 다른 기기에서 직접 입력할 수 있는 길이)"""
+    return "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+
+def normalize_resume_code(code):
+    """입력/URL로 받은 코드를 정리해 반환 (형식이 맞지 않으면 None)"""
+    code = re.sub(r"[\s-]", "", code or "").upper()
+    return code if CODE_RE.match(code) else None
+
+
+def snapshot(state):
+    """세션 상태에서 저장할 값만 뽑은 JSON 직렬화 가능한 dict"""
+    data = {"version": CHECKPOINT_VERSION}
+    for key in CHECKPOINT_KEYS:
+        if key in state and state[key] is not None:
+            data[key] = state[key]
+    answers = {key: state[key] for key in state.keys() if str(key).startswith(QUIZ_ANSWER_PREFIX)}
+    if answers:
+        data["quiz_widgets"] = answers
+    return data
+
+
+def restore(state, data):
+    """snapshot()으로 만든 dict를 세션 상태에 반영 (버전이 다르면 무시하고 False)"""
+    if not data or data.get("version") != CHECKPOINT_VERSION:
+        return False
+    # 다른 코드를 불러오는 경우 지금 세션의 진행 상황과 섞이지 않도록 먼저 비움
+    for key in list(state.keys()):
+        if key in CHECKPOINT_KEYS or str(key).startswith(QUIZ_ANSWER_PREFIX):
+            del state[key]
+    for key in CHECKPOINT_KEYS:
+        if key in data:
+            state[key] = data[key]
+    for key, value in data.get("quiz_widgets", {}).items():
+        state[key] = value
+    grading = data.get("quiz_grading")
+    if grading and grading.get("explanations"):
+        # JSON 객체 키는 문자열이 되므로 문제 번호(int)로 되돌림
+        grading["explanations"] = {int(index): text for index, text in grading["explanations"].items()}
+    return True
+
+
+def fingerprint(data):
+    """체크포인트 내용 해시 (바뀌지 않았으면 저장을 건너뛰는 데 사용)"""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCheckpointStore:
+    """프로세스 메모리에 보관하는 체크포인트 저장소 (워커가 재시작되면 사라짐)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}  # 코드 -> (JSON 문자열, 저장 시각)
+
+    def save(self, code, data):
+        with self._lock:
+            self._data[code] = (json.dumps(data, ensure_ascii=False), time.time())
+
+    def load(self, code):
+        with self._lock:
+            entry = self._data.get(code)
+        return json.loads(entry[0]) if entry is not None else None
+
+    def delete(self, code):
+        with self._lock:
+            self._data.pop(code, None)
+
+    def gc(self, max_age):
+        """max_age초 동안 저장되지 않은 체크포인트 삭제 (삭제한 개수 반환)"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale = [code for code, (_, saved_at) in self._data.items() if saved_at < cutoff]
+            for code in stale:
+                del self._data[code]
+        return len(stale)
+
+
+class SQLiteCheckpointStore:
+    """SQLite 파일에 보관하는 체크포인트 저장소 (같은 파일을 쓰는 워커끼리 공유)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, data TEXT NOT NULL, saved_at REAL NOT NULL)"
+        )
+
+    def save(self, code, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (token, data, saved_at) VALUES (?, ?, ?)",
+                (code, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+
+    def load(self, code):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM sessions WHERE token = ?", (code,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def delete(self, code):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (code,))
+
+    def gc(self, max_age):
+        """max_age초 동안 저장되지 않은 체크포인트 삭제 (삭제한 개수 반환)"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE saved_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
+
+
+def open_store(spec):
+    """설정 문자열로 체크포인트 저장소 생성: "memory" 또는 "sqlite:<파일 경로>" """
+    if not spec or spec == "memory":
+        return MemoryCheckpointStore()
+    if spec.startswith("sqlite:"):
+        return SQLiteCheckpointStore(spec[len("sqlite:"):])
+    raise ValueError(f"알 수 없는 체크포인트 저장소 설정입니다: {spec}")
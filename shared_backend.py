@@ -0,0 +1,261 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# === 워커 프로세스 공용 상태 저장소 ===
+# Streamlit 워커 여러 개를 로드 밸런서 뒤에 띄울 때 워커끼리 공유해야 하는 상태를 보관한다.
+# - 생성 결과물(artifact): 줄거리 재작성본, 퀴즈, 토론 주제 등 (종류, 키) -> JSON 값
+# - 작업 임대(lease): 같은 결과물을 한 워커만 생성하도록 하는 만료 시간이 있는 잠금
+# 기본은 프로세스 내부(InProcessBackend)이고, 같은 서버의 여러 워커는 SQLiteBackend로 공유한다.
+# 결과물은 cache.TTLCache처럼 유효 시간(ttl)이 지나면 버리고, maxsize를 넘으면 최근에 쓰지 않은 것부터 지운다.
+
+ARTIFACT_MAXSIZE = 4096
+ARTIFACT_TTL = 7 * 24 * 3600
+
+
+class SharedBackend:
+    """공용 저장소 인터페이스
+
+    하위 클래스는 get/put/delete_artifact, acquire/release_lease, lease_held를 구현한다.
+    """
+
+    poll_interval = 0.5
+
+    def new_owner(self):
+        """임대 소유자 ID (호출마다 고유)"""
+        return uuid.uuid4().hex
+
+    def wait_for_artifact(self, kind, key, lease_name, timeout):
+        """다른 워커가 생성 중인 결과물을 기다림
+
+        결과물이 생기면 그 값을, 임대가 풀렸는데 결과물이 없거나 시간이 지나면 None을 반환한다.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            value = self.get_artifact(kind, key)
+            if value is not None:
+                return value
+            if not self.lease_held(lease_name):
+                return self.get_artifact(kind, key)
+            time.sleep(self.poll_interval)
+        return None
+
+    def generate_once(self, kind, key, fn, lease_ttl=120.0, wait_timeout=120.0):
+        """결과물이 있으면 반환하고, 없으면 임대를 얻은 워커 하나만 fn()으로 생성해 저장
+
+        다른 워커가 생성 중이면 끝날 때까지 기다린다. fn()이 빈 값(None, "", [])을 반환하면
+        저장하지 않는다 (실패한 생성 결과를 다른 워커가 재사용하지 않도록).
+        """
+        value = self.get_artifact(kind, key)
+        if value is not None:
+            return value
+        lease_name = f"{kind}:{key}"
+        owner = self.new_owner()
+        deadline = time.monotonic() + wait_timeout
+        while not self.acquire_lease(lease_name, owner, lease_ttl):
+            value = self.wait_for_artifact(kind, key, lease_name, max(0.0, deadline - time.monotonic()))
+            if value is not None:
+                return value
+            if time.monotonic() >= deadline:
+                break  # 임대를 가진 워커가 응답이 없으면 직접 생성
+        try:
+            value = self.get_artifact(kind, key)
+            if value is None:
+                value = fn()
+                if value:
+                    self.put_artifact(kind, key, value)
+            return value
+        finally:
+            self.release_lease(lease_name, owner)
+
+
+class InProcessBackend(SharedBackend):
+    """프로세스 메모리에 보관하는 기본 구현 (워커 1개일 때)"""
+
+    poll_interval = 0.05
+
+    def __init__(self, maxsize=ARTIFACT_MAXSIZE, ttl=ARTIFACT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._artifacts = OrderedDict()  # (종류, 키) -> (값, 만료 시각)
+        self._leases = {}
+
+    def get_artifact(self, kind, key):
+        with self._lock:
+            entry = self._artifacts.get((kind, key))
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._artifacts[(kind, key)]
+                return None
+            self._artifacts.move_to_end((kind, key))
+            return value
+
+    def put_artifact(self, kind, key, value):
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._artifacts[(kind, key)] = (value, expires_at)
+            self._artifacts.move_to_end((kind, key))
+            while len(self._artifacts) > self.maxsize:
+                self._artifacts.popitem(last=False)
+
+    def delete_artifact(self, kind, key):
+        with self._lock:
+            self._artifacts.pop((kind, key), None)
+
+    def acquire_lease(self, name, owner, ttl):
+        """임대 획득 (이미 다른 소유자가 유효한 임대를 가지고 있으면 False)"""
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder is not None and holder[0] == owner:
+                del self._leases[name]
+
+    def lease_held(self, name):
+        with self._lock:
+            holder = self._leases.get(name)
+            return holder is not None and holder[1] > time.time()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "artifacts": len(self._artifacts),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "leases": len(self._leases),
+            }
+
+
+class SQLiteBackend(SharedBackend):
+    """SQLite 파일 하나를 여러 워커 프로세스가 함께 쓰는 구현
+
+    임대는 BEGIN IMMEDIATE 트랜잭션(파일 쓰기 잠금) 안에서 확인/기록하므로
+    같은 파일을 쓰는 워커 사이에서 원자적으로 동작한다.
+    """
+
+    def __init__(self, path, maxsize=ARTIFACT_MAXSIZE, ttl=ARTIFACT_TTL):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL DEFAULT 0, PRIMARY KEY (kind, key))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(artifacts)")}
+        if "accessed_at" not in columns:  # accessed_at 열이 생기기 전에 만든 파일
+            self._conn.execute("ALTER TABLE artifacts ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get_artifact(self, kind, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, updated_at FROM artifacts WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and row[1] + self.ttl <= now:
+                self._conn.execute("DELETE FROM artifacts WHERE kind = ? AND key = ?", (kind, key))
+                return None
+            self._conn.execute(
+                "UPDATE artifacts SET accessed_at = ? WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+        return json.loads(row[0])
+
+    def put_artifact(self, kind, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (kind, key, value, updated_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        """유효 시간이 지난 결과물을 지우고, 최근에 쓰지 않은 것부터 maxsize까지 줄임"""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM artifacts WHERE updated_at <= ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM artifacts WHERE rowid NOT IN ("
+            "SELECT rowid FROM artifacts ORDER BY accessed_at DESC LIMIT ?)",
+            (self.maxsize,),
+        )
+        self._conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))  # 워커가 종료되며 남긴 임대
+
+    def delete_artifact(self, kind, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts WHERE kind = ? AND key = ?", (kind, key))
+
+    def acquire_lease(self, name, owner, ttl):
+        """임대 획득 (이미 다른 소유자가 유효한 임대를 가지고 있으면 False)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT owner, expires_at FROM leases WHERE name = ?", (name,)
+                ).fetchone()
+                if row is not None and row[0] != owner and row[1] > now:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (name, owner, now + ttl),
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def lease_held(self, name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM leases WHERE name = ? AND expires_at > ?", (name, time.time())
+            ).fetchone()
+        return row is not None
+
+    def stats(self):
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("artifacts", "leases")
+            }
+        return {"backend": "sqlite", "path": self.path, "maxsize": self.maxsize, "ttl": self.ttl, **counts}
+
+
+def open_backend(spec, maxsize=ARTIFACT_MAXSIZE, ttl=ARTIFACT_TTL):
+    """설정 문자열로 저장소 생성: "memory" 또는 "sqlite:<파일 경로>"
+
+    maxsize / ttl: 보관할 최대 결과물 수와 유효 시간(초, None이면 만료되지 않음)
+    """
+    if not spec or spec == "memory":
+        return InProcessBackend(maxsize=maxsize, ttl=ttl)
+    if spec.startswith("sqlite:"):
+        return SQLiteBackend(spec[len("sqlite:"):], maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"알 수 없는 공용 저장소 설정입니다: {spec}")
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from question_bank import question_id
+from quiz import OPTION_COUNT
+
+# === 퀴즈 제출 기록과 학급 분석 ===
+# 학생이 답안을 제출할 때마다 문제별 응답을 SQLite에 한 행씩 추가(append-only)하고,
+# 교사 화면에서는 새로 들어온 행만 열 단위 NumPy 배열로 읽어 누적 집계에 더한다.
+# 문제별 정답률/난이도, 선택지별 선택 비율, 학생별 점수를 파이썬 반복문 없이 계산한다.
+# 학생은 세션 시드(student_key)로 구분하고, 입력한 이름은 화면에 보여 주는 용도로만 쓴다
+# (이름이 같은 학생이 섞이거나, 이름을 고쳐 쓴 학생이 둘로 나뉘지 않도록).
+
+NO_ANSWER = OPTION_COUNT  # 선택지 집계 배열의 마지막 열 = 답하지 않음
+
+
+def submission_id(student_key, book_key, quiz_data):
+    """같은 학생이 같은 퀴즈를 다시 제출해도 같은 ID (처음 제출만 기록)"""
+    source = "\n".join([student_key, book_key] + sorted(question_id(item) for item in quiz_data))
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:24]
+
+
+class SubmissionStore:
+    """문제별 응답 행을 쌓는 SQLite 저장소"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, submission_id TEXT NOT NULL, book_key TEXT NOT NULL, "
+            "student TEXT NOT NULL, student_key TEXT NOT NULL DEFAULT '', "
+            "question_id TEXT NOT NULL, choice INTEGER NOT NULL, "
+            "correct INTEGER NOT NULL, submitted_at REAL NOT NULL, "
+            "UNIQUE (submission_id, question_id))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answers)")}
+        if "student_key" not in columns:  # student_key 열이 생기기 전에 만든 파일
+            self._conn.execute("ALTER TABLE answers ADD COLUMN student_key TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_book ON answers (book_key, id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS quiz_questions ("
+            "book_key TEXT NOT NULL, question_id TEXT NOT NULL, item TEXT NOT NULL, "
+            "PRIMARY KEY (book_key, question_id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS quiz_books (book_key TEXT PRIMARY KEY, title TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def append(self, book_key, book_title, student, student_key, quiz_data, answers):
+        """채점한 퀴즈 한 번을 기록 (answers: {"0": "학생 답", ...}), 추가된 행 수 반환
+
+        student는 표시 이름, student_key는 학생을 구분하는 고정 키(세션 시드)
+        """
+        sid = submission_id(student_key, book_key, quiz_data)
+        now = time.time()
+        rows, questions = [], []
+        for idx, item in enumerate(quiz_data):
+            qid = question_id(item)
+            answer = answers.get(str(idx))
+            choice = item["options"].index(answer) if answer in item["options"] else NO_ANSWER
+            rows.append((
+                sid, book_key, student, student_key, qid, choice, int(answer == item["correct_answer"]), now
+            ))
+            questions.append((book_key, qid, json.dumps(item, ensure_ascii=False)))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO quiz_books (book_key, title) VALUES (?, ?)", (book_key, book_title)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO quiz_questions (book_key, question_id, item) VALUES (?, ?, ?)", questions
+            )
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO answers "
+                "(submission_id, book_key, student, student_key, question_id, choice, correct, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = self._conn.total_changes - before
+            self._conn.commit()
+            return added
+
+    def read_since(self, book_key, last_id):
+        """id > last_id인 응답 행을 열별 배열로 반환 (id, student_key, student, question_id, choice, correct)
+
+        student_key가 없는 예전 행은 이름을 키로 쓴다.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, COALESCE(NULLIF(student_key, ''), student), student, question_id, choice, correct "
+                "FROM answers "
+                "WHERE book_key = ? AND id > ? ORDER BY id",
+                (book_key, last_id),
+            ).fetchall()
+        if not rows:
+            return None
+        ids, student_keys, students, qids, choices, correct = zip(*rows)
+        return {
+            "id": np.fromiter(ids, dtype=np.int64, count=len(rows)),
+            "student_key": np.array(student_keys, dtype=object),
+            "student": np.array(students, dtype=object),
+            "question_id": np.array(qids, dtype=object),
+            "choice": np.fromiter(choices, dtype=np.int64, count=len(rows)),
+            "correct": np.fromiter(correct, dtype=np.int64, count=len(rows)),
+        }
+
+    def questions(self, book_key):
+        """문제 ID -> 문제 dict"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question_id, item FROM quiz_questions WHERE book_key = ?", (book_key,)
+            ).fetchall()
+        return {qid: json.loads(item) for qid, item in rows}
+
+    def books(self):
+        """[(책 키, 제목, 응답 행 수), ...] 최근 제출 순"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT b.book_key, b.title, COUNT(a.id) FROM quiz_books b "
+                "JOIN answers a ON a.book_key = b.book_key GROUP BY b.book_key ORDER BY MAX(a.id) DESC"
+            ).fetchall()
+
+
+def _encode(values, index):
+    """문자열 배열을 누적 인덱스 번호 배열로 변환 (처음 보는 값은 뒤에 번호를 새로 붙임)"""
+    unique, inverse = np.unique(values, return_inverse=True)
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in unique), dtype=np.int64,
+                        count=len(unique))
+    return codes[inverse]
+
+
+def _grow(array, size):
+    if array.shape[0] >= size:
+        return array
+    padding = [(0, size - array.shape[0])] + [(0, 0)] * (array.ndim - 1)
+    return np.pad(array, padding)
+
+
+class QuizAnalytics:
+    """책 하나의 학급 퀴즈 집계 (refresh()가 새 응답 행만 읽어 누적 배열에 더함)"""
+
+    def __init__(self, store, book_key):
+        self.store = store
+        self.book_key = book_key
+        self.last_id = 0
+        self._lock = threading.Lock()
+        self._questions = {}  # 문제 ID -> 행 번호
+        self._students = {}   # 학생 키 -> 행 번호
+        self._student_names = {}  # 학생 키 -> 표시 이름 (가장 최근 제출의 이름)
+        self.attempts = np.zeros(0, dtype=np.int64)
+        self.correct = np.zeros(0, dtype=np.int64)
+        self.option_counts = np.zeros((0, OPTION_COUNT + 1), dtype=np.int64)
+        self.student_answered = np.zeros(0, dtype=np.int64)
+        self.student_correct = np.zeros(0, dtype=np.int64)
+
+    def refresh(self):
+        """새로 들어온 응답을 집계에 반영하고 반영한 행 수 반환"""
+        with self._lock:
+            rows = self.store.read_since(self.book_key, self.last_id)
+            if rows is None:
+                return 0
+            q = _encode(rows["question_id"], self._questions)
+            s = _encode(rows["student_key"], self._students)
+            keys, last = np.unique(rows["student_key"][::-1], return_index=True)
+            self._student_names.update(zip(keys, rows["student"][::-1][last]))
+            n_q, n_s = len(self._questions), len(self._students)
+
+            self.attempts = _grow(self.attempts, n_q) + np.bincount(q, minlength=n_q)
+            self.correct = _grow(self.correct, n_q) + np.bincount(
+                q, weights=rows["correct"], minlength=n_q
+            ).astype(np.int64)
+            self.option_counts = _grow(self.option_counts, n_q)
+            np.add.at(self.option_counts, (q, rows["choice"]), 1)
+            self.student_answered = _grow(self.student_answered, n_s) + np.bincount(s, minlength=n_s)
+            self.student_correct = _grow(self.student_correct, n_s) + np.bincount(
+                s, weights=rows["correct"], minlength=n_s
+            ).astype(np.int64)
+            self.last_id = int(rows["id"][-1])
+            return len(rows["id"])
+
+    def question_stats(self):
+        """문제별 응시 수, 정답률, 난이도(1 - 정답률), 선택지별 선택 비율"""
+        with self._lock:
+            attempts = self.attempts.astype(float)
+            safe = np.where(attempts > 0, attempts, 1.0)
+            correct_rate = self.correct / safe
+            option_rates = self.option_counts / safe[:, None]
+            qids = sorted(self._questions, key=self._questions.get)
+            return {
+                "question_id": qids,
+                "attempts": self.attempts.copy(),
+                "correct_rate": correct_rate,
+                "difficulty": 1.0 - correct_rate,
+                "option_rates": option_rates,
+            }
+
+    def student_scores(self):
+        """학생별 푼 문제 수, 맞힌 문제 수, 점수(100점 만점)
+
+        student는 표시 이름 (이름이 같은 학생이 여럿이면 키 앞자리를 붙여 구분)
+        """
+        with self._lock:
+            answered = self.student_answered.copy()
+            correct = self.student_correct.copy()
+            keys = sorted(self._students, key=self._students.get)
+            names = [self._student_names[key] for key in keys]
+        duplicated = {name for name, count in Counter(names).items() if count > 1}
+        labels = [f"{name} ({key[:6]})" if name in duplicated else name for key, name in zip(keys, names)]
+        score = np.round(100 * correct / np.where(answered > 0, answered, 1)).astype(np.int64)
+        return {"student_key": keys, "student": labels, "answered": answered, "correct": correct, "score": score}
@@ -0,0 +1,162 @@
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+
+from tokens import count_tokens
+
+# === 줄거리 정규화/압축 ===
+# 네이버 API 설명과 크롤링한 책 소개는 같은 문장이 겹치는 경우가 많고(API 설명은 소개의 앞부분을
+# 잘라 "..."로 끝남), 더보기/출판사 서평 같은 페이지 문구가 섞여 있다.
+# 이 줄거리가 재작성/퀴즈/토론 주제/감상문 피드백 프롬프트에 그대로 들어가므로
+# 프롬프트를 만들기 전에 겹치는 문장과 페이지 문구를 지우고 토큰 예산 안으로 자른다.
+
+# 줄 전체가 이 문구면 삭제
+BOILERPLATE_LINES = frozenset({
+    "더보기", "접기", "펼치기", "펼쳐보기", "책소개", "책 소개", "출판사 서평", "출판사 리뷰",
+    "출판사리뷰", "목차", "줄거리", "줄거리 정보가 없습니다.",
+})
+# 이 패턴이 들어 있는 줄은 삭제 (저작권, 판매처 안내, 링크 등)
+BOILERPLATE_RE = re.compile(
+    r"^\s*(※|ⓒ|©|copyright\b)|https?://|상세\s*이미지|사은품|무료\s*배송|구매\s*시|"
+    r"예스24|교보문고|알라딘|인터파크|\[출처",
+    re.IGNORECASE,
+)
+SENTENCE_END_RE = re.compile(r"(?<=[.!?。…])\s+")
+TRUNCATION_RE = re.compile(r"\s*(\.{3,}|…)\s*$")
+KEY_STRIP_RE = re.compile(r"[\W_]+")
+# 이보다 짧은 문장은 다른 문장에 포함되는지는 보지 않고 완전히 같을 때만 중복으로 봄
+MIN_CONTAINED_KEY = 10
+
+
+def _sentence_key(sentence):
+    return KEY_STRIP_RE.sub("", TRUNCATION_RE.sub("", sentence)).casefold()
+
+
+def split_sentences(sources):
+    """[(출처 번호, 줄 번호, 문장), ...] (페이지 문구 줄은 제외하고, 삭제한 줄 수도 반환)"""
+    sentences, boilerplate = [], 0
+    for source_no, text in enumerate(sources):
+        for line_no, line in enumerate(html.unescape(text or "").splitlines()):
+            line = line.strip()
+            if not line:
+                continue
+            if line in BOILERPLATE_LINES or BOILERPLATE_RE.search(line):
+                boilerplate += 1
+                continue
+            for sentence in SENTENCE_END_RE.split(line):
+                if sentence.strip():
+                    sentences.append((source_no, line_no, sentence.strip()))
+    return sentences, boilerplate
+
+
+def dedupe_sentences(sentences):
+    """완전히 같거나 더 긴 문장에 포함되는 문장(잘린 API 설명 등)을 지우고 원래 순서로 반환"""
+    keys = [_sentence_key(sentence) for _, _, sentence in sentences]
+    kept_keys, kept = set(), []
+    for index in sorted(range(len(sentences)), key=lambda i: -len(keys[i])):
+        key = keys[index]
+        if not key or key in kept_keys:
+            continue
+        if len(key) >= MIN_CONTAINED_KEY and any(key in other for other in kept_keys):
+            continue
+        kept_keys.add(key)
+        kept.append(index)
+    return [sentences[index] for index in sorted(kept)]
+
+
+def join_sentences(sentences):
+    """같은 줄의 문장은 공백으로, 줄은 줄바꿈으로, 출처 사이는 빈 줄로 이어 붙임"""
+    parts, previous = [], None
+    for source_no, line_no, sentence in sentences:
+        if previous is not None:
+            if source_no != previous[0]:
+                parts.append("\n\n")
+            elif line_no != previous[1]:
+                parts.append("\n")
+            else:
+                parts.append(" ")
+        parts.append(sentence)
+        previous = (source_no, line_no)
+    return "".join(parts)
+
+
+class SynopsisNormalizer:
+    """줄거리 정규화기 (같은 입력은 다시 계산하지 않음, 프로세스에 1개)
+
+    - budget: 정규화한 줄거리의 최대 토큰 수 (넘으면 뒤 문장부터 버림, None이면 자르지 않음)
+    - maxsize: 정규화 결과를 보관할 최대 입력 수
+    """
+
+    def __init__(self, budget=1200, maxsize=2048, count=count_tokens):
+        self.budget = budget
+        self.maxsize = maxsize
+        self.count = count
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._totals = {
+            "normalized": 0, "raw_tokens": 0, "tokens": 0,
+            "duplicate_sentences": 0, "boilerplate_lines": 0, "trimmed_sentences": 0,
+        }
+        self.hits = 0
+
+    def _key(self, sources):
+        source = "\x00".join(text or "" for text in sources)
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def _normalize(self, sources):
+        raw_tokens = sum(self.count(text) for text in sources if text)
+        sentences, boilerplate = split_sentences(sources)
+        unique = dedupe_sentences(sentences)
+        kept, tokens = [], 0
+        for entry in unique:
+            sentence_tokens = self.count(entry[2])
+            if self.budget is not None and kept and tokens + sentence_tokens > self.budget:
+                break
+            kept.append(entry)
+            tokens += sentence_tokens
+        text = join_sentences(kept)
+        return text, {
+            "raw_tokens": raw_tokens,
+            "tokens": self.count(text),
+            "duplicate_sentences": len(sentences) - len(unique),
+            "boilerplate_lines": boilerplate,
+            "trimmed_sentences": len(unique) - len(kept),
+        }
+
+    def normalize_with_stats(self, *sources):
+        """(정규화한 줄거리, 이 입력의 토큰 절감 정보). 남는 문장이 없으면 빈 문자열"""
+        key = self._key(sources)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+        result = self._normalize(sources)
+        with self._lock:
+            if key not in self._cache:
+                stats = result[1]
+                self._totals["normalized"] += 1
+                for name in ("raw_tokens", "tokens", "duplicate_sentences", "boilerplate_lines",
+                             "trimmed_sentences"):
+                    self._totals[name] += stats[name]
+            self._cache[key] = result
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return result
+
+    def normalize(self, *sources):
+        """여러 출처의 줄거리를 하나로 정규화 (출처 순서대로 이어 붙임)"""
+        return self.normalize_with_stats(*sources)[0]
+
+    def stats(self):
+        with self._lock:
+            totals = dict(self._totals)
+            totals.update(budget=self.budget, cached=len(self._cache), hits=self.hits)
+        totals["saved_tokens"] = totals["raw_tokens"] - totals["tokens"]
+        totals["saved_ratio"] = (
+            round(totals["saved_tokens"] / totals["raw_tokens"], 3) if totals["raw_tokens"] else 0.0
+        )
+        return totals
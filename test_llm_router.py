@@ -0,0 +1,167 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from llm import LLMClient, LLMError, LLMTimeoutError
+from llm_router import CircuitBreaker, ModelRouter
+from scheduler import INTERACTIVE, LLMScheduler
+
+PRIMARY, FALLBACK = "gpt-4o", "gpt-4o-mini"
+MESSAGES = [{"role": "user", "content": "줄거리를 요약해줘"}]
+
+
+class FakeCompletions:
+    """모델별로 지연/에러를 정할 수 있는 chat.completions.with_raw_response 대역"""
+
+    def __init__(self, **models):
+        # 모델 -> {"delay": 응답까지 걸리는 시간(초), "error": 던질 예외}
+        self.models = models
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, stream=False, timeout=None, **params):
+        with self._lock:
+            self.calls.append(model)
+        behavior = self.models.get(model, {})
+        time.sleep(behavior.get("delay", 0))
+        if behavior.get("error"):
+            raise behavior["error"]
+        text = f"{model} 응답"
+        if stream:
+            chunks = [
+                SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+                for part in (model, " 응답")
+            ]
+            return SimpleNamespace(parse=lambda: iter(chunks), retries_taken=0)
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+        return SimpleNamespace(
+            parse=lambda: response, http_response=SimpleNamespace(content=text.encode()), retries_taken=0
+        )
+
+
+def make_router(completions, scheduler=None, timeout=2.0, breaker=None):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(with_raw_response=completions)))
+    llm = LLMClient(client, scheduler=scheduler)
+    return ModelRouter(llm, primary=PRIMARY, fallback=FALLBACK, timeout=timeout, breaker=breaker)
+
+
+def test_fast_primary_is_not_hedged():
+    completions = FakeCompletions()
+    router = make_router(completions)
+    assert router.complete(MESSAGES, deadline=1.0) == f"{PRIMARY} 응답"
+    assert completions.calls == [PRIMARY]
+    stats = router.stats()
+    assert (stats["hedged"], stats["primary_wins"]) == (0, 1)
+
+
+def test_slow_primary_is_hedged_to_the_fallback():
+    completions = FakeCompletions(**{PRIMARY: {"delay": 0.5}})
+    router = make_router(completions)
+    started = time.monotonic()
+    assert router.complete(MESSAGES, deadline=0.1) == f"{FALLBACK} 응답"
+    assert time.monotonic() - started < 0.4
+    stats = router.stats()
+    assert (stats["hedged"], stats["fallback_wins"], stats["breaker_failures"]) == (1, 1, 1)
+
+
+def test_primary_error_falls_back_without_waiting_for_the_deadline():
+    completions = FakeCompletions(**{PRIMARY: {"error": RuntimeError("503")}})
+    router = make_router(completions)
+    assert router.complete(MESSAGES, deadline=5.0) == f"{FALLBACK} 응답"
+    assert completions.calls == [PRIMARY, FALLBACK]
+
+
+def test_both_models_failing_raises_llm_error():
+    completions = FakeCompletions(**{
+        PRIMARY: {"error": RuntimeError("503")},
+        FALLBACK: {"error": RuntimeError("429")},
+    })
+    router = make_router(completions)
+    with pytest.raises(LLMError):
+        router.complete(MESSAGES, deadline=1.0)
+    assert router.stats()["errors"] == 1
+
+
+def test_no_response_within_timeout_raises_llm_timeout_error():
+    completions = FakeCompletions(**{PRIMARY: {"delay": 1.0}, FALLBACK: {"delay": 1.0}})
+    router = make_router(completions, timeout=0.2)
+    with pytest.raises(LLMTimeoutError):
+        router.complete(MESSAGES, deadline=0.05)
+    assert router.stats()["timeouts"] == 1
+
+
+def test_stream_is_hedged_on_slow_first_chunk():
+    completions = FakeCompletions(**{PRIMARY: {"delay": 0.5}})
+    router = make_router(completions)
+    assert "".join(router.stream(MESSAGES, deadline=0.1)) == f"{FALLBACK} 응답"
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    completions = FakeCompletions(**{PRIMARY: {"delay": 0.2}})
+    router = make_router(completions)
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: router.complete(MESSAGES, deadline=1.0), range(4)))
+    assert results == [f"{PRIMARY} 응답"] * 4
+    assert completions.calls == [PRIMARY]
+    assert router.llm.stats()["coalesced"] == 3
+
+
+def test_circuit_breaker_opens_and_probes_after_cooldown():
+    completions = FakeCompletions(**{PRIMARY: {"error": RuntimeError("503")}})
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.2)
+    router = make_router(completions, breaker=breaker)
+    for i in range(2):
+        router.complete([{"role": "user", "content": f"요청 {i}"}], deadline=1.0)
+    assert breaker.state == "open"
+
+    # 열려 있는 동안은 기본 모델에 보내지 않음
+    completions.calls.clear()
+    router.complete([{"role": "user", "content": "요청 2"}], deadline=1.0)
+    assert completions.calls == [FALLBACK]
+    assert router.stats()["circuit_fallbacks"] == 1
+
+    # 대기 시간이 지나면 한 요청만 기본 모델로 보내고, 성공하면 닫힘
+    time.sleep(0.25)
+    completions.models[PRIMARY] = {}
+    completions.calls.clear()
+    assert router.complete([{"role": "user", "content": "요청 3"}], deadline=1.0) == f"{PRIMARY} 응답"
+    assert completions.calls == [PRIMARY]
+    assert breaker.state == "closed"
+
+
+def test_breaker_allows_one_probe_per_cooldown():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.1)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.15)
+    assert breaker.allow()
+    assert not breaker.allow()  # 확인 요청이 끝날 때까지 다른 요청은 대체 모델로
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_deadline_starts_when_the_scheduler_grants_the_turn():
+    """대기열에서 기다린 시간은 마감 시간에 들어가지 않음 (차례를 받은 뒤 빨리 답하면 hedging 없음)"""
+    scheduler = LLMScheduler(requests_per_min=60)
+    scheduler.requests.tokens = 0  # 첫 차례까지 약 1초
+    completions = FakeCompletions(**{PRIMARY: {"delay": 0.02}})
+    router = make_router(completions, scheduler=scheduler)
+    assert router.complete(MESSAGES, deadline=0.3, priority=INTERACTIVE, session_id="s1") == f"{PRIMARY} 응답"
+    stats = router.stats()
+    assert (stats["hedged"], stats["breaker_failures"]) == (0, 0)
+
+
+def test_losing_hedge_leaves_the_scheduler_queue():
+    scheduler = LLMScheduler(requests_per_min=60)
+    completions = FakeCompletions(**{PRIMARY: {"delay": 0.3}})
+    router = make_router(completions, scheduler=scheduler)
+    scheduler.requests.tokens = 1  # 기본 모델만 바로 차례를 받고 대체 모델은 대기열에서 기다림
+    assert router.complete(MESSAGES, deadline=0.1, session_id="s1") == f"{PRIMARY} 응답"
+    assert completions.calls == [PRIMARY]
+    deadline = time.monotonic() + 1
+    while scheduler.stats()["interactive"]["queue_depth"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.stats()["interactive"]["queue_depth"] == 0
@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import (
+    BACKGROUND, INTERACTIVE, PRIORITY_NAMES, REWRITE, AcquireCancelled, LLMScheduler, TokenBucket,
+    priority_override, run_with_priority,
+)
+
+
+def queue_depth(scheduler):
+    stats = scheduler.stats()
+    return sum(stats[name]["queue_depth"] for name in PRIORITY_NAMES.values())
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "제한 시간 안에 조건이 만족되지 않았습니다."
+        time.sleep(0.005)
+
+
+def throttled_scheduler():
+    """요청 버킷을 비워서 release() 전에는 차례를 주지 않는 스케줄러"""
+    scheduler = LLMScheduler(requests_per_min=1200)
+    scheduler.requests.tokens = 0
+    scheduler.requests.rate = 1 / 60
+    return scheduler
+
+
+def release(scheduler):
+    """0.05초에 한 요청씩 차례를 주기 시작"""
+    with scheduler._cond:
+        scheduler.requests.rate = 20.0
+        scheduler._cond.notify_all()
+
+
+def enqueue_in_order(scheduler, tickets, granted, **kwargs):
+    """tickets의 (라벨, 등급, 세션)을 순서대로 대기열에 넣고 차례를 받은 순서를 granted에 기록"""
+    threads = []
+    for label, level, session_id in tickets:
+        def run(label=label, level=level, session_id=session_id):
+            scheduler.acquire(level, session_id, tokens=10, **kwargs)
+            granted.append(label)
+        depth = queue_depth(scheduler)
+        thread = threading.Thread(target=run)
+        thread.start()
+        wait_until(lambda: queue_depth(scheduler) > depth)
+        threads.append(thread)
+    return threads
+
+
+def test_acquire_is_immediate_when_budget_is_available():
+    scheduler = LLMScheduler()
+    assert scheduler.acquire(INTERACTIVE, "s1", tokens=100) < 0.05
+    assert scheduler.stats()["interactive"]["granted"] == 1
+
+
+def test_higher_priority_is_granted_first():
+    scheduler = throttled_scheduler()
+    granted = []
+    threads = enqueue_in_order(scheduler, [
+        ("background", BACKGROUND, "s1"),
+        ("rewrite", REWRITE, "s2"),
+        ("interactive", INTERACTIVE, "s3"),
+    ], granted)
+    release(scheduler)
+    for thread in threads:
+        thread.join(5)
+    assert granted == ["interactive", "rewrite", "background"]
+
+
+def test_sessions_take_turns_within_a_priority():
+    scheduler = throttled_scheduler()
+    granted = []
+    threads = enqueue_in_order(scheduler, [
+        ("a1", INTERACTIVE, "a"),
+        ("a2", INTERACTIVE, "a"),
+        ("a3", INTERACTIVE, "a"),
+        ("b1", INTERACTIVE, "b"),
+        ("c1", INTERACTIVE, "c"),
+    ], granted)
+    release(scheduler)
+    for thread in threads:
+        thread.join(5)
+    # 세션 a가 먼저 세 개를 넣었어도 b, c가 a의 두 번째 요청보다 먼저 차례를 받는다
+    assert granted == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_cancelled_ticket_leaves_the_queue():
+    scheduler = throttled_scheduler()
+    cancelled = threading.Event()
+    errors = []
+
+    def waiter():
+        try:
+            scheduler.acquire(INTERACTIVE, "s1", tokens=10, cancelled=cancelled)
+        except AcquireCancelled as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_until(lambda: queue_depth(scheduler) == 1)
+    cancelled.set()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert len(errors) == 1
+    assert queue_depth(scheduler) == 0
+    assert scheduler.stats()["interactive"]["granted"] == 0
+
+
+def test_cancelled_before_enqueue_raises_immediately():
+    scheduler = LLMScheduler()
+    cancelled = threading.Event()
+    cancelled.set()
+    with pytest.raises(AcquireCancelled):
+        scheduler.acquire(INTERACTIVE, "s1", tokens=10, cancelled=cancelled)
+    assert queue_depth(scheduler) == 0
+
+
+def test_cancelled_head_lets_the_next_ticket_through():
+    scheduler = throttled_scheduler()
+    cancelled = threading.Event()
+    granted, errors = [], []
+
+    def head():
+        try:
+            scheduler.acquire(INTERACTIVE, "s1", tokens=10, cancelled=cancelled)
+            granted.append("head")
+        except AcquireCancelled:
+            errors.append("head")
+
+    first = threading.Thread(target=head)
+    first.start()
+    wait_until(lambda: queue_depth(scheduler) == 1)
+    threads = enqueue_in_order(scheduler, [("next", BACKGROUND, "s2")], granted)
+    cancelled.set()
+    first.join(1)
+    release(scheduler)
+    threads[0].join(1)
+    assert errors == ["head"]
+    assert granted == ["next"]
+
+
+def test_timeout_removes_the_ticket():
+    scheduler = throttled_scheduler()
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(INTERACTIVE, "s1", tokens=10, timeout=0.05)
+    assert queue_depth(scheduler) == 0
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(rate_per_min=600)  # 초당 10
+    now = bucket.updated
+    assert bucket.wait_time(600, now) == 0
+    bucket.consume(600)
+    assert bucket.wait_time(5, now) == pytest.approx(0.5)
+    # 한 번에 capacity보다 많이 요청해도 capacity만큼만 기다림
+    assert bucket.wait_time(10_000, now) == pytest.approx(60)
+
+
+def test_run_with_priority_sets_the_override():
+    assert priority_override.get() is None
+    assert run_with_priority(BACKGROUND, priority_override.get) == BACKGROUND
+    assert priority_override.get() is None
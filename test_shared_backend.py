@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from shared_backend import InProcessBackend, SQLiteBackend, open_backend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    """같은 테스트를 두 구현에 대해 실행 (sqlite는 임시 파일)"""
+    def make(**kwargs):
+        if request.param == "memory":
+            return InProcessBackend(**kwargs)
+        return SQLiteBackend(str(tmp_path / "shared.sqlite3"), **kwargs)
+    return make
+
+
+def test_artifact_roundtrip(make_backend):
+    backend = make_backend()
+    assert backend.get_artifact("quiz", "isbn-1") is None
+    backend.put_artifact("quiz", "isbn-1", [{"question": "주인공은?"}])
+    assert backend.get_artifact("quiz", "isbn-1") == [{"question": "주인공은?"}]
+    assert backend.get_artifact("debate", "isbn-1") is None
+    backend.delete_artifact("quiz", "isbn-1")
+    assert backend.get_artifact("quiz", "isbn-1") is None
+
+
+def test_lease_is_exclusive_until_released(make_backend):
+    backend = make_backend()
+    first, second = backend.new_owner(), backend.new_owner()
+    assert backend.acquire_lease("synopsis:a", first, ttl=60)
+    assert backend.acquire_lease("synopsis:a", first, ttl=60)  # 같은 소유자는 연장
+    assert not backend.acquire_lease("synopsis:a", second, ttl=60)
+    assert backend.lease_held("synopsis:a")
+
+    backend.release_lease("synopsis:a", second)  # 소유자가 아니면 무시
+    assert backend.lease_held("synopsis:a")
+    backend.release_lease("synopsis:a", first)
+    assert not backend.lease_held("synopsis:a")
+    assert backend.acquire_lease("synopsis:a", second, ttl=60)
+
+
+def test_expired_lease_can_be_taken_over(make_backend):
+    backend = make_backend()
+    assert backend.acquire_lease("bank_refill:a", "dead-worker", ttl=0.05)
+    time.sleep(0.1)
+    assert not backend.lease_held("bank_refill:a")
+    assert backend.acquire_lease("bank_refill:a", "new-worker", ttl=60)
+
+
+def test_artifacts_expire_after_ttl(make_backend):
+    backend = make_backend(ttl=0.05)
+    backend.put_artifact("synopsis", "a", "줄거리")
+    assert backend.get_artifact("synopsis", "a") == "줄거리"
+    time.sleep(0.1)
+    assert backend.get_artifact("synopsis", "a") is None
+    assert backend.stats()["artifacts"] == 0
+
+
+def test_least_recently_used_artifact_is_evicted(make_backend):
+    backend = make_backend(maxsize=2)
+    backend.put_artifact("quiz", "a", 1)
+    time.sleep(0.01)
+    backend.put_artifact("quiz", "b", 2)
+    time.sleep(0.01)
+    assert backend.get_artifact("quiz", "a") == 1  # a를 최근에 씀
+    time.sleep(0.01)
+    backend.put_artifact("quiz", "c", 3)
+    assert backend.get_artifact("quiz", "a") == 1
+    assert backend.get_artifact("quiz", "b") is None
+    assert backend.get_artifact("quiz", "c") == 3
+    assert backend.stats()["artifacts"] == 2
+
+
+def test_generate_once_runs_fn_in_one_thread(make_backend):
+    backend = make_backend()
+    backend.poll_interval = 0.01
+    calls = []
+    started = threading.Event()
+
+    def generate():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return ["토론 주제"]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(backend.generate_once("debate", "a", generate)))
+        for _ in range(4)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [["토론 주제"]] * 4
+    assert not backend.lease_held("debate:a")
+
+
+def test_generate_once_does_not_store_empty_results(make_backend):
+    backend = make_backend()
+    assert backend.generate_once("quiz", "a", lambda: []) == []
+    assert backend.get_artifact("quiz", "a") is None
+    assert backend.generate_once("quiz", "a", lambda: [1]) == [1]
+    assert backend.get_artifact("quiz", "a") == [1]
+
+
+def test_sqlite_put_removes_expired_leases(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "shared.sqlite3"))
+    backend.acquire_lease("synopsis:a", "dead-worker", ttl=0.01)
+    time.sleep(0.05)
+    backend.put_artifact("synopsis", "b", "줄거리")
+    assert backend.stats()["leases"] == 0
+
+
+def test_sqlite_backend_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+    assert worker_a.acquire_lease("synopsis:a", "worker-a", ttl=60)
+    assert not worker_b.acquire_lease("synopsis:a", "worker-b", ttl=60)
+    worker_a.put_artifact("synopsis", "a", "줄거리")
+    assert worker_b.get_artifact("synopsis", "a") == "줄거리"
+
+
+def test_sqlite_adds_accessed_at_to_old_files(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE artifacts (kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+        "updated_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+    )
+    conn.execute("INSERT INTO artifacts VALUES ('quiz', 'a', '[1]', ?)", (time.time(),))
+    conn.commit()
+    conn.close()
+
+    backend = SQLiteBackend(path)
+    assert backend.get_artifact("quiz", "a") == [1]
+    backend.put_artifact("quiz", "b", [2])
+    assert backend.stats()["artifacts"] == 2
+
+
+def test_open_backend_spec(tmp_path):
+    assert isinstance(open_backend("memory"), InProcessBackend)
+    assert isinstance(open_backend(""), InProcessBackend)
+    backend = open_backend(f"sqlite:{tmp_path / 'shared.sqlite3'}", maxsize=10, ttl=None)
+    assert isinstance(backend, SQLiteBackend)
+    assert (backend.maxsize, backend.ttl) == (10, None)
+    with pytest.raises(ValueError):
+        open_backend("redis://localhost")
@@ -0,0 +1,141 @@
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+
+from question_bank import question_id
+from submissions import NO_ANSWER, QuizAnalytics, SubmissionStore
+
+QUIZ = [
+    {"question": f"문제 {n}", "options": ["가", "나", "다", "라"], "correct_answer": "가"}
+    for n in range(3)
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SubmissionStore(str(tmp_path / "submissions.sqlite3"))
+
+
+def answers(*choices):
+    return {str(idx): choice for idx, choice in enumerate(choices)}
+
+
+def by_student_key(scores):
+    """student_scores() 결과를 학생 키 -> 한 학생의 값으로 바꿈"""
+    return {
+        key: {
+            "student": scores["student"][idx],
+            "answered": int(scores["answered"][idx]),
+            "correct": int(scores["correct"][idx]),
+            "score": int(scores["score"][idx]),
+        }
+        for idx, key in enumerate(scores["student_key"])
+    }
+
+
+def test_resubmitting_the_same_quiz_is_recorded_once(store):
+    assert store.append("isbn-1", "어린 왕자", "민수", "key-a", QUIZ, answers("가", "나", "가")) == 3
+    assert store.append("isbn-1", "어린 왕자", "민수", "key-a", QUIZ, answers("나", "나", "나")) == 0
+    assert store.books() == [("isbn-1", "어린 왕자", 3)]
+    assert set(store.questions("isbn-1")) == {question_id(item) for item in QUIZ}
+
+
+def test_refresh_adds_only_new_rows(store):
+    analytics = QuizAnalytics(store, "isbn-1")
+    store.append("isbn-1", "어린 왕자", "민수", "key-a", QUIZ, answers("가", "나", "가"))
+    assert analytics.refresh() == 3
+    assert analytics.refresh() == 0
+
+    store.append("isbn-1", "어린 왕자", "지우", "key-b", QUIZ, answers("가", "가", None))
+    store.append("isbn-2", "샬롯의 거미줄", "지우", "key-b", QUIZ, answers("가", "가", "가"))  # 다른 책
+    assert analytics.refresh() == 3
+
+    stats = analytics.question_stats()
+    row = {qid: idx for idx, qid in enumerate(stats["question_id"])}
+    first, second, third = (row[question_id(item)] for item in QUIZ)
+    assert stats["attempts"].tolist() == [2, 2, 2]
+    assert stats["correct_rate"][[first, second, third]].tolist() == [1.0, 0.5, 0.5]
+    assert stats["difficulty"][[first, second, third]].tolist() == [0.0, 0.5, 0.5]
+    # 세 번째 문제: 한 명은 "가", 한 명은 답하지 않음
+    assert stats["option_rates"][third, 0] == 0.5
+    assert stats["option_rates"][third, NO_ANSWER] == 0.5
+    assert stats["option_rates"].sum(axis=1).tolist() == [1.0, 1.0, 1.0]
+
+
+def test_students_are_grouped_by_key_not_name(store):
+    analytics = QuizAnalytics(store, "isbn-1")
+    quiz_b = [dict(item, question=item["question"] + " 다시") for item in QUIZ]  # 다른 퀴즈로 다시 제출
+    store.append("isbn-1", "어린 왕자", "민수", "key-a", QUIZ, answers("가", "가", "가"))
+    store.append("isbn-1", "어린 왕자", "민수", "key-b", QUIZ, answers("나", "나", "나"))  # 동명이인
+    store.append("isbn-1", "어린 왕자", "민수2", "key-a", quiz_b, answers("가", "나", "나"))  # 이름을 고침
+    analytics.refresh()
+
+    scores = by_student_key(analytics.student_scores())
+    assert scores == {
+        "key-a": {"student": "민수2", "answered": 6, "correct": 4, "score": 67},  # 가장 최근 제출의 이름
+        "key-b": {"student": "민수", "answered": 3, "correct": 0, "score": 0},
+    }
+
+
+def test_same_display_name_gets_a_key_suffix(store):
+    analytics = QuizAnalytics(store, "isbn-1")
+    store.append("isbn-1", "어린 왕자", "민수", "aaaaaa-1", QUIZ, answers("가", "가", "가"))
+    store.append("isbn-1", "어린 왕자", "민수", "bbbbbb-2", QUIZ, answers("나", "나", "나"))
+    analytics.refresh()
+    assert sorted(analytics.student_scores()["student"]) == ["민수 (aaaaaa)", "민수 (bbbbbb)"]
+
+
+def test_old_files_without_student_key_group_by_name(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE answers (id INTEGER PRIMARY KEY AUTOINCREMENT, submission_id TEXT NOT NULL, "
+        "book_key TEXT NOT NULL, student TEXT NOT NULL, question_id TEXT NOT NULL, choice INTEGER NOT NULL, "
+        "correct INTEGER NOT NULL, submitted_at REAL NOT NULL, UNIQUE (submission_id, question_id))"
+    )
+    conn.execute(
+        "INSERT INTO answers (submission_id, book_key, student, question_id, choice, correct, submitted_at) "
+        "VALUES ('old', 'isbn-1', '민수', ?, 0, 1, 0)", (question_id(QUIZ[0]),)
+    )
+    conn.commit()
+    conn.close()
+
+    store = SubmissionStore(path)
+    store.append("isbn-1", "어린 왕자", "지우", "key-b", QUIZ, answers("가", "나", "나"))
+    analytics = QuizAnalytics(store, "isbn-1")
+    assert analytics.refresh() == 4
+    scores = by_student_key(analytics.student_scores())
+    assert {key: row["answered"] for key, row in scores.items()} == {"민수": 1, "key-b": 3}
+    assert {key: row["correct"] for key, row in scores.items()} == {"민수": 1, "key-b": 1}
+
+
+def test_incremental_totals_match_a_full_recount(store):
+    rng = random.Random(7)
+    quizzes = [
+        [{"question": f"{book}-{n}", "options": ["가", "나", "다", "라"], "correct_answer": "다"} for n in range(5)]
+        for book in range(3)
+    ]
+    analytics = QuizAnalytics(store, "isbn-1")
+    submitted = []
+    for batch in range(4):
+        for student in range(10):
+            quiz = rng.choice(quizzes)
+            choice = answers(*(rng.choice(["가", "나", "다", "라", None]) for _ in quiz))
+            key = f"key-{student}"
+            if store.append("isbn-1", "어린 왕자", f"학생{student}", key, quiz, choice):
+                submitted.append((key, quiz, choice))
+        analytics.refresh()  # 배치마다 새 행만 더함
+
+    attempts, correct = {}, {}
+    for key, quiz, choice in submitted:
+        for idx, item in enumerate(quiz):
+            qid = question_id(item)
+            attempts[qid] = attempts.get(qid, 0) + 1
+            correct[qid] = correct.get(qid, 0) + (choice[str(idx)] == item["correct_answer"])
+    stats = analytics.question_stats()
+    assert dict(zip(stats["question_id"], stats["attempts"].tolist())) == attempts
+    expected_rate = np.array([correct[qid] / attempts[qid] for qid in stats["question_id"]])
+    assert np.allclose(stats["correct_rate"], expected_rate)
+    assert analytics.student_scores()["answered"].sum() == sum(len(quiz) for _, quiz, _ in submitted)
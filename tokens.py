@@ -0,0 +1,47 @@
+try:
+    import tiktoken
+except ImportError:  # tiktoken이 없으면 글자 수 기반 추정치를 사용
+    tiktoken = None
+
+# === 토큰 수 계산 ===
+# 프롬프트 예산 관리와 요청 스케줄링에 쓰는 토큰 수 계산 함수.
+
+TOKENIZER_MODEL = "gpt-4o"
+# 메시지마다 붙는 role/구분자 오버헤드 (OpenAI chat 포맷 기준 근사치)
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 2
+
+_encoding = None
+_encoding_unavailable = False
+
+
+def get_encoding():
+    """tiktoken 인코딩 (tiktoken이 없거나 BPE 파일을 받지 못하면 None)"""
+    global _encoding, _encoding_unavailable
+    if _encoding is None and tiktoken is not None and not _encoding_unavailable:
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except (OSError, ValueError):
+            # 오프라인이거나 BPE 파일 호스트가 막혀 있으면 글자 수 기반 추정으로 대체 (다시 받으려 하지 않음)
+            _encoding_unavailable = True
+    return _encoding
+
+
+def count_tokens(text):
+    """텍스트의 토큰 수 (tiktoken이 없으면 한글 기준 대략 글자 수의 절반으로 추정)"""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 2)
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages):
+    """chat completions 메시지 목록의 프롬프트 토큰 수"""
+    return sum(
+        MESSAGE_OVERHEAD_TOKENS + count_tokens(message["content"]) for message in messages
+    ) + REPLY_PRIMING_TOKENS
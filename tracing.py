@@ -0,0 +1,164 @@
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# === 외부 호출 추적 ===
+# 네이버 API, 네이버 책 크롤링, OpenAI 호출마다 소요 시간, 상태, 재시도 횟수, 바이트 수,
+# 토큰 수, 캐시 히트 여부를 호출 지점(call_site)과 페이지 태그와 함께 기록한다.
+# 기록은 회전되는 JSONL 로그 파일과 Prometheus 텍스트 형식의 스크레이프 파일로 내보내고,
+# 최근 기록으로 호출 지점별 지연 분위수를 계산한다.
+
+# 현재 Streamlit 실행이 그리고 있는 페이지 (백그라운드 스레드에서는 "background")
+current_page = contextvars.ContextVar("current_page", default="background")
+
+
+def set_page(page):
+    current_page.set(page)
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * q / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+class Tracer:
+    """외부 호출 기록기
+
+    - log_path: JSONL 로그 파일 경로 (None이면 파일에 쓰지 않음)
+    - max_bytes / backup_count: 로그 파일 회전 설정
+    - metrics_path: Prometheus 텍스트 형식 스크레이프 파일 경로
+    - metrics_interval: 스크레이프 파일을 다시 쓰는 최소 간격(초)
+    - window: 분위수 계산에 쓰는 호출 지점별 최근 기록 수
+    """
+
+    def __init__(self, log_path=None, max_bytes=5 * 2**20, backup_count=5,
+                 metrics_path=None, metrics_interval=10.0, window=1000):
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._lock = threading.Lock()
+        self._recent = defaultdict(lambda: deque(maxlen=window))
+        self._totals = defaultdict(lambda: defaultdict(float))
+        self._last_metrics_write = 0.0
+        self._logger = None
+        if log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+            self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            handler = RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    @contextmanager
+    def span(self, call_site, **fields):
+        """with 블록 하나를 외부 호출 하나로 기록
+
+        블록 안에서 반환된 dict에 status, retries, bytes, prompt_tokens,
+        completion_tokens, cache_hit 등을 채워 넣으면 함께 기록된다.
+        """
+        record = {"call_site": call_site, "page": current_page.get(), "status": "ok"}
+        record.update(fields)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            record["duration"] = time.perf_counter() - start
+            self.record(record)
+
+    def record(self, record):
+        record.setdefault("ts", time.time())
+        record.setdefault("page", current_page.get())
+        call_site = record["call_site"]
+        with self._lock:
+            self._recent[call_site].append(record)
+            totals = self._totals[call_site]
+            totals["count"] += 1
+            totals["duration_sum"] += record.get("duration", 0.0)
+            totals["errors"] += record.get("status") == "error"
+            totals["cache_hits"] += bool(record.get("cache_hit"))
+            totals["retries"] += record.get("retries", 0)
+            totals["bytes"] += record.get("bytes", 0)
+            totals["prompt_tokens"] += record.get("prompt_tokens", 0)
+            totals["completion_tokens"] += record.get("completion_tokens", 0)
+        if self._logger is not None:
+            self._logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        if self.metrics_path and time.time() - self._last_metrics_write >= self.metrics_interval:
+            self.write_metrics()
+
+    def percentiles(self):
+        """호출 지점별 최근 기록의 지연 분위수와 누적 합계"""
+        with self._lock:
+            snapshot = {site: list(records) for site, records in self._recent.items()}
+            totals = {site: dict(values) for site, values in self._totals.items()}
+        summary = {}
+        for site, records in snapshot.items():
+            # 캐시 히트는 지연 분포를 왜곡하므로 실제 호출만 분위수에 포함
+            durations = sorted(r["duration"] for r in records if not r.get("cache_hit"))
+            summary[site] = {
+                "recent": len(records),
+                "p50": _percentile(durations, 50),
+                "p95": _percentile(durations, 95),
+                "p99": _percentile(durations, 99),
+                "cache_hit_rate": sum(bool(r.get("cache_hit")) for r in records) / len(records),
+                "error_rate": sum(r.get("status") == "error" for r in records) / len(records),
+                "total": totals.get(site, {}),
+            }
+        return summary
+
+    def write_metrics(self, path=None):
+        """Prometheus 텍스트 형식으로 스크레이프 파일 작성 (node_exporter textfile collector 등)"""
+        path = path or self.metrics_path
+        self._last_metrics_write = time.time()
+        lines = []
+        for site, stats in sorted(self.percentiles().items()):
+            label = f'call_site="{site}"'
+            for q in ("p50", "p95", "p99"):
+                if stats[q] is not None:
+                    quantile = int(q[1:]) / 100
+                    lines.append(
+                        f'reading_external_call_seconds{{{label},quantile="{quantile}"}} {stats[q]:.6f}'
+                    )
+            for name, value in sorted(stats["total"].items()):
+                lines.append(f"reading_external_call_{name}_total{{{label}}} {value:g}")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+_default_tracer = None
+_default_lock = threading.Lock()
+
+
+def get_tracer():
+    """프로세스 기본 Tracer 반환 (없으면 파일 출력 없이 메모리에만 기록)"""
+    global _default_tracer
+    with _default_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer()
+        return _default_tracer
+
+
+def set_tracer(tracer):
+    global _default_tracer
+    with _default_lock:
+        _default_tracer = tracer